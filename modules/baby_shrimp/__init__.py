@@ -2,7 +2,26 @@
 Baby Shrimp Detection and Counting Module
 """
 from .train import train_baby_shrimp
-from .test import test_baby_shrimp, test_batch
-
-__all__ = ['train_baby_shrimp', 'test_baby_shrimp', 'test_batch']
+from .model_cache import ModelCache, get_model, clear_model_cache
+from .test import test_baby_shrimp, test_batch, predict_batches, predict_pipelined, iter_counts
+from .pipeline import Pipeline
+from .tiling import predict_tiled, benchmark_tiled
+from .stream import count_stream, test_stream
+from .export import export_model, resolve_backend, check_parity
+from .quantize import quantize_model, quantization_report
+from .benchmark import run_benchmark, compare_to_baseline
+from .result_cache import ResultCache
+from .workers import count_parallel, scaling_curve
+from .dedupe import find_duplicates
+from .label_index import update_index, dataset_stats
+from .compare import compare_runs
+from .sweep import run_sweep
 
+__all__ = [
+    'train_baby_shrimp', 'test_baby_shrimp', 'test_batch', 'predict_batches', 'predict_pipelined',
+    'iter_counts', 'Pipeline', 'predict_tiled', 'benchmark_tiled', 'count_stream', 'test_stream',
+    'export_model', 'resolve_backend', 'check_parity', 'ModelCache', 'get_model', 'clear_model_cache',
+    'quantize_model', 'quantization_report', 'run_benchmark', 'compare_to_baseline',
+    'ResultCache', 'count_parallel', 'scaling_curve', 'find_duplicates',
+    'update_index', 'dataset_stats', 'compare_runs', 'run_sweep',
+]
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Resource-aware training configuration for Baby Shrimp
+Probes RAM, cores and the model's memory footprint at imgsz, then picks the
+batch size, dataloader workers and image caching mode for this host
+"""
+import argparse
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+import psutil
+import torch
+import yaml
+from torch.utils.data import distributed
+from ultralytics.data.build import PIN_MEMORY, InfiniteDataLoader, seed_worker
+from ultralytics.models.yolo.detect import DetectionTrainer
+from ultralytics.utils.torch_utils import torch_distributed_zero_first
+
+try:
+    from .shards import SHARD_ROOT, ShardTrainer
+    from .throughput import peak_rss
+except ImportError:
+    from shards import SHARD_ROOT, ShardTrainer
+    from throughput import peak_rss
+
+RAM_FRACTION = 0.6  # Share of available RAM (or free GPU memory) training may use
+WORKER_RAM = 512 << 20  # Rough resident size of one dataloader worker
+CACHE_MARGIN = 0.5  # Same safety margin Ultralytics uses for cache='ram'
+MAX_BATCH = {'cpu': 16, 'mps': 32, 'cuda': 64}
+GB = 1 << 30
+
+
+def torch_device(device):
+    """
+    Torch device for an Ultralytics device string
+
+    Ultralytics takes bare CUDA indices ('0', '0,1'); the probes run on a
+    single device, so these map to the first listed GPU.
+    """
+    device = str(device).strip().lower().replace(' ', '')
+    if device in ('', 'none'):
+        return 'cuda:0' if torch.cuda.is_available() else 'cpu'
+    if device[0].isdigit():
+        return f"cuda:{device.split(',')[0]}"
+    return device
+
+
+def probe_resources(device='cpu'):
+    """Cores, RAM and (for CUDA) free GPU memory of this host"""
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    mem = psutil.virtual_memory()
+    device = torch_device(device)
+    info = {'device': device, 'cores': cores, 'ram_total': mem.total, 'ram_available': mem.available}
+    if device.startswith('cuda') and torch.cuda.is_available():
+        free, total = torch.cuda.mem_get_info(device)
+        info.update(gpu_free=free, gpu_total=total)
+    return info
+
+
+def _footprint_worker(model_name, imgsz, device):
+    """Peak memory of a training step at batch 1 and 2 (runs in a fresh process)"""
+    from ultralytics import YOLO
+
+    model = YOLO(model_name).model.to(device).train()
+    for p in model.parameters():
+        p.requires_grad_(True)
+    cuda = device.startswith('cuda')
+    mps = device.startswith('mps')
+
+    peaks = []
+    for batch in (1, 2):
+        if cuda:
+            torch.cuda.reset_peak_memory_stats()
+        elif mps:
+            torch.mps.empty_cache()  # The allocator's pool then grows to this step's peak
+        x = torch.zeros(batch, 3, imgsz, imgsz, device=device)
+        outputs = model(x)
+        sum(o.float().sum() for o in (outputs if isinstance(outputs, (list, tuple)) else [outputs])).backward()
+        if mps:
+            torch.mps.synchronize()
+            peaks.append(torch.mps.driver_allocated_memory())
+        model.zero_grad(set_to_none=True)
+        if cuda:
+            peaks.append(torch.cuda.max_memory_allocated())
+        elif not mps:
+            peaks.append(peak_rss())
+    return peaks
+
+
+def probe_footprint(model_name, imgsz, device='cpu'):
+    """
+    Memory of a training step for model_name at imgsz
+
+    The step runs in a spawned process so its peak is not mixed up with
+    whatever the calling process has already allocated.
+
+    Returns:
+        (base bytes, bytes per image in the batch)
+    """
+    with ProcessPoolExecutor(1, mp_context=get_context('spawn')) as pool:
+        peak1, peak2 = pool.submit(_footprint_worker, str(model_name), imgsz, torch_device(device)).result()
+    per_image = max(peak2 - peak1, 1)
+    return max(peak1 - per_image, 0), per_image
+
+
+def dataset_footprint(data_yaml, imgsz):
+    """
+    Bytes of the train images once decoded and resized to imgsz
+
+    Only image headers are read, so this is cheap even for large datasets.
+
+    Returns:
+        (number of images, bytes)
+    """
+    from PIL import Image
+    from ultralytics.data.utils import check_det_dataset
+
+    data = check_det_dataset(str(Path(data_yaml).resolve()))
+    train = data['train'] if isinstance(data['train'], list) else [data['train']]
+    files = []
+    for entry in map(Path, train):
+        if entry.is_dir():
+            files.extend(p for p in entry.iterdir() if p.suffix.lower() in ('.jpg', '.jpeg', '.png'))
+        elif entry.suffix == '.txt':
+            files.extend(Path(line.strip()) for line in entry.read_text().splitlines() if line.strip())
+
+    total = 0
+    for path in files:
+        with Image.open(path) as im:
+            w, h = im.size
+        r = imgsz / max(h, w)  # BaseDataset.load_image resizes the long side to imgsz
+        total += int(h * r) * int(w * r) * 3
+    return len(files), total
+
+
+def auto_config(model_name, data_yaml, imgsz=640, device='cpu'):
+    """
+    Pick batch size, workers and caching mode for this host
+
+    - workers: on CPU the model step needs the cores, so loaders get a
+      quarter of them; on a GPU all but one core (at most 8)
+    - cache: 'ram' if the decoded dataset fits next to the training step,
+      otherwise 'shards' (memory-mapped, see shards.py) if the disk has room,
+      otherwise no caching
+    - batch: the largest power of two whose step fits in RAM_FRACTION of
+      the remaining memory, capped per device type
+
+    Returns:
+        Dict with batch, workers, cache ('ram', 'shards' or None) and the
+        probe results behind the choice
+    """
+    device = torch_device(device)
+    kind = device.split(':')[0]
+    resources = probe_resources(device)
+    base, per_image = probe_footprint(model_name, imgsz, device)
+    n_images, dataset_bytes = dataset_footprint(data_yaml, imgsz)
+
+    cores = resources['cores']
+    workers = min(8, cores - 1) if kind == 'cuda' else cores // 4
+    workers = max(workers, 0)
+
+    ram_budget = resources['ram_available'] * RAM_FRACTION - workers * WORKER_RAM
+    if kind == 'cuda':
+        step_budget = resources.get('gpu_free', 0) * RAM_FRACTION - base
+        cache_budget = ram_budget
+    else:
+        # CPU and MPS (unified memory) share RAM between the step and the cache
+        step_budget = ram_budget - base
+        cache_budget = ram_budget - base - per_image * min(MAX_BATCH[kind], 8)
+
+    cache_bytes = dataset_bytes * (1 + CACHE_MARGIN)
+    shard_disk = Path(SHARD_ROOT).resolve()
+    while not shard_disk.exists():
+        shard_disk = shard_disk.parent
+    if cache_bytes <= cache_budget:
+        cache = 'ram'
+        if kind != 'cuda':
+            step_budget -= cache_bytes
+    elif dataset_bytes * 1.1 <= shutil.disk_usage(shard_disk).free:
+        cache = 'shards'
+    else:
+        cache = None
+
+    batch = 1
+    while batch * 2 <= MAX_BATCH[kind] and batch * 2 * per_image <= step_budget:
+        batch *= 2
+
+    return {
+        'batch': batch,
+        'workers': workers,
+        'cache': cache,
+        'probe': {
+            'device': device,
+            'cores': cores,
+            'ram_total_gb': round(resources['ram_total'] / GB, 2),
+            'ram_available_gb': round(resources['ram_available'] / GB, 2),
+            'gpu_free_gb': round(resources['gpu_free'] / GB, 2) if 'gpu_free' in resources else None,
+            'step_base_gb': round(base / GB, 3),
+            'step_per_image_gb': round(per_image / GB, 3),
+            'train_images': n_images,
+            'decoded_dataset_gb': round(dataset_bytes / GB, 2),
+        },
+    }
+
+
+def print_config(config):
+    """Print the chosen configuration and the probe results behind it"""
+    probe = config['probe']
+    print("="*60)
+    print("🧭 AUTO CONFIGURATION")
+    print("="*60)
+    print(f"Host: {probe['cores']} cores, {probe['ram_available_gb']:.1f}/{probe['ram_total_gb']:.1f} GB RAM available"
+          + (f", {probe['gpu_free_gb']:.1f} GB GPU free" if probe['gpu_free_gb'] is not None else ""))
+    print(f"Step memory: {probe['step_base_gb']:.2f} GB + {probe['step_per_image_gb']:.3f} GB per image")
+    print(f"Decoded dataset: {probe['decoded_dataset_gb']:.2f} GB ({probe['train_images']} images)")
+    print(f"Batch size: {config['batch']}")
+    print(f"Workers: {config['workers']}")
+    print(f"Cache: {config['cache'] or 'none'}")
+    print("="*60 + "\n")
+
+
+def record_config(config):
+    """
+    Callback that adds the auto configuration to the run's args.yaml
+
+    Ultralytics writes args.yaml when the trainer is created, before the
+    pretrain routine starts; resuming reads the arguments from the
+    checkpoint, so the extra key never reaches the argument parser.
+    """
+    def callback(trainer):
+        args_yaml = Path(trainer.save_dir) / 'args.yaml'
+        if not args_yaml.exists():
+            return
+        with open(args_yaml, 'r') as f:
+            args = yaml.safe_load(f) or {}
+        args['auto'] = config
+        with open(args_yaml, 'w') as f:
+            yaml.safe_dump(args, f, sort_keys=False)
+
+    return callback
+
+
+def recorded_args(run_dir):
+    """
+    Arguments a run was started with, from its args.yaml
+
+    With --auto, the 'auto' entry holds the configuration record_config
+    added, so a resumed run can use the same trainer and cache mode.
+
+    Returns:
+        Dict (empty if there is no args.yaml)
+    """
+    args_yaml = Path(run_dir) / 'args.yaml'
+    if not args_yaml.exists():
+        return {}
+    with open(args_yaml, 'r') as f:
+        return yaml.safe_load(f) or {}
+
+
+class AutoTrainer(DetectionTrainer):
+    """
+    DetectionTrainer whose dataloaders are seeded from args.seed
+
+    Ultralytics seeds every loader generator with the same constant, so the
+    shuffling order and the worker seeds (seed_worker) ignore --seed. Here the
+    generator is derived from args.seed and the rank, so runs with the same
+    seed and worker count see the same batches and augmentations.
+    """
+
+    def get_dataloader(self, dataset_path, batch_size=16, rank=0, mode="train"):
+        assert mode in ["train", "val"]
+        with torch_distributed_zero_first(rank):
+            dataset = self.build_dataset(dataset_path, mode, batch_size)
+        shuffle = mode == "train" and not getattr(dataset, "rect", False)
+        workers = self.args.workers if mode == "train" else self.args.workers * 2
+
+        batch = min(batch_size, len(dataset))
+        nw = min(os.cpu_count() // max(torch.cuda.device_count(), 1), batch, workers)
+        sampler = None if rank == -1 else distributed.DistributedSampler(dataset, shuffle=shuffle)
+        generator = torch.Generator()
+        generator.manual_seed(self.args.seed * 1_000_003 + max(rank, 0) * 2 + (mode == "val"))
+        return InfiniteDataLoader(
+            dataset=dataset,
+            batch_size=batch,
+            shuffle=shuffle and sampler is None,
+            num_workers=nw,
+            sampler=sampler,
+            pin_memory=PIN_MEMORY,
+            collate_fn=getattr(dataset, "collate_fn", None),
+            worker_init_fn=seed_worker,
+            generator=generator,
+        )
+
+
+class AutoShardTrainer(AutoTrainer, ShardTrainer):
+    """AutoTrainer reading from memory-mapped shards (cache='shards')"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the auto training configuration for this host")
+    parser.add_argument("--data", default="modules/baby_shrimp/dataset/data.yaml", help="Path to dataset YAML")
+    parser.add_argument("--model", default="yolo11n.pt", help="Base model")
+    parser.add_argument("--imgsz", type=int, default=640, help="Image size")
+    parser.add_argument("--device", default="cpu", help="Device (mps/cuda/cpu)")
+
+    args = parser.parse_args()
+
+    print_config(auto_config(args.model, args.data, args.imgsz, args.device))
+
+
+if __name__ == "__main__":
+    main()
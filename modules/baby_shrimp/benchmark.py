@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Inference benchmark for Baby Shrimp models
+Sweeps backend / batch size / imgsz / threads and tracks regressions against a baseline
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+import numpy as np
+
+DATASET_DIR = "modules/baby_shrimp/dataset"
+BENCHMARK_DIR = "modules/baby_shrimp/benchmarks"
+
+# Metrics compared against the baseline and the direction that is worse
+REGRESSION_METRICS = {
+    'cold_start_ms': 'higher',
+    'p50_ms': 'higher',
+    'p95_ms': 'higher',
+    'p99_ms': 'higher',
+    'throughput': 'lower',
+    'peak_rss_mb': 'higher',
+}
+
+
+def benchmark_images(dataset_dir=DATASET_DIR, splits=('test', 'valid')):
+    """Images of the given dataset splits (missing splits are skipped)"""
+    image_files = []
+    for split in splits:
+        images_path = Path(dataset_dir) / split / "images"
+        image_files += sorted(list(images_path.glob("*.jpg")) + list(images_path.glob("*.png")))
+    return image_files
+
+
+def config_key(backend, batch_size, imgsz, threads):
+    return f"{backend}-b{batch_size}-{imgsz}px-t{threads}"
+
+
+def run_config(weights, image_files, batch_size=1, imgsz=640, threads=1, conf=0.25, repeat=3):
+    """
+    Benchmark one configuration (run in a fresh process)
+
+    A fresh process makes the cold start real (importing cv2, torch and
+    Ultralytics, loading the model and predicting on the first image) and
+    keeps peak RSS per configuration. This module imports none of them at
+    top level, so the child does not load them while unpickling this
+    function. The remaining images are decoded after the cold start
+    window. Threads are limited by
+    torch.set_num_threads and by pinning the process to `threads` cores,
+    which ONNX Runtime and OpenVINO size their thread pools from.
+
+    Returns:
+        Dict with cold start, per-batch latency percentiles, throughput
+        (images/sec) and peak RSS
+    """
+    if hasattr(os, 'sched_setaffinity'):
+        cores = sorted(os.sched_getaffinity(0))
+        os.sched_setaffinity(0, cores[:threads])
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+
+    start = time.perf_counter()
+    import cv2
+    import torch
+    from ultralytics import YOLO
+    torch.set_num_threads(threads)
+
+    model = YOLO(weights, task='detect')
+    model.predict(source=str(image_files[0]), imgsz=imgsz, conf=conf, save=False, verbose=False)
+    cold_start_ms = (time.perf_counter() - start) * 1000
+
+    images = [img for img in (cv2.imread(str(f)) for f in image_files) if img is not None]
+
+    latencies = []
+    processed = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for i in range(0, len(images), batch_size):
+            batch = images[i:i + batch_size]
+            t0 = time.perf_counter()
+            model.predict(source=batch, imgsz=imgsz, conf=conf, save=False, verbose=False)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            processed += len(batch)
+    elapsed = time.perf_counter() - start
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        'cold_start_ms': cold_start_ms,
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+        'throughput': processed / elapsed,
+        # ru_maxrss is in KB on Linux and bytes on macOS
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 ** 2 if sys.platform == 'darwin' else 1024),
+        'images': processed,
+    }
+
+
+def run_benchmark(model_path, backends=('torch',), batch_sizes=(1,), imgszs=(640,), threads=(1,),
+                  dataset_dir=DATASET_DIR, conf=0.25, repeat=3):
+    """
+    Sweep every combination of backend, batch size, imgsz and thread count
+
+    Returns:
+        Benchmark report dict (host info plus results keyed by configuration)
+    """
+    try:
+        from .export import resolve_backend
+    except ImportError:
+        from export import resolve_backend
+
+    image_files = benchmark_images(dataset_dir)
+    if not image_files:
+        raise FileNotFoundError(f"No test/valid images found in {dataset_dir}")
+
+    print(f"📁 Benchmarking on {len(image_files)} images (x{repeat} passes)\n")
+
+    results = {}
+    spawn = get_context('spawn')
+    for backend, batch_size, imgsz, n_threads in itertools.product(backends, batch_sizes, imgszs, threads):
+        # Export in this process so it is not counted as cold start
+        weights = resolve_backend(model_path, backend, imgsz)
+        key = config_key(backend, batch_size, imgsz, n_threads)
+
+        with ProcessPoolExecutor(1, mp_context=spawn) as pool:
+            stats = pool.submit(run_config, weights, [str(f) for f in image_files], batch_size,
+                                imgsz, n_threads, conf, repeat).result()
+        results[key] = stats
+        print(f"{key:28} cold {stats['cold_start_ms']:7.0f} ms | p50/p95/p99 {stats['p50_ms']:6.1f} / "
+              f"{stats['p95_ms']:6.1f} / {stats['p99_ms']:6.1f} ms | {stats['throughput']:6.1f} img/s | "
+              f"RSS {stats['peak_rss_mb']:6.0f} MB")
+
+    return {
+        'model': str(model_path),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'host': {
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+
+
+def compare_to_baseline(report, baseline, threshold=0.10):
+    """
+    Find metrics that got worse than the baseline by more than threshold
+
+    Only configurations present in both reports are compared.
+
+    Returns:
+        List of (config, metric, baseline value, current value) regressions
+    """
+    regressions = []
+    for key, stats in report['results'].items():
+        base = baseline['results'].get(key)
+        if base is None:
+            continue
+        for metric, worse in REGRESSION_METRICS.items():
+            if metric not in base or not base[metric]:
+                continue
+            change = (stats[metric] - base[metric]) / base[metric]
+            if (worse == 'higher' and change > threshold) or (worse == 'lower' and change < -threshold):
+                regressions.append((key, metric, base[metric], stats[metric]))
+    return regressions
+
+
+def main():
+    try:
+        from .export import BACKENDS
+    except ImportError:
+        from export import BACKENDS
+
+    parser = argparse.ArgumentParser(description="Benchmark Baby Shrimp inference")
+    parser.add_argument("--model", required=True, help="Path to trained best.pt")
+    parser.add_argument("--backends", nargs="+", default=["torch"], choices=BACKENDS, help="Backends to sweep")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8], help="Batch sizes to sweep")
+    parser.add_argument("--imgsz", nargs="+", type=int, default=[640], help="Image sizes to sweep")
+    parser.add_argument("--threads", nargs="+", type=int, default=[1, os.cpu_count()], help="Thread counts to sweep")
+    parser.add_argument("--dataset", default=DATASET_DIR, help="Dataset directory (test and valid images are used)")
+    parser.add_argument("--conf", type=float, default=0.25, help="Confidence threshold")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the images per configuration")
+    parser.add_argument("--output", default=f"{BENCHMARK_DIR}/latest.json", help="Where to write the results")
+    parser.add_argument("--baseline", default=f"{BENCHMARK_DIR}/baseline.json", help="Baseline results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Allowed relative slowdown before failing (0.10 = 10%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+
+    args = parser.parse_args()
+
+    report = run_benchmark(args.model, args.backends, args.batch_sizes, args.imgsz,
+                           sorted(set(args.threads)), args.dataset, args.conf, args.repeat)
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to: {output}")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(baseline_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"📌 Baseline updated: {baseline_path}")
+        return
+
+    if not baseline_path.exists():
+        print(f"⚠️  No baseline at {baseline_path}, run with --save-baseline to create one")
+        return
+
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+    regressions = compare_to_baseline(report, baseline, args.threshold)
+
+    print("\n" + "="*50)
+    print(f"📊 REGRESSION CHECK (threshold {args.threshold:.0%})")
+    print("="*50)
+    if baseline['host'] != report['host']:
+        print("⚠️  Baseline was recorded on a different host")
+    for key, metric, before, after in regressions:
+        print(f"❌ {key} {metric}: {before:.1f} → {after:.1f} ({(after - before) / before:+.0%})")
+    if not regressions:
+        print("✅ No regressions")
+    print("="*50 + "\n")
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Crash-safe checkpoints for Baby Shrimp training
+Atomic checkpoint writes, time-based mid-epoch checkpoints and detection of
+interrupted runs that can be resumed from last.pt
+"""
+import os
+import re
+import tempfile
+import time
+import uuid
+from copy import deepcopy
+from datetime import datetime
+from pathlib import Path
+import torch
+from torch.utils.data import RandomSampler, Sampler
+from ultralytics import __version__
+from ultralytics.models.yolo.detect import DetectionTrainer
+from ultralytics.utils import RANK
+from ultralytics.utils.torch_utils import de_parallel
+
+try:
+    from .throughput import FILENAME as THROUGHPUT_CSV
+except ImportError:
+    from throughput import FILENAME as THROUGHPUT_CSV
+
+CHECKPOINT_MINUTES = 10  # At most this much training is lost when the process dies
+
+
+def _temp_path(path):
+    """Unique temporary name next to path, so a file left by a crash is never reused"""
+    return path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+
+
+def _commit(tmp, path):
+    """Flush tmp to disk and rename it over path"""
+    with open(tmp, 'rb+') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def atomic_save(obj, path):
+    """torch.save to a temporary file, flush it to disk, then rename over path"""
+    path = Path(path)
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f"{path.name}.", suffix='.tmp', delete=False) as f:
+        tmp = Path(f.name)
+    try:
+        torch.save(obj, tmp)
+        _commit(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def _is_resumable(last, name):
+    """
+    True if last.pt belongs to an interrupted run started as name
+
+    A run that finished has its optimizer stripped from last.pt (and epoch
+    set to -1); anything else with an optimizer state was interrupted.
+    """
+    try:
+        ckpt = torch.load(last, map_location='cpu', weights_only=False)
+    except Exception as e:
+        print(f"⚠️  Cannot read {last} ({e}), not resuming")
+        return False
+    return (ckpt.get('optimizer') is not None and ckpt.get('epoch', -1) >= 0
+            and (ckpt.get('train_args') or {}).get('name') == name)
+
+
+def find_resumable(project, name):
+    """
+    last.pt of the newest interrupted run called name, or None
+
+    Ultralytics increments the name of a new run whose directory exists
+    (name, name2, name3, ...), so all of those directories are candidates.
+    A directory like name12 may also be a run started as name1... with
+    another increment, so a candidate must also have been started as name
+    (train_args name, which ResumableMixin keeps as the requested name).
+
+    Args:
+        project: Directory the runs are saved in (e.g. runs/detect)
+        name: Run name
+
+    Returns:
+        Path of last.pt as a string, or None
+    """
+    run_dir = Path(project) / name
+    if not run_dir.parent.is_dir():
+        return None
+    pattern = re.compile(re.escape(run_dir.name) + r'(?:[2-9]|[1-9]\d+)?')
+    candidates = [path / 'weights' / 'last.pt' for path in run_dir.parent.iterdir()
+                  if pattern.fullmatch(path.name) and (path / 'weights' / 'last.pt').is_file()]
+    for last in sorted(candidates, key=lambda path: path.stat().st_mtime_ns, reverse=True):
+        if _is_resumable(last, str(name)):
+            return str(last)
+    return None
+
+
+class EpochSampler(Sampler):
+    """
+    Train sampler whose order depends only on the seed and the epoch
+
+    Ultralytics shuffles with one generator for the whole run, so the order
+    of epoch N depends on every epoch before it and cannot be reproduced
+    after a restart. Here each epoch has its own permutation, and the first
+    skip indices can be left out to continue an epoch where it stopped.
+    """
+
+    def __init__(self, n, seed=0, shuffle=True):
+        self.n = n
+        self.seed = seed
+        self.shuffle = shuffle
+        self.set_epoch(0)
+
+    def set_epoch(self, epoch, skip=0):
+        """Order of the next pass: epoch's permutation without its first skip indices"""
+        self.epoch = epoch
+        self.skip = skip
+
+    def __len__(self):
+        return self.n
+
+    def __iter__(self):
+        if self.shuffle:
+            generator = torch.Generator()
+            generator.manual_seed(self.seed * 1_000_003 + self.epoch)
+            order = torch.randperm(self.n, generator=generator).tolist()
+        else:
+            order = list(range(self.n))
+        order = order[self.skip:]
+        # The loader repeats the sampler, so the next pass is the next epoch
+        self.set_epoch(self.epoch + 1)
+        return iter(order)
+
+
+class _ResumedLoader:
+    """
+    Train loader whose first pass only yields the batches of the interrupted epoch not trained yet
+
+    The trainer numbers the batches of that pass from 0 again, which only
+    matters for the warmup ramp if the restart falls inside warmup.
+    """
+
+    def __init__(self, loader, skip):
+        self.loader = loader
+        self.skip = skip
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+    def __len__(self):
+        return len(self.loader)
+
+    def __iter__(self):
+        remaining, self.skip = len(self.loader) - self.skip, 0
+        for _ in range(remaining):
+            yield next(self.loader.iterator)
+
+
+class ResumableMixin:
+    """
+    Trainer mixin for long runs that may be killed
+
+    - save_model writes last.pt and best.pt atomically, so a crash while
+      saving never leaves a truncated checkpoint behind
+    - after checkpoint_minutes without a checkpoint, last.pt is also written
+      in the middle of an epoch, right after the next optimizer step. It
+      records how many images of the epoch were trained; on resume the
+      epoch continues with the next batch of the same order (EpochSampler),
+      so at most checkpoint_minutes plus one optimizer step of training are
+      lost
+    - on resume, results.csv and throughput.csv rows of the interrupted
+      epoch and later ones are dropped
+    """
+    checkpoint_minutes = CHECKPOINT_MINUTES
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Ultralytics renames the run after its directory (name2, ...); keep
+        # the name it was started with, find_resumable matches on it
+        self.args.name = self.run_name or self.args.name
+        self.last_checkpoint = time.monotonic()
+        self.resume_epoch, self.resume_images, self.resume_skip = None, 0, 0
+        self.batches_done = 0
+        self.stepped = False
+        self.add_callback("on_train_epoch_start", self._count_batches)
+        self.add_callback("on_train_batch_end", self._checkpoint_if_due)
+
+    def check_resume(self, overrides):
+        super().check_resume(overrides)
+        self.run_name = self.args.name  # Requested name, or the checkpoint's when resuming
+
+    def _setup_train(self, world_size):
+        super()._setup_train(world_size)
+        if RANK != -1:
+            return  # DDP keeps its DistributedSampler
+        batch_sampler = self.train_loader.batch_sampler.sampler
+        batch_sampler.sampler = EpochSampler(len(self.train_loader.dataset), self.args.seed,
+                                             shuffle=isinstance(batch_sampler.sampler, RandomSampler))
+        skip = 0
+        if self.resume_epoch is not None:
+            # Never skip the whole epoch, it needs at least one batch for its losses
+            skip = min(self.resume_images // self.train_loader.batch_size, len(self.train_loader) - 1)
+            if skip:
+                self.train_loader = _ResumedLoader(self.train_loader, skip)
+                print(f"♻️  Epoch {self.resume_epoch + 1} continues at batch {skip + 1}/{len(self.train_loader)}")
+        self.resume_epoch, self.resume_skip = self.start_epoch, skip
+        self._set_sampler_epoch(self.start_epoch)
+        self.train_loader.reset()  # Drop batches prefetched with the old sampler
+
+    def _set_sampler_epoch(self, epoch):
+        skip = self.resume_skip if epoch == self.resume_epoch else 0
+        self.train_loader.batch_sampler.sampler.sampler.set_epoch(epoch, skip * self.train_loader.batch_size)
+
+    def _close_dataloader_mosaic(self):
+        super()._close_dataloader_mosaic()
+        # Also called by resume_training, before _setup_train installs the EpochSampler
+        if isinstance(self.train_loader.batch_sampler.sampler.sampler, EpochSampler):
+            # The loader is reset next; batches prefetched for later epochs are discarded
+            self._set_sampler_epoch(self.epoch)
+
+    @property
+    def skipped_batches(self):
+        """Batches of the current epoch trained before the restart (0 for other epochs)"""
+        return self.resume_skip if self.epoch == self.resume_epoch else 0
+
+    def _count_batches(self, trainer):
+        self.batches_done = self.skipped_batches
+
+    def optimizer_step(self):
+        super().optimizer_step()
+        self.stepped = True
+
+    def save_model(self):
+        last, best = self.last, self.best
+        temps = {last: _temp_path(last), best: _temp_path(best)}
+        self.last, self.best = temps[last], temps[best]
+        try:
+            super().save_model()
+            for path, tmp in temps.items():
+                if tmp.exists():  # best.pt is only written when fitness improved
+                    _commit(tmp, path)
+        finally:
+            self.last, self.best = last, best
+            for tmp in temps.values():
+                tmp.unlink(missing_ok=True)
+        self.last_checkpoint = time.monotonic()
+
+    def _checkpoint_if_due(self, trainer):
+        self.batches_done += 1
+        # Gradients accumulated since the last optimizer step are not saved,
+        # so only checkpoint right after a step
+        stepped, self.stepped = self.stepped, False
+        if RANK not in (-1, 0) or not self.args.save or not stepped:
+            return
+        if time.monotonic() - self.last_checkpoint < self.checkpoint_minutes * 60:
+            return
+        atomic_save({
+            'epoch': self.epoch,
+            'partial': True,
+            'images': self.batches_done * self.train_loader.batch_size,
+            'best_fitness': self.best_fitness,
+            'model': deepcopy(de_parallel(self.model)).half(),
+            'ema': deepcopy(self.ema.ema).half(),
+            'updates': self.ema.updates,
+            'optimizer': self.optimizer.state_dict(),
+            'train_args': vars(self.args),
+            'train_metrics': {**self.metrics, 'fitness': self.fitness} if self.metrics else {},
+            'date': datetime.now().isoformat(),
+            'version': __version__,
+        }, self.last)
+        self.last_checkpoint = time.monotonic()
+
+    def resume_training(self, ckpt):
+        super().resume_training(ckpt)
+        if ckpt is None or not self.resume:
+            return
+        if ckpt.get('partial'):
+            self.start_epoch = ckpt['epoch']  # The interrupted epoch continues
+            self.resume_epoch, self.resume_images = ckpt['epoch'], ckpt.get('images', 0)
+        for path in (self.csv, self.csv.with_name(THROUGHPUT_CSV)):
+            self._trim_csv(path, self.start_epoch)
+
+    @staticmethod
+    def _trim_csv(path, epochs):
+        """Keep only the rows of the first `epochs` epochs of a per-epoch CSV"""
+        if RANK not in (-1, 0) or not path.exists():
+            return
+        lines = path.read_text().splitlines(keepends=True)
+        kept = lines[:1] + [line for line in lines[1:]
+                            if line.strip() and float(line.split(',')[0]) <= epochs]
+        if len(kept) != len(lines):
+            tmp = path.with_name(path.name + '.tmp')
+            tmp.write_text(''.join(kept))
+            os.replace(tmp, path)
+            print(f"✂️  Dropped {len(lines) - len(kept)} {path.name} rows of epochs that run again")
+
+
+def resumable(trainer=None, checkpoint_minutes=CHECKPOINT_MINUTES):
+    """
+    Subclass of trainer (DetectionTrainer if None) with ResumableMixin
+
+    Args:
+        trainer: Trainer class passed to model.train (e.g. ShardTrainer)
+        checkpoint_minutes: Maximum minutes between checkpoints
+
+    Returns:
+        Trainer class
+    """
+    base = trainer or DetectionTrainer
+    return type(f"Resumable{base.__name__}", (ResumableMixin, base), {'checkpoint_minutes': checkpoint_minutes})
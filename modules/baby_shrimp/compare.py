@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Multi-run comparison for Baby Shrimp training
+Discovers every run under the run roots, summarizes them into a sortable
+table and overlays the chosen metrics of the best runs
+"""
+import argparse
+import json
+import math
+import os
+from pathlib import Path
+import yaml
+
+try:
+    from .monitor import CsvTail
+except ImportError:
+    from monitor import CsvTail
+
+RUN_ROOTS = ("modules/baby_shrimp/runs/detect", "modules/baby_shrimp/results")
+SUMMARY_CACHE = "modules/baby_shrimp/cache/run_summaries.json"
+MAP50 = 'metrics/mAP50(B)'
+MAP50_95 = 'metrics/mAP50-95(B)'
+# Table columns: (summary key, header, format)
+COLUMNS = (
+    ('name', 'Run', '{}'),
+    ('model', 'Model', '{}'),
+    ('imgsz', 'imgsz', '{}'),
+    ('epochs', 'Epochs', '{}'),
+    ('best_map50', 'Best mAP50', '{:.4f}'),
+    ('best_epoch', 'Best epoch', '{}'),
+    ('best_map50_95', 'mAP50-95', '{:.4f}'),
+    ('wall_time', 'Wall time', '{}'),
+)
+SORT_KEYS = tuple(key for key, _, _ in COLUMNS)
+
+_Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def discover_runs(roots=RUN_ROOTS, max_depth=3):
+    """
+    Every run directory (one holding args.yaml or results.csv) under roots
+
+    Only directory entries are listed, no file is opened, so this stays fast
+    with hundreds of runs. Run directories are not descended into.
+    """
+    runs = []
+
+    def walk(path, depth):
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            return
+        names = {e.name for e in entries}
+        if 'args.yaml' in names or 'results.csv' in names:
+            runs.append(Path(path))
+            return
+        if depth < max_depth:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    walk(entry.path, depth + 1)
+
+    for root in roots:
+        walk(root, 0)
+    return sorted(runs)
+
+
+def _stat_key(path):
+    """(mtime_ns, size) of a file, None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def format_duration(seconds):
+    if seconds is None or not math.isfinite(seconds):
+        return '-'
+    seconds = int(seconds)
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m" if seconds >= 3600 else f"{seconds // 60}m{seconds % 60:02d}s"
+
+
+class RunCache:
+    """
+    Parse cache for the results.csv and args.yaml of many runs
+
+    Summaries are persisted to a JSON file keyed by run directory, together
+    with the (mtime, size) of both files they were parsed from, so reopening
+    the comparison only stats files and re-parses the runs that changed.
+    Full curves are parsed lazily, only for the runs that are plotted, and
+    kept in memory under the same key.
+    """
+
+    def __init__(self, path=SUMMARY_CACHE):
+        self.path = Path(path)
+        self.entries = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+        self.curves_cache = {}
+        self.dirty = False
+
+    def curves(self, run):
+        """
+        Returns:
+            Dict of column → list of floats of the run's results.csv ({} if none)
+        """
+        csv_path = Path(run) / 'results.csv'
+        key = _stat_key(csv_path)
+        cached = self.curves_cache.get(str(run))
+        if cached and cached[0] == key:
+            return cached[1]
+
+        columns = {}
+        if key is not None:
+            rows, _ = CsvTail(csv_path).read()
+            for row in rows:
+                for column, value in row.items():
+                    columns.setdefault(column, []).append(value)
+        self.curves_cache[str(run)] = (key, columns)
+        return columns
+
+    def summary(self, run):
+        """
+        Best mAP50, its epoch, wall time and the main training arguments of a run
+
+        Returns:
+            Dict with the keys of COLUMNS plus path and planned_epochs
+        """
+        run = Path(run)
+        keys = {'csv': _stat_key(run / 'results.csv'), 'args': _stat_key(run / 'args.yaml')}
+        entry = self.entries.get(str(run))
+        if entry and entry['keys'] == keys:
+            return entry['summary']
+
+        args = {}
+        if keys['args'] is not None:
+            with open(run / 'args.yaml', 'r') as f:
+                args = yaml.load(f, Loader=_Loader) or {}
+
+        curves = self.curves(run)
+        epochs = curves.get('epoch', [])
+        map50 = curves.get(MAP50, [])
+        finite = [i for i, v in enumerate(map50) if math.isfinite(v)]
+        best = max(finite, key=lambda i: map50[i]) if finite else None
+
+        # Newer Ultralytics versions log the elapsed seconds per epoch;
+        # otherwise time from args.yaml (written at start) to the last write
+        times = [t for t in curves.get('time', []) if math.isfinite(t)]
+        if times:
+            wall_time = times[-1]
+        elif keys['csv'] and keys['args']:
+            wall_time = max((keys['csv'][0] - keys['args'][0]) / 1e9, 0)
+        else:
+            wall_time = None
+
+        summary = {
+            'path': str(run),
+            'name': run.name,
+            'model': Path(str(args.get('model', '-'))).name,
+            'imgsz': args.get('imgsz', '-'),
+            'planned_epochs': args.get('epochs'),
+            'epochs': len(epochs),
+            'best_map50': map50[best] if best is not None else None,
+            'best_epoch': int(epochs[best]) if best is not None else None,
+            'best_map50_95': curves.get(MAP50_95, [None] * len(epochs))[best] if best is not None else None,
+            'wall_time': wall_time,
+        }
+        self.entries[str(run)] = {'keys': keys, 'summary': summary}
+        self.dirty = True
+        return summary
+
+    def save(self):
+        """Write the summaries back if any changed (atomically)"""
+        if not self.dirty:
+            return
+        # Drop runs that no longer exist
+        self.entries = {run: entry for run, entry in self.entries.items() if Path(run).is_dir()}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+
+def _sort_value(summary, key):
+    value = summary.get(key)
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def sort_summaries(summaries, key='best_map50', reverse=None):
+    """
+    Sort run summaries by a table column; runs without a value go last
+
+    Numeric columns sort descending by default, text columns ascending.
+    """
+    numeric = any(_sort_value(s, key) is not None for s in summaries)
+    if reverse is None:
+        reverse = numeric
+    if numeric:
+        present = [s for s in summaries if _sort_value(s, key) is not None]
+        missing = [s for s in summaries if _sort_value(s, key) is None]
+        return sorted(present, key=lambda s: _sort_value(s, key), reverse=reverse) + missing
+    return sorted(summaries, key=lambda s: str(s.get(key, '')), reverse=reverse)
+
+
+def table_rows(summaries):
+    """Formatted table cells of run summaries"""
+    rows = []
+    for summary in summaries:
+        row = []
+        for key, _, fmt in COLUMNS:
+            value = summary.get(key)
+            if key == 'wall_time':
+                row.append(format_duration(value))
+            elif key == 'epochs' and summary.get('planned_epochs'):
+                row.append(f"{value}/{summary['planned_epochs']}")
+            elif value is None:
+                row.append('-')
+            else:
+                row.append(fmt.format(value))
+        rows.append(row)
+    return rows
+
+
+def print_table(summaries):
+    """Print run summaries as an aligned table"""
+    headers = [header for _, header, _ in COLUMNS]
+    rows = table_rows(summaries)
+    widths = [max(len(str(cell)) for cell in column) for column in zip(headers, *rows)]
+    print("\n" + "="*50)
+    print("📊 RUN COMPARISON")
+    print("="*50)
+    print("  ".join(h.ljust(w) for h, w in zip(headers, widths)))
+    print("  ".join('-' * w for w in widths))
+    for row in rows:
+        print("  ".join(cell.ljust(w) for cell, w in zip(row, widths)))
+    print("="*50 + "\n")
+
+
+def plot_comparison(cache, summaries, metrics=(MAP50,), sort='best_map50', output=None):
+    """
+    Overlay metrics of the given runs above a table of all summaries
+
+    Clicking a table header sorts the table by that column (again to reverse).
+    """
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(14, 5 + 0.25 * len(summaries)))
+    fig.suptitle('🐟 Baby Shrimp Run Comparison', fontsize=16, fontweight='bold')
+    grid = fig.add_gridspec(2, len(metrics), height_ratios=[3, max(1, 0.12 * len(summaries))])
+
+    for i, metric in enumerate(metrics):
+        ax = fig.add_subplot(grid[0, i])
+        for summary in summaries:
+            curves = cache.curves(summary['path'])
+            if metric in curves:
+                ax.plot(curves['epoch'], curves[metric], label=summary['name'], linewidth=1.5)
+        ax.set_title(metric)
+        ax.set_xlabel('Epoch')
+        ax.grid(True, alpha=0.3)
+        if ax.get_lines():
+            ax.legend(loc='best', fontsize=8)
+
+    table_ax = fig.add_subplot(grid[1, :])
+    table_ax.axis('off')
+    headers = [header for _, header, _ in COLUMNS]
+    table = table_ax.table(cellText=table_rows(summaries) or [['-'] * len(COLUMNS)],
+                           colLabels=headers, loc='upper center', cellLoc='left')
+    table.auto_set_font_size(False)
+    table.set_fontsize(8)
+    table.auto_set_column_width(list(range(len(COLUMNS))))
+
+    state = {'key': sort, 'reverse': None, 'summaries': summaries}
+    for col in range(len(COLUMNS)):
+        table[0, col].set_picker(True)
+
+    def on_pick(event):
+        cols = [col for col in range(len(COLUMNS)) if event.artist is table[0, col]]
+        if not cols:
+            return
+        key = COLUMNS[cols[0]][0]
+        if key == state['key'] and state['reverse'] is not None:
+            state['reverse'] = not state['reverse']
+        else:
+            state['key'] = key
+            state['reverse'] = any(_sort_value(s, key) is not None for s in state['summaries'])
+        state['summaries'] = sort_summaries(state['summaries'], key, state['reverse'])
+        for row, cells in enumerate(table_rows(state['summaries']), start=1):
+            for col, text in enumerate(cells):
+                table[row, col].get_text().set_text(text)
+        fig.canvas.draw_idle()
+
+    fig.canvas.mpl_connect('pick_event', on_pick)
+    plt.tight_layout()
+
+    if output:
+        plt.savefig(output, dpi=150)
+        print(f"💾 Comparison saved to: {output}")
+    else:
+        plt.show()
+    plt.close(fig)
+
+
+def compare_runs(roots=RUN_ROOTS, metrics=(MAP50,), sort='best_map50', top=10, match=None,
+                 plot=True, output=None, cache_path=SUMMARY_CACHE):
+    """
+    Summarize every run under roots and compare the best ones
+
+    Args:
+        roots: Directories to search for run directories
+        metrics: results.csv columns to overlay
+        sort: Table column to sort by (one of SORT_KEYS)
+        top: Number of runs to overlay (after sorting)
+        match: Only include runs whose name contains this text
+        plot: Show (or save) the overlay and table figure
+        output: Save the figure here instead of showing it
+        cache_path: JSON file for the parsed run summaries
+
+    Returns:
+        Sorted list of run summaries
+    """
+    cache = RunCache(cache_path)
+    runs = discover_runs(roots)
+    if match:
+        runs = [run for run in runs if match in run.name]
+    summaries = sort_summaries([cache.summary(run) for run in runs], sort)
+    cache.save()
+
+    print(f"🔍 Found {len(runs)} runs under: {', '.join(map(str, roots))}")
+    print_table(summaries)
+
+    if plot and summaries:
+        plot_comparison(cache, summaries[:top], metrics, sort, output)
+    return summaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Baby Shrimp training runs")
+    parser.add_argument("--roots", nargs="+", default=list(RUN_ROOTS), help="Directories holding run directories")
+    parser.add_argument("--metrics", nargs="+", default=[MAP50], help="results.csv columns to overlay")
+    parser.add_argument("--sort", default="best_map50", choices=SORT_KEYS, help="Table column to sort by")
+    parser.add_argument("--top", type=int, default=10, help="Number of runs to overlay and tabulate in the figure")
+    parser.add_argument("--match", default=None, help="Only runs whose name contains this text")
+    parser.add_argument("--no-plot", action="store_true", help="Only print the table")
+    parser.add_argument("--output", default=None, help="Save the figure to this path instead of showing it")
+
+    args = parser.parse_args()
+
+    compare_runs(args.roots, args.metrics, args.sort, args.top, args.match, not args.no_plot, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Model cache for Baby Shrimp inference
+Keeps loaded YOLO models in memory so each weights file is only loaded once
+"""
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from ultralytics import YOLO
+
+
+class ModelCache:
+    """
+    LRU cache of loaded YOLO models
+
+    Models are keyed by (resolved weights path, file mtime, device), so
+    overwriting best.pt during training transparently triggers a reload.
+    """
+
+    def __init__(self, max_models=4):
+        self.max_models = max_models
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model_path, device=None):
+        """Build the cache key for a weights file and device"""
+        path = Path(model_path)
+        if path.exists():
+            # Local weights: key on the real file and its modification time
+            return (str(path.resolve()), path.stat().st_mtime_ns, device)
+        # Hub names like 'yolo11n.pt' are resolved by Ultralytics itself
+        return (str(model_path), None, device)
+
+    def get(self, model_path, device=None):
+        """Return the model for model_path, loading it on first use"""
+        key = self.make_key(model_path, device)
+
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                return model
+
+            # Drop stale entries for the same weights (file was rewritten)
+            for stale in [k for k in self._models if k[0] == key[0] and k[2] == device]:
+                del self._models[stale]
+
+            print(f"📦 Loading model: {model_path}")
+            model = YOLO(model_path)
+
+            self._models[key] = model
+            while len(self._models) > self.max_models:
+                self._models.popitem(last=False)
+
+            return model
+
+    def clear(self):
+        """Release all cached models"""
+        with self._lock:
+            self._models.clear()
+
+    def __len__(self):
+        return len(self._models)
+
+
+_default_cache = ModelCache()
+
+
+def get_model(model_path, device=None):
+    """Get a model from the shared process-wide cache"""
+    return _default_cache.get(model_path, device)
+
+
+def clear_model_cache():
+    """Clear the shared process-wide cache"""
+    _default_cache.clear()
@@ -5,165 +5,399 @@ Displays live charts of training metrics
 """
 
 import argparse
-import time
-import pandas as pd
+import math
+import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
 from pathlib import Path
-import sys
+
+# (axes, column, label, marker, color) of every plotted series
+SERIES = (
+    ('loss', 'train/box_loss', 'Box Loss', 'o', None),
+    ('loss', 'train/cls_loss', 'Class Loss', 's', None),
+    ('loss', 'train/dfl_loss', 'DFL Loss', '^', None),
+    ('metrics', 'metrics/precision(B)', 'Precision', 'o', None),
+    ('metrics', 'metrics/recall(B)', 'Recall', 's', None),
+    ('metrics', 'metrics/mAP50(B)', 'mAP50', '^', None),
+    ('metrics', 'metrics/mAP50-95(B)', 'mAP50-95', 'd', None),
+    ('lr', 'lr/pg0', 'LR', 'o', 'green'),
+)
+
+
+def summary_text(latest):
+    """Text summary of the latest results.csv row"""
+    text = f"📊 Training Summary\n"
+    text += f"{'='*40}\n\n"
+    text += f"Epoch: {int(latest['epoch'])}\n\n"
+
+    if 'metrics/mAP50(B)' in latest:
+        text += f"mAP50: {latest['metrics/mAP50(B)']:.4f}\n"
+    if 'metrics/mAP50-95(B)' in latest:
+        text += f"mAP50-95: {latest['metrics/mAP50-95(B)']:.4f}\n"
+    if 'metrics/precision(B)' in latest:
+        text += f"Precision: {latest['metrics/precision(B)']:.4f}\n"
+    if 'metrics/recall(B)' in latest:
+        text += f"Recall: {latest['metrics/recall(B)']:.4f}\n\n"
+
+    if 'train/box_loss' in latest:
+        text += f"Box Loss: {latest['train/box_loss']:.4f}\n"
+    if 'train/cls_loss' in latest:
+        text += f"Class Loss: {latest['train/cls_loss']:.4f}\n"
+    if 'train/dfl_loss' in latest:
+        text += f"DFL Loss: {latest['train/dfl_loss']:.4f}\n"
+    return text
+
+
+class CsvTail:
+    """
+    Incrementally read rows appended to a CSV file
+
+    Remembers the byte offset of the last complete line, so every read only
+    parses what was appended since. A trailing line without a newline (still
+    being written) is left for the next read. If the file is replaced or
+    truncated, e.g. by a new run with the same name, reading starts over.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.offset = 0
+        self.columns = None
+        self.inode = None
+
+    def read(self):
+        """
+        Returns:
+            (list of {column: float} for the new rows, True if the file was reset)
+        """
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return [], False
+
+        reset = False
+        if self.inode is not None and (stat.st_ino != self.inode or stat.st_size < self.offset):
+            self.offset, self.columns, reset = 0, None, True
+        self.inode = stat.st_ino
+        if stat.st_size == self.offset:
+            return [], reset
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            chunk = f.read(stat.st_size - self.offset)
+        end = chunk.rfind(b'\n')
+        if end < 0:
+            return [], reset
+        self.offset += end + 1
+
+        rows = []
+        for line in chunk[:end].decode('utf-8', errors='replace').splitlines():
+            values = [v.strip() for v in line.split(',')]
+            if not any(values):
+                continue
+            if self.columns is None:
+                self.columns = values
+                continue
+            row = {}
+            for column, value in zip(self.columns, values):
+                try:
+                    row[column] = float(value)
+                except ValueError:
+                    row[column] = math.nan
+            rows.append(row)
+        return rows, reset
 
 
 class TrainingMonitor:
     def __init__(self, results_path):
         self.results_path = Path(results_path)
         self.csv_path = self.results_path / "results.csv"
-        
+        self.tail = CsvTail(self.csv_path)
+        self.data = {}
+
         # Setup plot
         self.fig, self.axes = plt.subplots(2, 2, figsize=(14, 10))
         self.fig.suptitle('🐟 Baby Shrimp Training Monitor', fontsize=16, fontweight='bold')
-        
+
         # Configure axes
         self.ax_loss = self.axes[0, 0]
         self.ax_metrics = self.axes[0, 1]
         self.ax_lr = self.axes[1, 0]
         self.ax_summary = self.axes[1, 1]
-        
+
         self.ax_loss.set_title('Training Loss')
         self.ax_loss.set_xlabel('Epoch')
         self.ax_loss.set_ylabel('Loss')
         self.ax_loss.grid(True, alpha=0.3)
-        
+
         self.ax_metrics.set_title('Validation Metrics')
         self.ax_metrics.set_xlabel('Epoch')
         self.ax_metrics.set_ylabel('Score')
         self.ax_metrics.grid(True, alpha=0.3)
-        
+
         self.ax_lr.set_title('Learning Rate')
         self.ax_lr.set_xlabel('Epoch')
         self.ax_lr.set_ylabel('LR')
         self.ax_lr.grid(True, alpha=0.3)
-        
+
         self.ax_summary.axis('off')
-        
+
+        # Artists are created once and only their data changes afterwards.
+        # They are animated, i.e. left out of full redraws and blitted on top
+        # of a cached background instead.
+        axes = {'loss': self.ax_loss, 'metrics': self.ax_metrics, 'lr': self.ax_lr}
+        self.lines = {}
+        for key, column, label, marker, color in SERIES:
+            line, = axes[key].plot([], [], label=label, marker=marker, markersize=3, color=color, animated=True)
+            self.lines[column] = line
+        for ax in axes.values():
+            ax.legend(loc='upper right')
+        self.summary = self.ax_summary.text(0.1, 0.5, '', ha='left', va='center', fontsize=11,
+                                            family='monospace', animated=True)
+
+        self.background = None
+        self.fig.canvas.mpl_connect('draw_event', self._on_draw)
+
         plt.tight_layout()
-        
-    def update(self, frame):
-        """Update plots with latest data"""
+
+    def _artists(self):
+        return list(self.lines.values()) + [self.summary]
+
+    def _on_draw(self, event):
+        """After a full redraw: cache the background, then draw the animated artists on it"""
+        canvas = self.fig.canvas
+        if getattr(canvas, 'supports_blit', False):
+            self.background = canvas.copy_from_bbox(self.fig.bbox)
+        for artist in self._artists():
+            self.fig.draw_artist(artist)
+
+    def _blit(self):
+        """Redraw only the animated artists on top of the cached background"""
+        canvas = self.fig.canvas
+        if self.background is None:
+            canvas.draw_idle()
+            return
+        canvas.restore_region(self.background)
+        for artist in self._artists():
+            self.fig.draw_artist(artist)
+        canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+
+    @staticmethod
+    def _points(ax):
+        """All finite (x, y) points of the axes' lines"""
+        xs, ys = [], []
+        for line in ax.get_lines():
+            x, y = (np.asarray(v, dtype=float) for v in line.get_data())
+            finite = np.isfinite(x) & np.isfinite(y)
+            xs.append(x[finite])
+            ys.append(y[finite])
+        return np.concatenate(xs), np.concatenate(ys)
+
+    def _fits(self, ax):
+        """True if every point of the axes' lines is inside its current view"""
+        xs, ys = self._points(ax)
+        if not len(xs):
+            return True
+        (x0, x1), (y0, y1) = ax.get_xlim(), ax.get_ylim()
+        return xs.min() >= x0 and xs.max() <= x1 and ys.min() >= y0 and ys.max() <= y1
+
+    def _rescale(self, ax):
+        """Fit the view to the data, with headroom so the next epochs still fit"""
+        xs, ys = self._points(ax)
+        if not len(xs):
+            return
+        x_max = xs.max()
+        ax.set_xlim(xs.min() - 0.5, x_max + max(5, 0.25 * x_max))
+        y_min, y_max = ys.min(), ys.max()
+        pad = (y_max - y_min) * 0.15 or abs(y_max) * 0.1 or 1
+        ax.set_ylim(y_min - pad, y_max + pad)
+
+    def update(self, frame=None):
+        """Update plots with rows appended since the last update"""
         if not self.csv_path.exists():
-            self.ax_summary.clear()
-            self.ax_summary.axis('off')
-            self.ax_summary.text(0.5, 0.5, 
-                               f'⏳ Waiting for training to start...\n\n'
-                               f'Looking for:\n{self.csv_path}',
-                               ha='center', va='center', fontsize=12)
+            self.summary.set_text(f'⏳ Waiting for training to start...\n\n'
+                                  f'Looking for:\n{self.csv_path}')
+            self.summary.set(x=0.5, ha='center')
+            self._blit()
             return
-        
+
         try:
-            # Read CSV
-            df = pd.read_csv(self.csv_path)
-            df.columns = df.columns.str.strip()  # Remove whitespace
-            
-            if len(df) == 0:
-                return
-            
-            # Clear axes
-            self.ax_loss.clear()
-            self.ax_metrics.clear()
-            self.ax_lr.clear()
-            self.ax_summary.clear()
-            
-            # Plot losses
-            self.ax_loss.set_title('Training Loss')
-            self.ax_loss.set_xlabel('Epoch')
-            self.ax_loss.set_ylabel('Loss')
-            self.ax_loss.grid(True, alpha=0.3)
-            
-            if 'train/box_loss' in df.columns:
-                self.ax_loss.plot(df['epoch'], df['train/box_loss'], label='Box Loss', marker='o', markersize=3)
-            if 'train/cls_loss' in df.columns:
-                self.ax_loss.plot(df['epoch'], df['train/cls_loss'], label='Class Loss', marker='s', markersize=3)
-            if 'train/dfl_loss' in df.columns:
-                self.ax_loss.plot(df['epoch'], df['train/dfl_loss'], label='DFL Loss', marker='^', markersize=3)
-            self.ax_loss.legend()
-            
-            # Plot metrics
-            self.ax_metrics.set_title('Validation Metrics')
-            self.ax_metrics.set_xlabel('Epoch')
-            self.ax_metrics.set_ylabel('Score')
-            self.ax_metrics.grid(True, alpha=0.3)
-            
-            if 'metrics/precision(B)' in df.columns:
-                self.ax_metrics.plot(df['epoch'], df['metrics/precision(B)'], label='Precision', marker='o', markersize=3)
-            if 'metrics/recall(B)' in df.columns:
-                self.ax_metrics.plot(df['epoch'], df['metrics/recall(B)'], label='Recall', marker='s', markersize=3)
-            if 'metrics/mAP50(B)' in df.columns:
-                self.ax_metrics.plot(df['epoch'], df['metrics/mAP50(B)'], label='mAP50', marker='^', markersize=3)
-            if 'metrics/mAP50-95(B)' in df.columns:
-                self.ax_metrics.plot(df['epoch'], df['metrics/mAP50-95(B)'], label='mAP50-95', marker='d', markersize=3)
-            self.ax_metrics.legend()
-            
-            # Plot learning rate
-            self.ax_lr.set_title('Learning Rate')
-            self.ax_lr.set_xlabel('Epoch')
-            self.ax_lr.set_ylabel('LR')
-            self.ax_lr.grid(True, alpha=0.3)
-            
-            if 'lr/pg0' in df.columns:
-                self.ax_lr.plot(df['epoch'], df['lr/pg0'], label='LR', marker='o', markersize=3, color='green')
-            self.ax_lr.legend()
-            
-            # Summary text
-            self.ax_summary.axis('off')
-            latest = df.iloc[-1]
-            
-            summary_text = f"📊 Training Summary\n"
-            summary_text += f"{'='*40}\n\n"
-            summary_text += f"Epoch: {int(latest['epoch'])}\n\n"
-            
-            if 'metrics/mAP50(B)' in df.columns:
-                summary_text += f"mAP50: {latest['metrics/mAP50(B)']:.4f}\n"
-            if 'metrics/mAP50-95(B)' in df.columns:
-                summary_text += f"mAP50-95: {latest['metrics/mAP50-95(B)']:.4f}\n"
-            if 'metrics/precision(B)' in df.columns:
-                summary_text += f"Precision: {latest['metrics/precision(B)']:.4f}\n"
-            if 'metrics/recall(B)' in df.columns:
-                summary_text += f"Recall: {latest['metrics/recall(B)']:.4f}\n\n"
-            
-            if 'train/box_loss' in df.columns:
-                summary_text += f"Box Loss: {latest['train/box_loss']:.4f}\n"
-            if 'train/cls_loss' in df.columns:
-                summary_text += f"Class Loss: {latest['train/cls_loss']:.4f}\n"
-            if 'train/dfl_loss' in df.columns:
-                summary_text += f"DFL Loss: {latest['train/dfl_loss']:.4f}\n"
-            
-            self.ax_summary.text(0.1, 0.5, summary_text, 
-                               ha='left', va='center', fontsize=11, family='monospace')
-            
-            plt.tight_layout()
-            
-        except Exception as e:
+            rows, reset = self.tail.read()
+        except OSError as e:
             print(f"Error reading CSV: {e}")
-    
-    def start(self):
+            return
+        if reset:
+            self.data = {}
+        if not rows:
+            return
+
+        for row in rows:
+            for column, value in row.items():
+                self.data.setdefault(column, []).append(value)
+        epochs = self.data.get('epoch', [])
+
+        for column, line in self.lines.items():
+            if column in self.data:
+                line.set_data(epochs, self.data[column])
+
+        self.summary.set(x=0.1, ha='left')
+        self.summary.set_text(summary_text(rows[-1]))
+
+        # A full redraw (ticks, labels) only when new points leave the view
+        rescaled = False
+        for ax in (self.ax_loss, self.ax_metrics, self.ax_lr):
+            if reset or not self._fits(ax):
+                self._rescale(ax)
+                rescaled = True
+
+        if rescaled:
+            self.fig.canvas.draw_idle()
+        else:
+            self._blit()
+
+    def start(self, interval=5):
         """Start monitoring"""
         print(f"🔍 Monitoring training at: {self.results_path}")
-        print(f"📊 Charts will update every 5 seconds")
+        print(f"📊 Charts will update every {interval:g} seconds")
         print(f"Press Ctrl+C to stop\n")
-        
-        ani = FuncAnimation(self.fig, self.update, interval=5000, cache_frame_data=False)
+
+        self.timer = self.fig.canvas.new_timer(interval=int(interval * 1000))
+        self.timer.add_callback(self.update)
+        self.timer.start()
+        self.update()
+        plt.show()
+
+
+def plot_throughput(results_path, output=None):
+    """
+    Plot where training time goes, from the run's throughput.csv (see throughput.py)
+
+    Args:
+        results_path: Training results directory
+        output: Save the figure here instead of showing it
+    """
+    csv_path = Path(results_path) / "throughput.csv"
+    if not csv_path.exists():
+        print(f"❌ No throughput data at: {csv_path}")
+        return
+    rows, _ = CsvTail(csv_path).read()
+    batches = [r for r in rows if math.isfinite(r.get('batch', math.nan))]
+    epochs = [r for r in rows if not math.isfinite(r.get('batch', math.nan))]
+
+    def column(rows, name):
+        return np.array([r.get(name, math.nan) for r in rows], dtype=float)
+
+    fig, axes = plt.subplots(2, 2, figsize=(14, 10))
+    fig.suptitle('🐟 Baby Shrimp Training Throughput', fontsize=16, fontweight='bold')
+    ax_time, ax_speed, ax_mem, ax_summary = axes.ravel()
+
+    if epochs:
+        x = column(epochs, 'epoch')
+        wait, compute = column(epochs, 'data_wait'), column(epochs, 'compute')
+        val = np.nan_to_num(column(epochs, 'val_time'))
+        other = np.clip(np.nan_to_num(column(epochs, 'epoch_time') - wait - compute - val), 0, None)
+        bottom = np.zeros(len(x))
+        for values, label in ((wait, 'Data wait'), (compute, 'Compute'), (val, 'Validation'), (other, 'Other')):
+            ax_time.bar(x - 0.5, values, width=0.8, bottom=bottom, label=label)
+            bottom += values
+    ax_time.set_title('Epoch Time')
+    ax_time.set_xlabel('Epoch')
+    ax_time.set_ylabel('Seconds')
+    ax_time.grid(True, alpha=0.3)
+    ax_time.legend(loc='upper right')
+
+    # Everything on one axis: epoch e spans [e - 1, e), batches at their fraction of it
+    if batches:
+        b_epoch, b_index = column(batches, 'epoch'), column(batches, 'batch')
+        per_epoch = {}
+        for e, i in zip(b_epoch, b_index):
+            per_epoch[e] = max(per_epoch.get(e, 0), i + 1)
+        b_x = b_epoch - 1 + b_index / np.array([per_epoch[e] for e in b_epoch])
+        ax_speed.plot(b_x, column(batches, 'images_per_sec'), '.', markersize=3, alpha=0.4, label='Batch')
+        ax_mem.plot(b_x, column(batches, 'rss_mb'), label='RSS')
+        ax_mem.plot(b_x, column(batches, 'peak_rss_mb'), label='Peak RSS')
+    if epochs:
+        ax_speed.plot(column(epochs, 'epoch') - 0.5, column(epochs, 'images_per_sec'), 'o-', label='Epoch mean')
+    ax_speed.set_title('Training Images/sec')
+    ax_speed.set_xlabel('Epoch')
+    ax_speed.set_ylabel('Images/sec')
+    ax_speed.grid(True, alpha=0.3)
+    ax_speed.legend(loc='upper right')
+
+    ax_mem.set_title('Memory (training process)')
+    ax_mem.set_xlabel('Epoch')
+    ax_mem.set_ylabel('MB')
+    ax_mem.grid(True, alpha=0.3)
+    ax_mem.legend(loc='upper right')
+
+    ax_summary.axis('off')
+    if epochs:
+        latest = epochs[-1]
+        busy = latest['data_wait'] + latest['compute']
+        wait_share = latest['data_wait'] / busy if busy else 0
+        text = f"📊 Throughput Summary\n"
+        text += f"{'='*40}\n\n"
+        text += f"Epoch: {int(latest['epoch'])}\n\n"
+        text += f"Images/sec: {latest['images_per_sec']:.1f}\n"
+        text += f"Data wait: {latest['data_wait']:.1f}s ({wait_share:.0%})\n"
+        text += f"Compute: {latest['compute']:.1f}s ({1 - wait_share:.0%})\n"
+        if math.isfinite(latest.get('val_time', math.nan)):
+            text += f"Validation: {latest['val_time']:.1f}s\n"
+        if math.isfinite(latest.get('epoch_time', math.nan)):
+            text += f"Epoch: {latest['epoch_time']:.1f}s\n"
+        text += f"Peak RSS: {latest['peak_rss_mb']:.0f} MB\n\n"
+        text += "Bottleneck: " + ("data loading" if wait_share > 0.3 else "compute")
+        ax_summary.text(0.1, 0.5, text, ha='left', va='center', fontsize=11, family='monospace')
+
+    plt.tight_layout()
+    if output:
+        plt.savefig(output, dpi=100)
+        print(f"💾 Throughput plot saved to: {output}")
+    else:
         plt.show()
+    plt.close(fig)
 
 
 def main():
     parser = argparse.ArgumentParser(description="Monitor YOLO training progress")
-    parser.add_argument("--path", required=True, help="Path to training results directory")
-    
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--path", help="Path to training results directory")
+    source.add_argument("--compare", nargs="*", metavar="ROOT",
+                        help="Compare all runs under these directories (default: the module's run directories)")
+    parser.add_argument("--interval", type=float, default=5, help="Seconds between updates")
+    parser.add_argument("--headless", action="store_true",
+                        help="No window: terminal summary, updated on file changes (for servers)")
+    parser.add_argument("--throughput", action="store_true",
+                        help="Plot per-batch throughput (throughput.csv) of the run instead")
+    parser.add_argument("--snapshot", default=None,
+                        help="With --headless: write charts to this .png or .html file; with --throughput: save the plot")
+    parser.add_argument("--snapshot-every", type=float, default=60,
+                        help="With --headless: minimum seconds between snapshots")
+
     args = parser.parse_args()
-    
+
+    if args.compare is not None:
+        try:
+            from .compare import RUN_ROOTS, compare_runs
+        except ImportError:
+            from compare import RUN_ROOTS, compare_runs
+        compare_runs(args.compare or RUN_ROOTS)
+        return
+
+    if args.throughput:
+        plot_throughput(args.path, args.snapshot)
+        return
+
+    if args.headless:
+        try:
+            from .headless import HeadlessMonitor
+        except ImportError:
+            from headless import HeadlessMonitor
+        HeadlessMonitor(args.path, args.snapshot, args.snapshot_every).run()
+        return
+
     monitor = TrainingMonitor(args.path)
-    monitor.start()
+    monitor.start(args.interval)
 
 
 if __name__ == "__main__":
     main()
-
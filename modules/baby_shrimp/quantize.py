@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+INT8 post-training quantization for Baby Shrimp CPU inference
+Calibrates on the module dataset and compares accuracy and latency with FP32
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+import cv2
+import numpy as np
+import yaml
+from ultralytics import YOLO
+
+try:
+    from .model_cache import get_model
+    from .export import resolve_backend
+except ImportError:
+    from model_cache import get_model
+    from export import resolve_backend
+
+DATASET_DIR = "modules/baby_shrimp/dataset"
+
+# Ground-truth size buckets: sqrt(box area) in original image pixels
+SIZE_BUCKETS = (
+    ('tiny', 0, 8),
+    ('small', 8, 16),
+    ('medium', 16, 32),
+    ('large', 32, float('inf')),
+)
+
+# Recall drop (INT8 vs FP32) that counts as losing objects in a size bucket
+RECALL_DROP_TOLERANCE = 0.02
+
+
+def list_images(images_dir):
+    images_path = Path(images_dir)
+    return sorted(list(images_path.glob("*.jpg")) + list(images_path.glob("*.png")))
+
+
+def calibration_split(dataset_dir=DATASET_DIR, min_images=50):
+    """
+    Pick the calibration split: valid, or train when valid is too small
+
+    Returns:
+        (split name, images directory)
+    """
+    valid = Path(dataset_dir) / "valid" / "images"
+    n_valid = len(list_images(valid))
+    if n_valid >= min_images:
+        return "valid", valid
+
+    print(f"⚠️  Only {n_valid} valid images (< {min_images}), calibrating on train instead")
+    return "train", Path(dataset_dir) / "train" / "images"
+
+
+def quantize_model(model_path, dataset_dir=DATASET_DIR, imgsz=640, min_images=50):
+    """
+    Export an INT8 OpenVINO model calibrated on the module dataset
+
+    Ultralytics calibrates with NNCF on the 'val' entry of the data YAML, so a
+    calibration YAML pointing 'val' at the chosen split is written next to
+    the weights.
+
+    Returns:
+        Path of the INT8 model directory
+    """
+    split, images_dir = calibration_split(dataset_dir, min_images)
+
+    with open(Path(dataset_dir) / "data.yaml", 'r') as f:
+        data_config = yaml.safe_load(f)
+
+    calib_yaml = Path(model_path).parent / "int8_calibration.yaml"
+    with open(calib_yaml, 'w') as f:
+        yaml.safe_dump({
+            'path': str(Path(dataset_dir).resolve()),
+            'train': 'train/images',
+            'val': f'{split}/images',
+            'nc': data_config['nc'],
+            'names': data_config['names'],
+        }, f)
+
+    print(f"🎯 Calibrating INT8 on {split} split: {images_dir} ({len(list_images(images_dir))} images)")
+    return YOLO(model_path).export(format="openvino", int8=True, data=str(calib_yaml), imgsz=imgsz)
+
+
+def load_ground_truth(label_path, width, height):
+    """
+    Read a YOLO label file as pixel xyxy boxes
+
+    Handles both box rows (cls cx cy w h) and polygon rows (cls x1 y1 x2 y2 ...),
+    as Roboflow exports can contain either.
+    """
+    boxes = []
+    if Path(label_path).exists():
+        with open(label_path, 'r') as f:
+            for line in f:
+                values = line.split()
+                if len(values) < 5:
+                    continue
+                coords = np.array(values[1:], dtype=np.float32)
+                if len(coords) == 4:
+                    cx, cy, w, h = coords
+                    boxes.append((cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2))
+                else:
+                    xs, ys = coords[0::2], coords[1::2]
+                    boxes.append((xs.min(), ys.min(), xs.max(), ys.max()))
+
+    scale = np.array([width, height, width, height], dtype=np.float32)
+    return np.array(boxes, dtype=np.float32).reshape(-1, 4) * scale
+
+
+def box_iou(a, b):
+    """IoU matrix between two sets of xyxy boxes"""
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(rb - lt, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def match_ground_truth(pred_xyxy, pred_conf, gt_xyxy, iou_threshold=0.5):
+    """Greedy confidence-ordered matching; returns which GT boxes were found"""
+    matched = np.zeros(len(gt_xyxy), dtype=bool)
+    if len(pred_xyxy) == 0 or len(gt_xyxy) == 0:
+        return matched
+
+    ious = box_iou(pred_xyxy[np.argsort(-pred_conf)], gt_xyxy)
+    for row in ious:
+        row = np.where(matched, 0, row)
+        best = row.argmax()
+        if row[best] >= iou_threshold:
+            matched[best] = True
+    return matched
+
+
+def evaluate(weights, data_yaml, images_dir, conf=0.25, imgsz=640, device=None):
+    """
+    Measure mAP50, count MAE, latency and recall per object size for one model
+
+    Returns:
+        Dict of metrics plus per-image counts
+    """
+    model = get_model(weights, device)
+
+    metrics = model.val(data=str(data_yaml), imgsz=imgsz, batch=1, device=device, plots=False, verbose=False)
+
+    latencies = []
+    counts = {}
+    count_errors = []
+    found = {name: 0 for name, _, _ in SIZE_BUCKETS}
+    total = {name: 0 for name, _, _ in SIZE_BUCKETS}
+
+    labels_dir = Path(images_dir).parent / "labels"
+    for image_path in list_images(images_dir):
+        img = cv2.imread(str(image_path))
+        if img is None:
+            continue
+        height, width = img.shape[:2]
+        gt = load_ground_truth(labels_dir / f"{image_path.stem}.txt", width, height)
+
+        start = time.perf_counter()
+        results = model.predict(source=img, imgsz=imgsz, conf=conf, device=device, save=False, verbose=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        boxes = results[0].boxes
+        pred_xyxy = boxes.xyxy.cpu().numpy()
+        pred_conf = boxes.conf.cpu().numpy()
+        counts[image_path.name] = len(pred_xyxy)
+        count_errors.append(abs(len(pred_xyxy) - len(gt)))
+
+        matched = match_ground_truth(pred_xyxy, pred_conf, gt)
+        sizes = np.sqrt(np.prod(gt[:, 2:] - gt[:, :2], axis=1))
+        for name, low, high in SIZE_BUCKETS:
+            in_bucket = (sizes >= low) & (sizes < high)
+            total[name] += int(in_bucket.sum())
+            found[name] += int(matched[in_bucket].sum())
+
+    # The first prediction includes warm-up
+    timed = latencies[1:] or latencies
+    return {
+        'map50': float(metrics.box.map50),
+        'count_mae': float(np.mean(count_errors)) if count_errors else 0.0,
+        'latency_ms': float(np.median(timed)) if timed else 0.0,
+        'recall_by_size': {name: (found[name] / total[name] if total[name] else None) for name in total},
+        'objects_by_size': total,
+        'counts': counts,
+    }
+
+
+def quantization_report(model_path, dataset_dir=DATASET_DIR, conf=0.25, imgsz=640, min_images=50, device=None):
+    """
+    Quantize best.pt to INT8 and compare it with the FP32 models
+
+    Prints a side-by-side table and writes int8_report.json next to the weights.
+    """
+    int8_path = quantize_model(model_path, dataset_dir, imgsz, min_images)
+    fp32_openvino = resolve_backend(model_path, 'openvino', imgsz)
+
+    # Absolute, so Ultralytics resolves the splits next to the YAML
+    data_yaml = (Path(dataset_dir) / "data.yaml").resolve()
+    images_dir = Path(dataset_dir) / "valid" / "images"
+
+    models = {
+        'FP32 torch': model_path,
+        'FP32 OpenVINO': fp32_openvino,
+        'INT8 OpenVINO': int8_path,
+    }
+    report = {}
+    for label, weights in models.items():
+        print(f"📏 Evaluating {label}: {weights}")
+        report[label] = evaluate(weights, data_yaml, images_dir, conf, imgsz, device)
+
+    fp32, int8 = report['FP32 torch'], report['INT8 OpenVINO']
+    int8_vs_fp32 = [abs(int8['counts'][name] - count) for name, count in fp32['counts'].items()]
+
+    print("\n" + "="*70)
+    print("📊 INT8 QUANTIZATION REPORT")
+    print("="*70)
+    print(f"{'':22}" + "".join(f"{label:>16}" for label in report))
+    print(f"{'mAP50':22}" + "".join(f"{r['map50']:>16.4f}" for r in report.values()))
+    print(f"{'Count MAE (vs labels)':22}" + "".join(f"{r['count_mae']:>16.2f}" for r in report.values()))
+    print(f"{'Latency p50 (ms)':22}" + "".join(f"{r['latency_ms']:>16.1f}" for r in report.values()))
+    for name, low, high in SIZE_BUCKETS:
+        label = f"Recall {name} ({fp32['objects_by_size'][name]})"
+        print(f"{label:22}" + "".join(
+            f"{'-':>16}" if r['recall_by_size'][name] is None else f"{r['recall_by_size'][name]:>16.3f}"
+            for r in report.values()))
+    print("-"*70)
+    print(f"Count MAE INT8 vs FP32: {np.mean(int8_vs_fp32):.2f}")
+
+    dropped = [name for name, _, _ in SIZE_BUCKETS
+               if fp32['recall_by_size'][name] is not None
+               and fp32['recall_by_size'][name] - int8['recall_by_size'][name] > RECALL_DROP_TOLERANCE]
+    if dropped:
+        print(f"⚠️  INT8 loses objects in size buckets: {', '.join(dropped)}")
+    else:
+        print("✅ INT8 keeps recall in every size bucket")
+    print("="*70 + "\n")
+
+    report_path = Path(model_path).parent / "int8_report.json"
+    with open(report_path, 'w') as f:
+        json.dump({'int8_model': str(int8_path), 'dropped_size_buckets': dropped, 'models': report}, f, indent=2)
+    print(f"💾 Report saved to: {report_path}")
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="INT8 quantization for Baby Shrimp CPU inference")
+    parser.add_argument("--model", required=True, help="Path to trained best.pt")
+    parser.add_argument("--dataset", default=DATASET_DIR, help="Dataset directory (with data.yaml)")
+    parser.add_argument("--conf", type=float, default=0.25, help="Confidence threshold")
+    parser.add_argument("--imgsz", type=int, default=640, help="Image size")
+    parser.add_argument("--min-calib-images", type=int, default=50,
+                        help="Calibrate on train when valid has fewer images than this")
+    parser.add_argument("--device", default=None, help="Device (cpu)")
+
+    args = parser.parse_args()
+
+    quantization_report(args.model, args.dataset, args.conf, args.imgsz, args.min_calib_images, args.device)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Hyperparameter sweeps for Baby Shrimp training
+Runs trials of train.py in parallel processes on separate CPU cores, stops
+trials that fall behind early (ASHA) and ranks them in a leaderboard
+"""
+import argparse
+import inspect
+import itertools
+import json
+import math
+import os
+import random
+import time
+from multiprocessing import get_context
+from pathlib import Path
+import numpy as np
+import yaml
+
+try:
+    from .monitor import CsvTail
+    from .train import train_baby_shrimp
+except ImportError:
+    from monitor import CsvTail
+    from train import train_baby_shrimp
+
+PROJECT = "modules/baby_shrimp/runs/detect"
+SWEEP_DIR = "sweeps"  # Under PROJECT, so compare.py finds the trials too
+METRIC = 'metrics/mAP50(B)'
+POLL_INTERVAL = 5.0
+# Search space names that map to train_baby_shrimp arguments; everything else
+# is passed to model.train as an override
+_ALIASES = {'model': 'model_name'}
+_TRAIN_PARAMS = set(inspect.signature(train_baby_shrimp).parameters) - {'data_yaml', 'name', 'overrides', 'resume'}
+
+
+def parse_space(space_file=None, params=()):
+    """
+    Search space from a YAML file and/or name=v1,v2,... arguments
+
+    Values are lists of choices, or {low, high, log} ranges that are sampled
+    (integers if both bounds are integers):
+
+        imgsz: [640, 960, 1280]
+        mosaic: [0.5, 1.0]
+        lr0: {low: 0.0001, high: 0.01, log: true}
+
+    Returns:
+        Dict of name → list of choices or range dict
+    """
+    space = {}
+    if space_file:
+        with open(space_file, 'r') as f:
+            space.update(yaml.safe_load(f) or {})
+    for param in params:
+        name, _, values = param.partition('=')
+        if not values:
+            raise ValueError(f"Expected name=value1,value2,... but got: {param}")
+        space[name.strip()] = [yaml.safe_load(v) for v in values.split(',')]
+    for name, values in space.items():
+        if isinstance(values, dict):
+            if not {'low', 'high'} <= set(values):
+                raise ValueError(f"Range for {name} needs low and high: {values}")
+        elif not isinstance(values, list):
+            space[name] = [values]
+    return space
+
+
+def sample_trials(space, n_trials=None, seed=0):
+    """
+    Parameter sets to train
+
+    If the space has only choices: all combinations, or n_trials distinct
+    ones drawn from them. With ranges: n_trials random samples (default 8).
+    """
+    names = list(space)
+    rng = random.Random(seed)
+    if all(isinstance(space[n], list) for n in names):
+        grid = [dict(zip(names, combo)) for combo in itertools.product(*(space[n] for n in names))]
+        return grid if n_trials is None or n_trials >= len(grid) else rng.sample(grid, n_trials)
+
+    trials = []
+    for _ in range(n_trials or 8):
+        trial = {}
+        for name in names:
+            values = space[name]
+            if isinstance(values, list):
+                trial[name] = rng.choice(values)
+                continue
+            low, high = values['low'], values['high']
+            if values.get('log'):
+                value = math.exp(rng.uniform(math.log(low), math.log(high)))
+            else:
+                value = rng.uniform(low, high)
+            trial[name] = int(round(value)) if isinstance(low, int) and isinstance(high, int) else float(f"{value:.4g}")
+        trials.append(trial)
+    return trials
+
+
+def rungs(epochs, grace=3, eta=3):
+    """Epochs at which trials are compared: grace, grace*eta, grace*eta², … below epochs"""
+    points = []
+    epoch = grace
+    while epoch < epochs:
+        points.append(epoch)
+        epoch *= eta
+    return points
+
+
+def partition_cores(parallel):
+    """Disjoint sets of CPU cores, one per parallel trial"""
+    cores = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else list(range(os.cpu_count()))
+    per_trial = max(len(cores) // parallel, 1)
+    return [cores[i * per_trial:(i + 1) * per_trial] or cores for i in range(parallel)]
+
+
+def _run_trial(data_yaml, name, params, epochs, cores, log_path):
+    """Train one trial (runs in a spawned process, output goes to its log)"""
+    import sys
+    import torch
+
+    log = open(log_path, 'w')
+    os.dup2(log.fileno(), 1)
+    os.dup2(log.fileno(), 2)
+    sys.stdout = sys.stderr = log
+
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cores)
+    torch.set_num_threads(len(cores))
+
+    # A trial stopped early must not be resumed when the sweep is run again
+    kwargs, overrides = {'epochs': epochs, 'resume': False}, {'exist_ok': True}
+    for key, value in params.items():
+        key = _ALIASES.get(key, key)
+        (kwargs if key in _TRAIN_PARAMS else overrides)[key] = value
+    train_baby_shrimp(data_yaml, name=name, overrides=overrides, **kwargs)
+
+
+class Trial:
+    def __init__(self, index, params, run_dir):
+        self.index = index
+        self.params = params
+        self.run_dir = Path(run_dir)
+        self.tail = CsvTail(self.run_dir / 'results.csv')
+        self.process = None
+        self.epochs = 0
+        self.best = None
+        self.best_epoch = None
+        self.rung_values = {}
+        self.status = 'pending'
+        self.started = self.finished = None
+
+    def read(self, metric):
+        """Take in new results.csv rows"""
+        rows, reset = self.tail.read()
+        if reset:
+            self.epochs, self.best, self.best_epoch = 0, None, None
+        for row in rows:
+            self.epochs = int(row['epoch'])
+            value = row.get(metric, math.nan)
+            if math.isfinite(value) and (self.best is None or value > self.best):
+                self.best, self.best_epoch = value, self.epochs
+
+    def summary(self):
+        weights = self.run_dir / 'weights' / 'best.pt'
+        return {
+            'trial': self.index,
+            'params': self.params,
+            'status': self.status,
+            'epochs': self.epochs,
+            'best': self.best,
+            'best_epoch': self.best_epoch,
+            'weights': str(weights) if weights.exists() else None,
+            'run_dir': str(self.run_dir),
+            'minutes': round((self.finished - self.started) / 60, 2) if self.started and self.finished else None,
+        }
+
+
+def run_sweep(space, data_yaml="modules/baby_shrimp/dataset/data.yaml", epochs=30, n_trials=None, parallel=2,
+              grace=3, eta=3, metric=METRIC, name=None, seed=0, poll=POLL_INTERVAL):
+    """
+    Train sampled parameter sets in parallel and stop laggards early
+
+    Each trial trains for the full number of epochs (so the learning rate
+    schedule is the same for all), while the sweep follows its results.csv.
+    When a trial reaches a rung (see rungs()), its best metric so far is
+    compared with every trial that reached the rung before it; unless it is
+    in the top 1/eta it is stopped (ASHA, the asynchronous variant of
+    successive halving, so no trial ever waits for another). Freed cores go
+    to the next pending trial.
+
+    Args:
+        space: Search space (see parse_space)
+        data_yaml: Dataset YAML (use an absolute path)
+        epochs: Maximum epochs per trial
+        n_trials: Number of sampled trials (None: full grid of choices)
+        parallel: Trials trained at the same time, each on its own cores
+        grace: Epochs before a trial can first be stopped
+        eta: Keep the top 1/eta at every rung
+        metric: results.csv column to maximize
+        name: Sweep name (default: timestamp); must not exist yet
+        seed: Sampling seed
+        poll: Seconds between results.csv checks
+
+    Returns:
+        Leaderboard: list of trial summaries, best first
+    """
+    name = name or time.strftime('sweep_%Y%m%d_%H%M%S')
+    sweep_dir = Path(PROJECT) / SWEEP_DIR / name
+    if sweep_dir.exists():
+        # Trials would append to the old results.csv files and ASHA would rank stale epochs
+        raise FileExistsError(f"Sweep {sweep_dir} already exists, pick another --name or delete it")
+    sweep_dir.mkdir(parents=True)
+    params = sample_trials(space, n_trials, seed)
+    trials = [Trial(i, p, sweep_dir / f"trial_{i:03d}") for i, p in enumerate(params)]
+    points = rungs(epochs, grace, eta)
+    recorded = {rung: [] for rung in points}
+    slots = partition_cores(parallel)
+    free = list(range(parallel))
+
+    print("="*60)
+    print("🧪 HYPERPARAMETER SWEEP")
+    print("="*60)
+    print(f"Sweep: {sweep_dir}")
+    print(f"Trials: {len(trials)} ({parallel} in parallel, cores {slots})")
+    print(f"Epochs: {epochs}, rungs at {points or 'none'} (keep top 1/{eta})")
+    print(f"Metric: {metric}")
+    print("="*60 + "\n")
+    with open(sweep_dir / 'sweep.yaml', 'w') as f:
+        yaml.safe_dump({'data': str(data_yaml), 'epochs': epochs, 'parallel': parallel, 'grace': grace, 'eta': eta,
+                        'metric': metric, 'space': space, 'trials': params}, f, sort_keys=False)
+
+    ctx = get_context('spawn')
+    pending = list(trials)
+    running = {}
+    try:
+        while pending or running:
+            while pending and free:
+                trial, slot = pending.pop(0), free.pop(0)
+                trial.process = ctx.Process(
+                    target=_run_trial,
+                    args=(str(data_yaml), f"{SWEEP_DIR}/{name}/{trial.run_dir.name}", trial.params, epochs,
+                          slots[slot], str(sweep_dir / f"{trial.run_dir.name}.log")),
+                    daemon=False)
+                trial.process.start()
+                trial.status, trial.started = 'running', time.time()
+                running[trial] = slot
+                print(f"🚀 Trial {trial.index}: {trial.params}")
+
+            time.sleep(poll)
+
+            for trial in list(running):
+                trial.read(metric)
+                for rung in points:
+                    if trial.epochs < rung or rung in trial.rung_values:
+                        continue
+                    value = trial.best if trial.best is not None else -math.inf
+                    trial.rung_values[rung] = value
+                    recorded[rung].append(value)
+                    cutoff = np.percentile(recorded[rung], (1 - 1 / eta) * 100)
+                    if value < cutoff:
+                        trial.process.kill()
+                        trial.status = f'stopped@{rung}'
+                        print(f"✂️  Trial {trial.index} stopped at epoch {rung}: {value:.4f} < {cutoff:.4f}")
+                        break
+
+                if not trial.process.is_alive() or trial.status.startswith('stopped'):
+                    trial.process.join()
+                    trial.read(metric)
+                    if trial.status == 'running':
+                        trial.status = 'completed' if trial.process.exitcode == 0 else 'failed'
+                    trial.finished = time.time()
+                    free.append(running.pop(trial))
+                    best = f"{trial.best:.4f}" if trial.best is not None else '-'
+                    print(f"🏁 Trial {trial.index} {trial.status} after {trial.epochs} epochs (best {best})")
+    except KeyboardInterrupt:
+        print("\n⚠️  Interrupted, stopping running trials")
+        for trial in running:
+            trial.process.kill()
+            trial.process.join()
+            trial.read(metric)
+            trial.status, trial.finished = 'interrupted', time.time()
+
+    leaderboard = sorted((t.summary() for t in trials),
+                         key=lambda s: (s['best'] is None, -(s['best'] or 0)))
+    with open(sweep_dir / 'leaderboard.json', 'w') as f:
+        json.dump(leaderboard, f, indent=2)
+    print_leaderboard(leaderboard, metric)
+    print(f"💾 Leaderboard saved to: {sweep_dir / 'leaderboard.json'}")
+    return leaderboard
+
+
+def print_leaderboard(leaderboard, metric=METRIC):
+    """Print trials ranked by their best metric"""
+    print("\n" + "="*50)
+    print("🏆 SWEEP LEADERBOARD")
+    print("="*50)
+    for rank, s in enumerate(leaderboard, 1):
+        best = f"{s['best']:.4f} @ {s['best_epoch']}" if s['best'] is not None else '-'
+        params = ', '.join(f"{k}={v}" for k, v in s['params'].items())
+        print(f"{rank:>2}. trial {s['trial']:<3} {metric}: {best:<14} {s['status']:<12} {params}")
+        print(f"    {s['weights'] or 'no weights'}")
+    print("="*50 + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hyperparameter sweep for Baby Shrimp training")
+    parser.add_argument("--data", default="modules/baby_shrimp/dataset/data.yaml", help="Path to dataset YAML")
+    parser.add_argument("--space", default=None, help="YAML search space file")
+    parser.add_argument("--param", action="append", default=[],
+                        help="Search space entry name=v1,v2,... (repeatable, e.g. imgsz=640,960)")
+    parser.add_argument("--epochs", type=int, default=30, help="Maximum epochs per trial")
+    parser.add_argument("--trials", type=int, default=None, help="Random trials (default: full grid)")
+    parser.add_argument("--parallel", type=int, default=2, help="Trials trained at the same time")
+    parser.add_argument("--grace", type=int, default=3, help="Epochs before a trial can be stopped")
+    parser.add_argument("--eta", type=int, default=3, help="Keep the top 1/eta of trials at each rung")
+    parser.add_argument("--metric", default=METRIC, help="results.csv column to maximize")
+    parser.add_argument("--name", default=None, help="Sweep name")
+    parser.add_argument("--seed", type=int, default=0, help="Sampling seed")
+
+    args = parser.parse_args()
+
+    space = parse_space(args.space, args.param)
+    if not space:
+        parser.error("empty search space: pass --space and/or --param")
+    try:
+        run_sweep(space, str(Path(args.data).resolve()), args.epochs, args.trials, args.parallel,
+                  args.grace, args.eta, args.metric, args.name, args.seed)
+    except FileExistsError as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    main()
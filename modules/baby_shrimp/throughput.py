@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Per-batch training throughput for Baby Shrimp
+Training callbacks that time dataloader waits, compute and validation and
+write them to throughput.csv next to the run's results.csv
+"""
+import resource
+import sys
+import time
+import psutil
+import torch
+from ultralytics.utils import RANK
+
+FILENAME = "throughput.csv"
+COLUMNS = ('epoch', 'batch', 'images', 'data_wait', 'compute', 'images_per_sec',
+           'rss_mb', 'peak_rss_mb', 'val_time', 'epoch_time')
+FLUSH_EVERY = 50  # Batches between writes, so the file can be followed during an epoch
+MB = 1 << 20
+
+
+def peak_rss():
+    """Peak resident memory of this process in bytes (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class ThroughputLogger:
+    """
+    Training callbacks recording where the time of every batch and epoch goes
+
+    - data_wait: from the end of the previous batch (or the epoch start) to
+      the start of this one, i.e. waiting for the dataloader
+    - compute: forward, backward and optimizer step; the device is
+      synchronized first so queued GPU work is not counted as data wait
+    - val_time: validation of the epoch (on_val_start → on_val_end)
+    - epoch_time: the whole epoch as Ultralytics measures it, including
+      validation and checkpoint saving
+
+    Every batch is one row. The epoch row that follows has an empty batch
+    column and holds the epoch's totals. Rows are appended to throughput.csv
+    in the run directory every FLUSH_EVERY batches and at the end of each
+    epoch.
+    """
+
+    def __init__(self):
+        self.process = psutil.Process()
+        self.rows = []
+        self.reset_epoch()
+        self.last = None
+        self.batch_start = None
+        self.batch_wait = 0.0
+        self.val_start = None
+
+    def reset_epoch(self):
+        self.batch = 0
+        self.images = 0
+        self.data_wait = 0.0
+        self.compute = 0.0
+        self.peak_rss = 0
+        self.val_time = None
+
+    def register(self, model):
+        """Add the callbacks to a YOLO model before model.train()"""
+        model.add_callback("on_train_epoch_start", self.on_train_epoch_start)
+        model.add_callback("on_train_batch_start", self.on_train_batch_start)
+        model.add_callback("on_train_batch_end", self.on_train_batch_end)
+        model.add_callback("on_val_start", self.on_val_start)
+        model.add_callback("on_val_end", self.on_val_end)
+        model.add_callback("on_fit_epoch_end", self.on_fit_epoch_end)
+        return model
+
+    @staticmethod
+    def _sync(device):
+        if device.type == 'cuda':
+            torch.cuda.synchronize(device)
+        elif device.type == 'mps':
+            torch.mps.synchronize()
+
+    def on_train_epoch_start(self, trainer):
+        self.reset_epoch()
+        # A resumed epoch continues after the batches trained before the restart (checkpoint.py)
+        self.batch = getattr(trainer, 'skipped_batches', 0)
+        self.last = time.perf_counter()
+
+    def on_train_batch_start(self, trainer):
+        self.batch_start = time.perf_counter()
+        self.batch_wait = self.batch_start - self.last if self.last is not None else 0.0
+
+    def on_train_batch_end(self, trainer):
+        self._sync(trainer.device)
+        now = time.perf_counter()
+        compute = now - self.batch_start
+
+        loader = trainer.train_loader
+        n = len(loader.dataset)
+        images = max(min(loader.batch_size, n - self.batch * loader.batch_size), 0)
+        rss = self.process.memory_info().rss
+        peak = peak_rss()
+
+        self.images += images
+        self.data_wait += self.batch_wait
+        self.compute += compute
+        self.peak_rss = max(self.peak_rss, peak)
+        self.rows.append((trainer.epoch + 1, self.batch, images, self.batch_wait, compute,
+                          images / max(self.batch_wait + compute, 1e-9), rss / MB, peak / MB, '', ''))
+        self.batch += 1
+        if len(self.rows) >= FLUSH_EVERY:
+            self.flush(trainer)
+        self.last = time.perf_counter()
+
+    def on_val_start(self, validator):
+        self.val_start = time.perf_counter()
+
+    def on_val_end(self, validator):
+        if self.val_start is not None:
+            self.val_time = time.perf_counter() - self.val_start
+            self.val_start = None
+
+    def on_fit_epoch_end(self, trainer):
+        if not self.batch:
+            return  # Also fired by final_eval after training, with no new epoch
+        busy = self.data_wait + self.compute
+        self.rows.append((trainer.epoch + 1, '', self.images, self.data_wait, self.compute,
+                          self.images / max(busy, 1e-9), self.process.memory_info().rss / MB,
+                          self.peak_rss / MB, self.val_time if self.val_time is not None else '',
+                          trainer.epoch_time if trainer.epoch_time is not None else ''))
+        self.flush(trainer)
+        self.reset_epoch()
+        self.last = None
+
+    def flush(self, trainer):
+        """Append the buffered rows to throughput.csv (rank 0 only)"""
+        if RANK not in (-1, 0) or not self.rows:
+            self.rows = []
+            return
+        path = trainer.csv.with_name(FILENAME)
+        header = '' if path.exists() else ','.join(COLUMNS) + '\n'
+        with open(path, 'a') as f:
+            f.write(header + ''.join(
+                ','.join(f"{v:.6g}" if isinstance(v, float) else str(v) for v in row) + '\n' for row in self.rows))
+        self.rows = []
+
+
+def add_throughput_callbacks(model):
+    """Record per-batch throughput of model.train() in throughput.csv (see ThroughputLogger)"""
+    return ThroughputLogger().register(model)
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Tiled (sliced) inference for dense Baby Shrimp frames
+Runs overlapping native-size tiles in one batch and merges seam duplicates
+"""
+import argparse
+import time
+from pathlib import Path
+import cv2
+import numpy as np
+import torch
+from torchvision.ops import nms
+
+try:
+    from .model_cache import get_model
+except ImportError:
+    from model_cache import get_model
+
+MERGE_STRATEGIES = ('nms', 'centroid')
+
+
+def tile_origins(length, tile_size, overlap):
+    """
+    Start offsets of tiles along one axis
+
+    Tiles advance by tile_size * (1 - overlap) and the last tile is aligned
+    with the image border, so every pixel is covered.
+    """
+    if length <= tile_size:
+        return [0]
+    stride = max(1, int(tile_size * (1 - overlap)))
+    origins = list(range(0, length - tile_size, stride))
+    origins.append(length - tile_size)
+    return origins
+
+
+def make_tiles(img, tile_size=640, overlap=0.2):
+    """
+    Split an image into overlapping tiles
+
+    Args:
+        img: BGR image
+        tile_size: Tile width and height in pixels
+        overlap: Fraction of a tile shared with its neighbour
+
+    Returns:
+        (tiles, origins) where origins holds the (x0, y0) of each tile
+    """
+    h, w = img.shape[:2]
+    tiles, origins = [], []
+    for y0 in tile_origins(h, tile_size, overlap):
+        for x0 in tile_origins(w, tile_size, overlap):
+            tiles.append(img[y0:y0 + tile_size, x0:x0 + tile_size])
+            origins.append((x0, y0))
+    return tiles, origins
+
+
+def merge_detections(xyxy, conf, strategy='nms', iou=0.5, radius=None):
+    """
+    Remove duplicate detections where tiles overlap
+
+    Args:
+        xyxy: float32 array (N, 4) of boxes in full-frame coordinates
+        conf: float32 array (N,) of confidences
+        strategy: 'nms' (IoU suppression) or 'centroid' (suppress any box
+            whose centre is closer than radius to a more confident one on
+            both axes, i.e. inside a square window rather than a circle)
+        iou: IoU threshold for 'nms'
+        radius: Per-axis pixel distance for 'centroid' (default: half the
+            median box side)
+
+    Returns:
+        Indices of the detections to keep, highest confidence first
+    """
+    if strategy not in MERGE_STRATEGIES:
+        raise ValueError(f"Unknown merge strategy '{strategy}', expected one of {MERGE_STRATEGIES}")
+    if len(xyxy) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    boxes = torch.from_numpy(xyxy)
+    scores = torch.from_numpy(conf)
+
+    if strategy == 'centroid':
+        if radius is None:
+            sides = np.minimum(xyxy[:, 2] - xyxy[:, 0], xyxy[:, 3] - xyxy[:, 1])
+            radius = max(1.0, float(np.median(sides)) / 2)
+        # Squares of side `radius` around each centre overlap exactly when two
+        # centres are closer than `radius` on both axes, so NMS with IoU 0
+        # performs the centroid de-duplication in one vectorized call
+        centres = (boxes[:, :2] + boxes[:, 2:]) / 2
+        boxes = torch.cat([centres - radius / 2, centres + radius / 2], dim=1)
+        iou = 0.0
+
+    return nms(boxes, scores, iou).numpy()
+
+
+def predict_tiled(model, img, conf=0.25, tile_size=640, overlap=0.2, merge='nms',
+                  merge_iou=0.5, merge_radius=None, edge_margin=2, scale=1.0, device=None):
+    """
+    Detect objects in a large frame by running every tile in one batch
+
+    Boxes that touch an inner tile border (within edge_margin pixels) are
+    dropped, because the object is cut off there and shows up whole in the
+    neighbouring tile.
+
+    Args:
+        model: Loaded YOLO model
+        img: BGR image
+        conf: Confidence threshold
+        tile_size: Tile size in pixels, also used as the inference imgsz
+        overlap: Fraction of a tile shared with its neighbour
+        merge: Seam merge strategy ('nms' or 'centroid')
+        merge_iou: IoU threshold for 'nms' merging
+        merge_radius: Per-axis pixel distance for 'centroid' merging
+        edge_margin: Pixels from an inner tile border that count as cut off
+        scale: Resize the frame by this factor before tiling, e.g. 2.0 gives
+            640 frames the object size the model sees at imgsz=1280
+        device: Device to use (None for auto-detect)
+
+    Returns:
+        (xyxy float32[N, 4], conf float32[N]) in original frame coordinates
+    """
+    if scale != 1.0:
+        img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_LINEAR)
+    h, w = img.shape[:2]
+    tiles, origins = make_tiles(img, tile_size, overlap)
+
+    results = model.predict(
+        source=tiles,
+        imgsz=tile_size,
+        conf=conf,
+        device=device,
+        save=False,
+        verbose=False
+    )
+
+    all_xyxy, all_conf = [], []
+    for (x0, y0), tile, result in zip(origins, tiles, results):
+        xyxy = result.boxes.xyxy.cpu().numpy()
+        scores = result.boxes.conf.cpu().numpy()
+        th, tw = tile.shape[:2]
+
+        # Only borders shared with another tile can cut objects
+        keep = np.ones(len(xyxy), dtype=bool)
+        if x0 > 0:
+            keep &= xyxy[:, 0] > edge_margin
+        if y0 > 0:
+            keep &= xyxy[:, 1] > edge_margin
+        if x0 + tw < w:
+            keep &= xyxy[:, 2] < tw - edge_margin
+        if y0 + th < h:
+            keep &= xyxy[:, 3] < th - edge_margin
+
+        all_xyxy.append(xyxy[keep] + np.array([x0, y0, x0, y0], dtype=np.float32))
+        all_conf.append(scores[keep])
+
+    xyxy = np.concatenate(all_xyxy).astype(np.float32)
+    scores = np.concatenate(all_conf).astype(np.float32)
+    if len(tiles) > 1:
+        keep = merge_detections(xyxy, scores, merge, merge_iou, merge_radius)
+        xyxy, scores = xyxy[keep], scores[keep]
+    if scale != 1.0:
+        xyxy /= scale
+    return xyxy, scores
+
+
+def benchmark_tiled(model_path, images_dir, conf=0.25, tile_size=640, overlap=0.2, merge='nms',
+                    scale=1.0, full_imgsz=1280, device=None):
+    """
+    Compare tiled inference against full-frame inference at full_imgsz
+
+    Prints per-image counts and mean latency for both modes.
+
+    Returns:
+        Dict with per-image counts, latencies and count MAE
+    """
+    model = get_model(model_path, device)
+    images_path = Path(images_dir)
+    image_files = sorted(list(images_path.glob("*.jpg")) + list(images_path.glob("*.png")))
+
+    print(f"📁 Found {len(image_files)} images\n")
+
+    rows = []
+    for img_file in image_files:
+        img = cv2.imread(str(img_file))
+        if img is None:
+            continue
+
+        start = time.perf_counter()
+        full = model.predict(source=img, imgsz=full_imgsz, conf=conf, device=device, save=False, verbose=False)
+        full_count = len(full[0].boxes)
+        full_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        xyxy, _ = predict_tiled(model, img, conf, tile_size, overlap, merge, scale=scale, device=device)
+        tiled_ms = (time.perf_counter() - start) * 1000
+
+        rows.append((img_file.name, full_count, len(xyxy), full_ms, tiled_ms))
+        print(f"{img_file.name}: full@{full_imgsz}={full_count} ({full_ms:.0f} ms)  "
+              f"tiled@{tile_size}={len(xyxy)} ({tiled_ms:.0f} ms)")
+
+    if not rows:
+        print("❌ No readable images")
+        return {}
+
+    full_counts = np.array([r[1] for r in rows])
+    tiled_counts = np.array([r[2] for r in rows])
+    # Skip the first image in latency stats (model warm-up)
+    timed = rows[1:] or rows
+    full_ms = np.mean([r[3] for r in timed])
+    tiled_ms = np.mean([r[4] for r in timed])
+    mae = float(np.mean(np.abs(full_counts - tiled_counts)))
+
+    print("\n" + "="*50)
+    print("📊 TILED vs FULL-FRAME")
+    print("="*50)
+    print(f"Images: {len(rows)}")
+    print(f"Full frame @ {full_imgsz}: {full_counts.sum()} detected, {full_ms:.1f} ms/image")
+    print(f"Tiled @ {tile_size} (scale {scale}, overlap {overlap}, {merge}): {tiled_counts.sum()} detected, "
+          f"{tiled_ms:.1f} ms/image")
+    print(f"Count MAE (tiled vs full): {mae:.2f}")
+    print(f"Speedup: {full_ms / tiled_ms:.2f}x")
+    print("="*50 + "\n")
+
+    return {
+        'counts': {r[0]: {'full': r[1], 'tiled': r[2]} for r in rows},
+        'full_ms': float(full_ms),
+        'tiled_ms': float(tiled_ms),
+        'count_mae': mae,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tiled vs full-frame Baby Shrimp inference")
+    parser.add_argument("--model", required=True, help="Path to model weights")
+    parser.add_argument("--images-dir", required=True, help="Path to directory with images")
+    parser.add_argument("--conf", type=float, default=0.25, help="Confidence threshold")
+    parser.add_argument("--tile-size", type=int, default=640, help="Tile size (model native size)")
+    parser.add_argument("--tile-overlap", type=float, default=0.2, help="Tile overlap fraction")
+    parser.add_argument("--tile-merge", default="nms", choices=MERGE_STRATEGIES, help="Seam merge strategy")
+    parser.add_argument("--tile-scale", type=float, default=1.0, help="Resize frames by this factor before tiling")
+    parser.add_argument("--full-imgsz", type=int, default=1280, help="Full-frame image size to compare against")
+    parser.add_argument("--device", default=None, help="Device (mps/cuda/cpu)")
+
+    args = parser.parse_args()
+
+    benchmark_tiled(args.model, args.images_dir, args.conf, args.tile_size, args.tile_overlap,
+                    args.tile_merge, args.tile_scale, args.full_imgsz, args.device)
+
+
+if __name__ == "__main__":
+    main()
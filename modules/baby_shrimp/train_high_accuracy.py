@@ -8,6 +8,17 @@ import argparse
 from pathlib import Path
 from ultralytics import YOLO
 
+try:
+    from .shards import pack_dataset, ShardTrainer
+    from .autoconfig import auto_config, print_config, record_config, recorded_args, AutoTrainer, AutoShardTrainer
+    from .throughput import add_throughput_callbacks
+    from .checkpoint import CHECKPOINT_MINUTES, find_resumable, resumable
+except ImportError:
+    from shards import pack_dataset, ShardTrainer
+    from autoconfig import auto_config, print_config, record_config, recorded_args, AutoTrainer, AutoShardTrainer
+    from throughput import add_throughput_callbacks
+    from checkpoint import CHECKPOINT_MINUTES, find_resumable, resumable
+
 def train_high_accuracy(
     model_path='yolov8m.pt',  # Medium model for better accuracy
     data_yaml='modules/baby_shrimp/dataset/data.yaml',
@@ -16,7 +27,12 @@ def train_high_accuracy(
     batch=2,  # Small batch for stability
     device='cpu',
     name='baby_shrimp_high_accuracy',
-    patience=40  # More patience for convergence
+    patience=40,  # More patience for convergence
+    shards=False,  # Read pre-decoded images from memory-mapped shards
+    auto=False,  # Pick batch, workers and image caching for this host
+    throughput=True,  # Record per-batch timings in throughput.csv
+    resume=True,  # Continue an interrupted run with the same name
+    checkpoint_minutes=CHECKPOINT_MINUTES  # Write last.pt at least this often
 ):
     """
     Train YOLO model with high accuracy configuration
@@ -28,6 +44,18 @@ def train_high_accuracy(
     - Lower learning rate for stability
     - More augmentation
     - Longer patience
+    
+    With shards=True every image is decoded once into memory-mapped shards
+    (see shards.py) instead of once per epoch. With auto=True the batch size,
+    dataloader workers and image caching are picked for this host (see
+    autoconfig.py) and recorded in the run's args.yaml. With throughput=True
+    dataloader wait, compute, images/sec and memory of every batch are
+    written to throughput.csv next to results.csv (see throughput.py).
+    
+    Runs of this size take days on CPU. If a run with the same name was
+    interrupted, it continues from its last.pt with the optimizer state and
+    epoch restored; last.pt is written atomically and at least every
+    checkpoint_minutes, also mid-epoch (see checkpoint.py).
     """
     
     print("="*60)
@@ -36,18 +64,48 @@ def train_high_accuracy(
     print(f"Model: {model_path}")
     print(f"Epochs: {epochs}")
     print(f"Image size: {imgsz}")
-    print(f"Batch size: {batch}")
+    print(f"Batch size: {'auto' if auto else batch}")
     print(f"Device: {device}")
     print("="*60 + "\n")
     
-    # Load model
-    print(f"📦 Loading model: {model_path}")
-    model = YOLO(model_path)
+    # Continue an interrupted run with the same name
+    last = find_resumable('modules/baby_shrimp/runs/detect', name) if resume else None
+    if last:
+        print(f"♻️  Resuming interrupted run from: {last}\n")
+    
+    print(f"📦 Loading model: {last or model_path}")
+    model = YOLO(last or model_path)
+    
+    # Pick batch size, workers and image cache for this host
+    workers, cache = 0, False
+    if last:
+        # Same trainer and shards as the interrupted run; the other
+        # arguments come from the checkpoint
+        run = recorded_args(Path(last).parents[1])
+        data_yaml, imgsz = run.get('data', data_yaml), run.get('imgsz', imgsz)
+        if run.get('auto'):
+            auto = True
+            shards = shards or run['auto']['cache'] == 'shards'
+    elif auto:
+        config = auto_config(model_path, data_yaml, imgsz, device)
+        print_config(config)
+        batch, workers = config['batch'], config['workers']
+        cache = config['cache'] == 'ram'
+        shards = shards or config['cache'] == 'shards'
+        model.add_callback("on_pretrain_routine_start", record_config(config))
+    trainer = (AutoShardTrainer if shards else AutoTrainer) if auto else (ShardTrainer if shards else None)
+    trainer = resumable(trainer, checkpoint_minutes)
+    if throughput:
+        add_throughput_callbacks(model)
+    
+    if shards:
+        pack_dataset(data_yaml, imgsz)
     
     # Training with high accuracy parameters
     print("🎯 Starting high accuracy training...")
-    results = model.train(
+    train_args = dict(
         data=data_yaml,
+        trainer=trainer,
         epochs=epochs,
         imgsz=imgsz,
         batch=batch,
@@ -57,7 +115,8 @@ def train_high_accuracy(
         device=device,
         
         # Stability settings
-        workers=0,
+        workers=workers,
+        cache=cache,
         deterministic=True,
         seed=42,
         
@@ -100,6 +159,11 @@ def train_high_accuracy(
         cls=0.5,         # Class loss weight
         dfl=1.5,         # DFL loss weight
     )
+    if last:
+        # Arguments come from the checkpoint, only the trainer is passed again
+        results = model.train(resume=True, trainer=trainer)
+    else:
+        results = model.train(**train_args)
     
     print("\n" + "="*60)
     print("✅ HIGH ACCURACY TRAINING COMPLETE!")
@@ -127,6 +191,16 @@ if __name__ == "__main__":
                        help='Experiment name')
     parser.add_argument('--patience', type=int, default=40,
                        help='Early stopping patience (default: 40)')
+    parser.add_argument('--shards', action='store_true',
+                       help='Train from pre-decoded memory-mapped image shards')
+    parser.add_argument('--auto', action='store_true',
+                       help='Pick batch, workers and image caching for this host')
+    parser.add_argument('--no-throughput', action='store_true',
+                       help='Do not record per-batch throughput.csv')
+    parser.add_argument('--no-resume', action='store_true',
+                       help='Do not resume an interrupted run with the same name')
+    parser.add_argument('--checkpoint-minutes', type=float, default=CHECKPOINT_MINUTES,
+                       help=f'Maximum minutes between checkpoints (default: {CHECKPOINT_MINUTES})')
     
     args = parser.parse_args()
     
@@ -137,6 +211,11 @@ if __name__ == "__main__":
         batch=args.batch,
         device=args.device,
         name=args.name,
-        patience=args.patience
+        patience=args.patience,
+        shards=args.shards,
+        auto=args.auto,
+        throughput=not args.no_throughput,
+        resume=not args.no_resume,
+        checkpoint_minutes=args.checkpoint_minutes
     )
 
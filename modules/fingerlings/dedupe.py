@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate and augmentation-sibling detection for the Fingerlings datasets
+Groups Roboflow augmentation siblings by source frame, finds perceptual-hash
+near-duplicates, flags both leaking across splits and can write a thinned
+train list
+"""
+import argparse
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import cv2
+import numpy as np
+import yaml
+
+DATASETS = ("modules/fingerlings/dataset", "modules/fingerlings/dataset-v2")
+INDEX_PATH = "modules/fingerlings/cache/phash_index.npz"
+SPLITS = ('train', 'valid', 'test')
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png')
+# 16x16 = 256-bit hashes; 64-bit hashes put most frames of the same tank within a few bits
+HASH_SIZE = 16
+
+# Roboflow export names: <source stem>[_<ext>].rf.<hash> (the _<ext> tag is not always there)
+_ROBOFLOW_NAME = re.compile(r'^(?P<source>.+?)\.rf\.[0-9a-f]+$', re.IGNORECASE)
+
+# Bit counts of every byte value, for vectorized Hamming distances
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def source_stem(path):
+    """
+    Original frame a Roboflow export came from
+
+    >>> source_stem('dataset/train/images/0_jpg.rf.0b558880c26835725cced3244d92166a.jpg')
+    '0_jpg'
+    >>> source_stem('20-100_jpg.rf.48cddc3ac966dcd7ba6946bd4196de9a.jpg')
+    '20-100_jpg'
+    >>> source_stem('1467.rf.5106a0af43da1f4f59602c786ef665d6.jpg')
+    '1467'
+    >>> source_stem('frame_0001.jpg')
+    'frame_0001'
+    """
+    stem = Path(path).stem
+    match = _ROBOFLOW_NAME.match(stem)
+    return match.group('source') if match else stem
+
+
+def dhash(path, size=HASH_SIZE):
+    """
+    Difference hash of an image (size * size bits, packed into bytes)
+
+    JPEGs are decoded at 1/4 resolution, which is plenty for a 17x16 hash and
+    much faster than a full decode.
+    """
+    img = cv2.imread(str(path), cv2.IMREAD_REDUCED_GRAYSCALE_4)
+    if img is None:
+        return None
+    small = cv2.resize(img, (size + 1, size), interpolation=cv2.INTER_AREA)
+    return np.packbits((small[:, 1:] > small[:, :-1]).ravel())
+
+
+def list_images(datasets=DATASETS, splits=SPLITS):
+    """(dataset, split, path) for every image in the given datasets"""
+    images = []
+    for dataset in datasets:
+        for split in splits:
+            for path in sorted((Path(dataset) / split / 'images').glob('*')):
+                if path.suffix.lower() in IMAGE_SUFFIXES:
+                    images.append((dataset, split, path))
+    return images
+
+
+def build_index(datasets=DATASETS, index_path=INDEX_PATH, workers=8):
+    """
+    Perceptual hashes of every image, reusing cached hashes of unchanged files
+
+    Returns:
+        (list of (dataset, split, path), uint8 array (N, HASH_SIZE**2 / 8) of hashes)
+    """
+    images = list_images(datasets)
+    index_path = Path(index_path)
+
+    cached = {}
+    if index_path.exists():
+        data = np.load(index_path, allow_pickle=False)
+        if data['hashes'].shape[1:] == (HASH_SIZE * HASH_SIZE // 8,):
+            cached = {(p, m): h for p, m, h in zip(data['paths'], data['mtimes'], data['hashes'])}
+
+    paths = [str(path) for _, _, path in images]
+    mtimes = np.array([path.stat().st_mtime_ns for _, _, path in images], dtype=np.int64)
+    hashes = np.zeros((len(images), HASH_SIZE * HASH_SIZE // 8), dtype=np.uint8)
+    todo = []
+    for i, key in enumerate(zip(paths, mtimes)):
+        if key in cached:
+            hashes[i] = cached[key]
+        else:
+            todo.append(i)
+
+    # cv2 releases the GIL while decoding
+    with ThreadPoolExecutor(workers) as pool:
+        for i, value in zip(todo, pool.map(lambda i: dhash(paths[i]), todo)):
+            if value is not None:
+                hashes[i] = value
+
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(index_path, paths=np.array(paths), mtimes=mtimes, hashes=hashes)
+    print(f"🔎 Indexed {len(images)} images ({len(todo)} hashed, {len(images) - len(todo)} cached)")
+    return images, hashes
+
+
+def near_duplicates(hashes, max_distance=16, chunk=256):
+    """
+    All pairs of hashes within max_distance bits
+
+    Distances are computed chunk by chunk with XOR + byte popcount, so no
+    N x N matrix larger than chunk x N is ever held in memory.
+
+    Returns:
+        List of (i, j, distance) with i < j
+    """
+    pairs = []
+    for start in range(0, len(hashes), chunk):
+        block = hashes[start:start + chunk]
+        distances = _POPCOUNT[block[:, None, :] ^ hashes[None, :, :]].sum(axis=2, dtype=np.int32)
+        rows, cols = np.nonzero(distances <= max_distance)
+        rows += start
+        keep = rows < cols
+        pairs.extend(zip(rows[keep].tolist(), cols[keep].tolist(),
+                         distances[rows[keep] - start, cols[keep]].tolist()))
+    return pairs
+
+
+def sibling_groups(images):
+    """
+    Group id per image: images exported from the same source frame share one
+
+    Groups are keyed by source stem only, so siblings that ended up in
+    different datasets (dataset and dataset-v2) are grouped as well.
+    Near-duplicates are not merged into groups: consecutive video frames are
+    often within a few bits of each other, and chaining them would collapse
+    whole clips into one group.
+    """
+    ids = {}
+    return np.array([ids.setdefault(source_stem(path), len(ids)) for _, _, path in images])
+
+
+def thin_train(images, groups, pairs, keep_per_group=1, output="modules/fingerlings/dataset_thinned.yaml"):
+    """
+    Write a data YAML whose train list drops redundant copies
+
+    At most keep_per_group siblings are kept per source frame, and a train
+    image is dropped when it is a near-duplicate of one already kept. Every
+    source frame keeps at least one image, so coverage is preserved. The
+    dataset itself is not modified: train points to a text file of image
+    paths and val/test to the original directories.
+
+    Returns:
+        Path to the written YAML
+    """
+    near = {}
+    for i, j, _ in pairs:
+        near.setdefault(int(i), []).append(int(j))
+        near.setdefault(int(j), []).append(int(i))
+
+    kept, kept_set, per_group = [], set(), {}
+    for i, ((_, split, path), group) in enumerate(zip(images, groups)):
+        if split != 'train':
+            continue
+        first_of_group = group not in per_group
+        if per_group.get(group, 0) >= keep_per_group:
+            continue
+        if not first_of_group and any(j in kept_set for j in near.get(i, ())):
+            continue
+        per_group[group] = per_group.get(group, 0) + 1
+        kept.append(str(path.resolve()))
+        kept_set.add(i)
+
+    output = Path(output)
+    train_list = output.with_suffix('.train.txt')
+    train_list.write_text("\n".join(kept) + "\n")
+
+    datasets = list(dict.fromkeys(dataset for dataset, _, _ in images))
+    with open(Path(datasets[0]) / 'data.yaml', 'r') as f:
+        data_config = yaml.safe_load(f)
+
+    def split_dirs(split):
+        dirs = [str((Path(d) / split / 'images').resolve()) for d in datasets
+                if any(s == split and d == dataset for dataset, s, _ in images)]
+        return dirs[0] if len(dirs) == 1 else dirs
+
+    with open(output, 'w') as f:
+        yaml.safe_dump({
+            'train': str(train_list.resolve()),
+            'val': split_dirs('valid'),
+            'test': split_dirs('test'),
+            'nc': data_config['nc'],
+            'names': data_config['names'],
+        }, f, sort_keys=False)
+
+    n_train = sum(split == 'train' for _, split, _ in images)
+    print(f"✂️  Thinned train: {len(kept)} of {n_train} images kept (≤{keep_per_group} per source frame)")
+    print(f"📄 Train with: --data {output}")
+    return str(output)
+
+
+def find_duplicates(datasets=DATASETS, max_distance=16, thin=None, report=None, workers=8):
+    """
+    Index all splits, group siblings, find near-duplicates and flag split leakage
+
+    Args:
+        datasets: Dataset directories to scan
+        max_distance: Maximum Hamming distance (of 256 bits) for near-duplicates
+        thin: Keep at most this many train siblings per source frame (None to skip)
+        report: Path for a JSON report (None to skip)
+        workers: Threads used for hashing
+
+    Returns:
+        Dict with sibling groups, near-duplicate pairs and leaks
+    """
+    images, hashes = build_index(datasets, workers=workers)
+    pairs = near_duplicates(hashes, max_distance)
+    groups = sibling_groups(images)
+
+    members = {}
+    for i, group in enumerate(groups):
+        members.setdefault(int(group), []).append(i)
+    multi = {g: m for g, m in members.items() if len(m) > 1}
+    group_leaks = {g: m for g, m in multi.items() if len({images[i][1] for i in m}) > 1}
+    pair_leaks = [(i, j, d) for i, j, d in pairs
+                  if images[i][1] != images[j][1] and groups[i] != groups[j]]
+
+    print("\n" + "="*50)
+    print("📊 DUPLICATE REPORT")
+    print("="*50)
+    print(f"Images: {len(images)}")
+    print(f"Source frames: {len(members)} ({len(multi)} with augmented siblings)")
+    print(f"Redundant siblings: {len(images) - len(members)}")
+    print(f"Near-duplicate pairs (≤{max_distance} bits): {len(pairs)}")
+    print(f"Sibling groups leaking across splits: {len(group_leaks)}")
+    for member in list(group_leaks.values())[:10]:
+        splits = sorted({images[i][1] for i in member})
+        print(f"  ⚠️  {source_stem(images[member[0]][2])}: {len(member)} images in {', '.join(splits)}")
+    if len(group_leaks) > 10:
+        print(f"  ... {len(group_leaks) - 10} more")
+    print(f"Near-duplicates leaking across splits: {len(pair_leaks)}")
+    for i, j, d in pair_leaks[:10]:
+        print(f"  ⚠️  {images[i][1]}/{images[i][2].name} ≈ {images[j][1]}/{images[j][2].name} ({d} bits)")
+    if len(pair_leaks) > 10:
+        print(f"  ... {len(pair_leaks) - 10} more")
+    print("="*50 + "\n")
+
+    result = {
+        'images': len(images),
+        'sibling_groups': {source_stem(images[m[0]][2]): [str(images[i][2]) for i in m] for m in multi.values()},
+        'near_duplicates': [(str(images[i][2]), str(images[j][2]), d) for i, j, d in pairs],
+        'group_leaks': [[f"{images[i][1]}:{images[i][2]}" for i in m] for m in group_leaks.values()],
+        'pair_leaks': [(f"{images[i][1]}:{images[i][2]}", f"{images[j][1]}:{images[j][2]}", d)
+                       for i, j, d in pair_leaks],
+    }
+
+    if report:
+        with open(report, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"💾 Report saved to: {report}")
+    if thin:
+        thin_train(images, groups, pairs, thin)
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find near-duplicates and split leakage in Fingerlings datasets")
+    parser.add_argument("--datasets", nargs="+", default=list(DATASETS), help="Dataset directories to scan")
+    parser.add_argument("--max-distance", type=int, default=16, help="Max Hamming distance (of 256 bits) for near-duplicates")
+    parser.add_argument("--thin", type=int, default=None,
+                        help="Write a thinned train list keeping this many siblings per source frame")
+    parser.add_argument("--report", default=None, help="Write a JSON report to this path")
+    parser.add_argument("--workers", type=int, default=8, help="Hashing threads")
+
+    args = parser.parse_args()
+
+    find_duplicates(args.datasets, args.max_distance, args.thin, args.report, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Export trained Fingerlings weights to ONNX / OpenVINO for CPU inference
+and check that the exported backends count the same as PyTorch
+"""
+import argparse
+import math
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from ultralytics import YOLO
+
+BACKENDS = ('torch', 'onnx', 'openvino')
+
+
+def exported_path(model_path, backend):
+    """Where Ultralytics writes the exported model for a backend"""
+    path = Path(model_path)
+    if backend == 'onnx':
+        return path.with_suffix('.onnx')
+    if backend == 'openvino':
+        return path.parent / f"{path.stem}_openvino_model"
+    return path
+
+
+def exported_input_shape(target, backend):
+    """
+    Input shape (batch, channels, height, width) of an exported model
+
+    Dynamic dimensions are None. Returns None if the model cannot be parsed;
+    raises ImportError if onnx is needed to read it and not installed.
+    """
+    target = Path(target)
+    if backend == 'onnx':
+        import onnx
+        from google.protobuf.message import DecodeError
+
+        try:
+            graph = onnx.load(str(target), load_external_data=False).graph
+            dims = graph.input[0].type.tensor_type.shape.dim
+        except (OSError, DecodeError, IndexError):
+            return None
+        return tuple(d.dim_value if d.HasField('dim_value') else None for d in dims)
+    if backend == 'openvino':
+        try:
+            xml = next(target.glob('*.xml'))
+            for layer in ET.parse(xml).getroot().iter('layer'):
+                if layer.get('type') == 'Parameter':
+                    shape = layer.find('data').get('shape')
+                    return tuple(int(d) if d.isdigit() else None for d in shape.split(','))
+        except (OSError, StopIteration, ET.ParseError, AttributeError):
+            return None
+    return None
+
+
+def export_serves(target, backend, imgsz=640, batch=1, dynamic=False):
+    """
+    True if an existing export can run the requested inference
+
+    A dynamic axis serves any size. With dynamic=True the caller sends
+    batches of varying size, so the batch axis must be dynamic; otherwise a
+    static batch equal to batch works too (e.g. a batch-1 export for serial
+    counting). If the shape cannot be checked (onnx not installed), the
+    export is kept.
+    """
+    try:
+        shape = exported_input_shape(target, backend)
+    except ImportError:
+        return True
+    if shape is None or len(shape) != 4:
+        return False
+    size = math.ceil(imgsz / 32) * 32  # Ultralytics rounds imgsz up to the stride
+    batch_ok = shape[0] is None if dynamic else shape[0] in (None, batch)
+    return batch_ok and all(d in (None, size) for d in shape[2:])
+
+
+def export_model(model_path, formats=('onnx', 'openvino'), imgsz=640, batch=1, dynamic=False):
+    """
+    Export best.pt to the given formats
+
+    Args:
+        model_path: Path to trained model weights (e.g. runs/detect/<name>/weights/best.pt)
+        formats: Export formats ('onnx', 'openvino')
+        imgsz: Input image size baked into the export
+        batch: Fixed batch size (ignored when dynamic=True)
+        dynamic: Export with dynamic batch and image size
+
+    Returns:
+        Dict mapping format to exported path
+    """
+    model = YOLO(model_path)
+    exported = {}
+    for fmt in formats:
+        print(f"📦 Exporting {model_path} → {fmt} "
+              f"(batch={'dynamic' if dynamic else batch}, imgsz={imgsz})")
+        exported[fmt] = model.export(format=fmt, imgsz=imgsz, batch=batch, dynamic=dynamic)
+    return exported
+
+
+def resolve_backend(model_path, backend='torch', imgsz=640, batch=1, dynamic=True):
+    """
+    Return the weights path to load for a backend
+
+    The export is created next to best.pt on first use and refreshed
+    whenever best.pt is newer than the exported model, or when its input
+    shape cannot serve batch, imgsz and dynamic (e.g. a static batch-1
+    export from the CLI when batched inference needs a dynamic batch axis).
+
+    Args:
+        model_path: Path to trained best.pt
+        backend: 'torch', 'onnx' or 'openvino'
+        imgsz: Inference image size
+        batch: Images per forward pass
+        dynamic: The caller sends batches of varying size
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+    if backend == 'torch':
+        return str(model_path)
+
+    target = exported_path(model_path, backend)
+    if (not target.exists() or target.stat().st_mtime < Path(model_path).stat().st_mtime
+            or not export_serves(target, backend, imgsz, batch, dynamic)):
+        export_model(model_path, [backend], imgsz, batch, dynamic)
+    return str(target)
+
+
+def check_parity(model_path, images_dir="modules/fingerlings/dataset/valid/images",
+                 backends=('onnx', 'openvino'), conf=0.25, imgsz=640, device=None, batch=1, dynamic=False):
+    """
+    Compare per-image counts of exported backends against the torch path
+
+    batch and dynamic are those of the export being checked, so an existing
+    export that can run serial counting is checked as it is.
+
+    Returns:
+        Dict mapping backend to {'exact': ratio, 'mae': float, 'max_diff': int}
+    """
+    try:
+        from .test import iter_counts
+    except ImportError:
+        from test import iter_counts
+
+    print(f"🔍 Count parity on: {images_dir}")
+    reference = {path: count for path, count, _, _ in iter_counts(model_path, images_dir, conf, imgsz, device)}
+    if not reference:
+        print("❌ No images found")
+        return {}
+
+    report = {}
+    for backend in backends:
+        weights = resolve_backend(model_path, backend, imgsz, batch, dynamic)
+        counts = {path: count for path, count, _, _ in iter_counts(weights, images_dir, conf, imgsz, device)}
+        diffs = [abs(counts[path] - ref) for path, ref in reference.items()]
+        report[backend] = {
+            'exact': sum(d == 0 for d in diffs) / len(diffs),
+            'mae': sum(diffs) / len(diffs),
+            'max_diff': max(diffs),
+        }
+
+    print("\n" + "="*50)
+    print("📊 BACKEND COUNT PARITY (vs torch)")
+    print("="*50)
+    print(f"Images: {len(reference)}")
+    for backend, stats in report.items():
+        print(f"{backend:>9}: exact {stats['exact']:.1%} | MAE {stats['mae']:.3f} | max diff {stats['max_diff']}")
+    print("="*50 + "\n")
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export Fingerlings weights for CPU inference")
+    parser.add_argument("--model", required=True, help="Path to trained best.pt")
+    parser.add_argument("--formats", nargs="+", default=["onnx", "openvino"], choices=BACKENDS[1:],
+                        help="Export formats")
+    parser.add_argument("--imgsz", type=int, default=640, help="Image size")
+    parser.add_argument("--batch", type=int, default=1, help="Fixed batch size")
+    parser.add_argument("--dynamic", action="store_true", help="Dynamic batch and image size")
+    parser.add_argument("--check-parity", action="store_true", help="Compare counts against torch after export")
+    parser.add_argument("--images-dir", default="modules/fingerlings/dataset/valid/images",
+                        help="Images for the parity check")
+    parser.add_argument("--conf", type=float, default=0.25, help="Confidence threshold")
+
+    args = parser.parse_args()
+
+    export_model(args.model, args.formats, args.imgsz, args.batch, args.dynamic)
+    if args.check_parity:
+        check_parity(args.model, args.images_dir, args.formats, args.conf, args.imgsz,
+                     batch=args.batch, dynamic=args.dynamic)
+
+
+if __name__ == "__main__":
+    main()
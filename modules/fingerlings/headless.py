@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Headless training monitor for Fingerlings
+Follows results.csv on servers without a display: wakes up on file-change
+events, prints a live terminal summary and can write PNG or HTML snapshots
+"""
+import argparse
+import base64
+import ctypes
+import ctypes.util
+import io
+import math
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+
+try:
+    from .monitor import CsvTail, summary_text
+except ImportError:
+    from monitor import CsvTail, summary_text
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_IGNORED = 0x8000
+_EVENT = struct.Struct('iIII')
+
+POLL_INTERVAL = 1.0  # Seconds between stat() calls where inotify is unavailable
+
+
+class FileWatcher:
+    """
+    Wait for changes to files in one directory
+
+    On Linux this blocks in inotify (through libc, no extra dependency), so
+    waiting costs no CPU and a change wakes the caller within milliseconds.
+    Elsewhere, or if inotify cannot be set up, it falls back to comparing
+    the files' (mtime, size) every poll seconds. The directory may not exist
+    yet (training still starting); it is watched as soon as it appears.
+    """
+
+    def __init__(self, directory, names, poll=POLL_INTERVAL):
+        self.directory = Path(directory)
+        self.names = set(names)
+        self.poll = poll
+        self.fd = None
+        self.wd = None
+        self.stats = None
+        self.libc = None
+        if sys.platform.startswith('linux'):
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+                fd = libc.inotify_init1(os.O_CLOEXEC)
+                if fd >= 0:
+                    self.libc, self.fd = libc, fd
+            except (OSError, AttributeError):
+                pass
+        self._watch()
+
+    @property
+    def mode(self):
+        return 'inotify' if self.fd is not None else f'polling every {self.poll:g}s'
+
+    def _watch(self):
+        """Add the inotify watch once the directory exists"""
+        if self.fd is None or self.wd is not None or not self.directory.is_dir():
+            return
+        # Ultralytics opens results.csv, appends a row and closes it, so a
+        # close is one complete row and one wake-up (a write can be several)
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(self.directory), mask)
+        if wd >= 0:
+            self.wd = wd
+
+    def _stat(self):
+        stats = {}
+        for name in self.names:
+            try:
+                stat = os.stat(self.directory / name)
+                stats[name] = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+            except OSError:
+                pass
+        return stats
+
+    def wait(self, timeout=None):
+        """
+        Block until a watched file changes or timeout seconds pass
+
+        Returns:
+            Set of names of the changed files (empty on timeout)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+
+            if self.fd is not None and self.wd is not None:
+                ready, _, _ = select.select([self.fd], [], [], remaining)
+                if not ready:
+                    return set()
+                changed = self._read_events()
+                if changed:
+                    return changed
+                continue
+
+            # Polling, or waiting for the directory to appear
+            step = self.poll if remaining is None else min(self.poll, remaining)
+            time.sleep(step)
+            self._watch()
+            stats = self._stat()
+            changed = {name for name in self.names if stats.get(name) != (self.stats or {}).get(name)}
+            self.stats = stats
+            if changed and stats:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+
+    def _read_events(self):
+        data = os.read(self.fd, 64 * 1024)
+        changed = set()
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            _, mask, _, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b'\0').decode(errors='replace')
+            offset += _EVENT.size + length
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                self.wd = None  # Directory went away; re-watch once it is back
+            elif name in self.names:
+                changed.add(name)
+        return changed
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class HeadlessMonitor:
+    """
+    Terminal summary and optional snapshots of a training run
+
+    Only rows appended since the last event are parsed (CsvTail). Charts are
+    only rendered (with the Agg backend) when a snapshot is written, at most
+    every snapshot_every seconds and only if new rows arrived.
+    """
+
+    def __init__(self, results_path, snapshot=None, snapshot_every=60):
+        self.results_path = Path(results_path)
+        self.csv_path = self.results_path / "results.csv"
+        self.tail = CsvTail(self.csv_path)
+        self.snapshot = Path(snapshot) if snapshot else None
+        self.snapshot_every = snapshot_every
+        self.rows = []
+        self.best = None
+        self.last_snapshot = 0.0
+        self.snapshot_pending = False
+        self.plot = None
+        self.tty = sys.stdout.isatty()
+
+    def update(self):
+        """Parse new rows; True if there were any"""
+        rows, reset = self.tail.read()
+        if reset:
+            self.rows, self.best = [], None
+            print("🔄 results.csv was replaced, starting over")
+        if not rows:
+            return False
+        for row in rows:
+            self.rows.append(row)
+            map50 = row.get('metrics/mAP50(B)', math.nan)
+            if math.isfinite(map50) and (self.best is None or map50 > self.best[1]):
+                self.best = (int(row['epoch']), map50)
+        self.print_summary(rows)
+        self.snapshot_pending = self.snapshot is not None
+        return True
+
+    def print_summary(self, new_rows):
+        latest = self.rows[-1]
+        if not self.tty:
+            # Logs: one line per epoch
+            for row in new_rows:
+                print(f"epoch {int(row['epoch'])}: "
+                      f"mAP50 {row.get('metrics/mAP50(B)', math.nan):.4f}  "
+                      f"mAP50-95 {row.get('metrics/mAP50-95(B)', math.nan):.4f}  "
+                      f"box {row.get('train/box_loss', math.nan):.4f}  "
+                      f"cls {row.get('train/cls_loss', math.nan):.4f}", flush=True)
+            return
+
+        text = summary_text(latest)
+        if self.best:
+            text += f"\n🏆 Best mAP50: {self.best[1]:.4f} (epoch {self.best[0]})\n"
+        if 'time' in latest and math.isfinite(latest['time']):
+            text += f"⏱️  Elapsed: {latest['time'] / 60:.1f} min\n"
+        text += f"\nUpdated {time.strftime('%H:%M:%S')} · {self.csv_path}\n"
+        # Redraw in place: cursor home + clear screen
+        sys.stdout.write("\x1b[H\x1b[2J" + text)
+        sys.stdout.flush()
+
+    def snapshot_due(self):
+        """Seconds until the pending snapshot may be written (None if none pending)"""
+        if not self.snapshot_pending:
+            return None
+        return max(self.last_snapshot + self.snapshot_every - time.monotonic(), 0)
+
+    def write_snapshot(self):
+        """Render the charts and write them as PNG or HTML (atomically)"""
+        import matplotlib
+        matplotlib.use('Agg')
+        try:
+            from .monitor import TrainingMonitor
+        except ImportError:
+            from monitor import TrainingMonitor
+
+        if self.plot is None:
+            self.plot = TrainingMonitor(self.results_path)
+        self.plot.update()
+
+        # Animated artists are left out of savefig; draw them like any other
+        artists = self.plot._artists()
+        for artist in artists:
+            artist.set_animated(False)
+        buffer = io.BytesIO()
+        self.plot.fig.savefig(buffer, format='png', dpi=100)
+        for artist in artists:
+            artist.set_animated(True)
+
+        if self.snapshot.suffix.lower() in ('.html', '.htm'):
+            latest = self.rows[-1]
+            refresh = max(int(self.snapshot_every), 5)
+            data = (
+                "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+                f"<meta http-equiv=\"refresh\" content=\"{refresh}\">"
+                f"<title>Epoch {int(latest['epoch'])} · {self.results_path.name}</title></head>\n"
+                f"<body style=\"font-family: monospace\">\n"
+                f"<img src=\"data:image/png;base64,{base64.b64encode(buffer.getvalue()).decode()}\" "
+                f"style=\"max-width: 100%\">\n"
+                f"<p>Updated {time.strftime('%Y-%m-%d %H:%M:%S')}</p>\n</body></html>\n"
+            ).encode()
+        else:
+            data = buffer.getvalue()
+
+        self.snapshot.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.snapshot.with_name(self.snapshot.name + '.tmp')
+        tmp.write_bytes(data)
+        os.replace(tmp, self.snapshot)
+        self.last_snapshot = time.monotonic()
+        self.snapshot_pending = False
+
+    def run(self, poll=POLL_INTERVAL):
+        """Follow the run until interrupted"""
+        watcher = FileWatcher(self.results_path, ['results.csv'], poll)
+        print(f"🔍 Monitoring training at: {self.results_path} ({watcher.mode})")
+        if self.snapshot:
+            print(f"🖼️  Snapshots: {self.snapshot} (at most every {self.snapshot_every:g}s)")
+        print("Press Ctrl+C to stop\n")
+
+        try:
+            self.update()
+            while True:
+                if self.snapshot_due() == 0:
+                    self.write_snapshot()
+                changed = watcher.wait(self.snapshot_due())
+                if changed:
+                    self.update()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            watcher.close()
+            if self.snapshot_pending:
+                self.write_snapshot()
+        print("\n👋 Monitor stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monitor YOLO training progress without a display")
+    parser.add_argument("--path", required=True, help="Path to training results directory")
+    parser.add_argument("--snapshot", default=None, help="Write charts to this .png or .html file")
+    parser.add_argument("--snapshot-every", type=float, default=60, help="Minimum seconds between snapshots")
+    parser.add_argument("--poll", type=float, default=POLL_INTERVAL,
+                        help="Seconds between checks where inotify is unavailable")
+
+    args = parser.parse_args()
+
+    HeadlessMonitor(args.path, args.snapshot, args.snapshot_every).run(args.poll)
+
+
+if __name__ == "__main__":
+    main()
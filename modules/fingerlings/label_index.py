@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Columnar label index and dataset statistics for Fingerlings
+Every label file is parsed once into flat NumPy columns (image id, class,
+xywh); statistics for any imgsz are then computed from the arrays directly
+"""
+import argparse
+import time
+from pathlib import Path
+import numpy as np
+from PIL import Image
+
+DATASETS = ("modules/fingerlings/dataset", "modules/fingerlings/dataset-v2")
+INDEX_PATH = "modules/fingerlings/cache/label_index.npz"
+SPLITS = ('train', 'valid', 'test')
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png')
+MAX_DET = 300  # Ultralytics predict/val default
+
+# Box size buckets: sqrt(box area) in pixels at the chosen imgsz
+SIZE_BUCKETS = (
+    ('tiny', 0, 8),
+    ('small', 8, 16),
+    ('medium', 16, 32),
+    ('large', 32, float('inf')),
+)
+
+# Columns of the index; image columns have one row per image, object columns one row per label row
+IMAGE_COLUMNS = ('paths', 'splits', 'widths', 'heights', 'mtimes', 'sizes')
+OBJECT_COLUMNS = ('image_ids', 'classes', 'xywh')
+
+
+def parse_labels(label_path):
+    """
+    Parse one YOLO label file
+
+    Polygon rows (cls x1 y1 x2 y2 ...) are reduced to their bounding box, so
+    box and segmentation exports end up in the same xywh columns.
+
+    Returns:
+        (int16 classes (N,), float32 xywh (N, 4)), normalized to the image
+    """
+    classes, boxes = [], []
+    with open(label_path, 'r') as f:
+        for line in f:
+            values = line.split()
+            if len(values) < 5:
+                continue
+            coords = np.array(values[1:], dtype=np.float32)
+            if len(coords) == 4:
+                boxes.append(coords)
+            else:
+                xs, ys = coords[0::2], coords[1::2]
+                x0, y0, x1, y1 = xs.min(), ys.min(), xs.max(), ys.max()
+                boxes.append(((x0 + x1) / 2, (y0 + y1) / 2, x1 - x0, y1 - y0))
+            classes.append(int(values[0]))
+    return np.array(classes, dtype=np.int16), np.array(boxes, dtype=np.float32).reshape(-1, 4)
+
+
+def list_images(datasets=DATASETS, splits=SPLITS):
+    """(split, image path, label path) for every image in the given datasets"""
+    images = []
+    for dataset in datasets:
+        for split in splits:
+            for path in sorted((Path(dataset) / split / 'images').glob('*')):
+                if path.suffix.lower() in IMAGE_SUFFIXES:
+                    images.append((split, path, Path(dataset) / split / 'labels' / f"{path.stem}.txt"))
+    return images
+
+
+def load_index(index_path=INDEX_PATH):
+    """Load the index as a dict of arrays (empty columns if there is none yet)"""
+    if Path(index_path).exists():
+        with np.load(index_path, allow_pickle=False) as data:
+            return {key: data[key] for key in data.files}
+    return {
+        'paths': np.array([], dtype=str), 'splits': np.array([], dtype=str),
+        'widths': np.zeros(0, np.int32), 'heights': np.zeros(0, np.int32),
+        'mtimes': np.zeros(0, np.int64), 'sizes': np.zeros(0, np.int64),
+        'image_ids': np.zeros(0, np.int32), 'classes': np.zeros(0, np.int16),
+        'xywh': np.zeros((0, 4), np.float32),
+    }
+
+
+def update_index(datasets=DATASETS, index_path=INDEX_PATH):
+    """
+    Bring the index up to date with the label files on disk
+
+    Images whose label file has the same mtime and size as in the index keep
+    their rows; new or changed ones are parsed, and removed ones are dropped.
+    The mtime of a missing label file is recorded as -1 (image without
+    objects).
+
+    Returns:
+        The index dict
+    """
+    old = load_index(index_path)
+    old_rows = {path: i for i, path in enumerate(old['paths'])}
+    images = list_images(datasets)
+
+    stats = []
+    for _, _, label_path in images:
+        try:
+            stat = label_path.stat()
+            stats.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            stats.append((-1, 0))
+
+    # Objects of unchanged images, grouped by old image id
+    order = np.argsort(old['image_ids'], kind='stable')
+    bounds = np.searchsorted(old['image_ids'][order], np.arange(len(old['paths']) + 1))
+
+    columns = {key: [] for key in IMAGE_COLUMNS + OBJECT_COLUMNS}
+    parsed = 0
+    for image_id, ((split, image_path, label_path), (mtime, size)) in enumerate(zip(images, stats)):
+        key = str(image_path)
+        row = old_rows.get(key)
+        if row is not None and old['mtimes'][row] == mtime and old['sizes'][row] == size:
+            width, height = old['widths'][row], old['heights'][row]
+            rows = order[bounds[row]:bounds[row + 1]]
+            classes, xywh = old['classes'][rows], old['xywh'][rows]
+        else:
+            with Image.open(image_path) as im:  # Header only
+                width, height = im.size
+            if mtime >= 0:
+                classes, xywh = parse_labels(label_path)
+            else:
+                classes, xywh = np.zeros(0, np.int16), np.zeros((0, 4), np.float32)
+            parsed += 1
+
+        for name, value in zip(IMAGE_COLUMNS, (key, split, width, height, mtime, size)):
+            columns[name].append(value)
+        columns['image_ids'].append(np.full(len(classes), image_id, dtype=np.int32))
+        columns['classes'].append(classes)
+        columns['xywh'].append(xywh)
+
+    index = {
+        'paths': np.array(columns['paths'], dtype=str),
+        'splits': np.array(columns['splits'], dtype=str),
+        'widths': np.array(columns['widths'], dtype=np.int32),
+        'heights': np.array(columns['heights'], dtype=np.int32),
+        'mtimes': np.array(columns['mtimes'], dtype=np.int64),
+        'sizes': np.array(columns['sizes'], dtype=np.int64),
+        'image_ids': np.concatenate(columns['image_ids']) if images else np.zeros(0, np.int32),
+        'classes': np.concatenate(columns['classes']) if images else np.zeros(0, np.int16),
+        'xywh': np.concatenate(columns['xywh']) if images else np.zeros((0, 4), np.float32),
+    }
+
+    removed = len(set(old_rows) - set(index['paths']))
+    if parsed or removed:
+        Path(index_path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez(index_path, **index)
+    print(f"🗂️  Label index: {len(images)} images, {len(index['classes'])} objects "
+          f"({parsed} parsed, {len(images) - parsed} unchanged, {removed} removed)")
+    return index
+
+
+def dataset_stats(index, imgsz=640, max_det=MAX_DET, splits=None):
+    """
+    Object-density and box-size statistics at imgsz, computed from the index
+
+    Box sizes are in pixels after the long side is resized to imgsz, which is
+    what the model sees at that inference/training size.
+
+    Args:
+        index: Index dict from update_index
+        imgsz: Image size to express box sizes in
+        max_det: Flag images with more objects than this
+        splits: Only include these splits (None for all)
+
+    Returns:
+        Dict with per-image counts, box sizes and the images over max_det
+    """
+    keep_images = np.isin(index['splits'], splits) if splits else np.ones(len(index['paths']), bool)
+    keep_objects = keep_images[index['image_ids']]
+    image_ids = index['image_ids'][keep_objects]
+    xywh = index['xywh'][keep_objects]
+
+    counts = np.bincount(image_ids, minlength=len(index['paths']))[keep_images]
+
+    # Letterbox scale of each object's image at imgsz
+    scale = imgsz / np.maximum(index['widths'], index['heights']).astype(np.float32)
+    w_px = xywh[:, 2] * index['widths'][image_ids] * scale[image_ids]
+    h_px = xywh[:, 3] * index['heights'][image_ids] * scale[image_ids]
+    size_px = np.sqrt(w_px * h_px)
+
+    over = np.nonzero(counts > max_det)[0]
+    paths = index['paths'][keep_images]
+
+    return {
+        'imgsz': imgsz,
+        'images': int(keep_images.sum()),
+        'objects': int(len(image_ids)),
+        'counts': counts,
+        'width_px': w_px,
+        'height_px': h_px,
+        'size_px': size_px,
+        'buckets': {name: int(((size_px >= lo) & (size_px < hi)).sum()) for name, lo, hi in SIZE_BUCKETS},
+        'max_det': max_det,
+        'over_max_det': sorted(zip(paths[over].tolist(), counts[over].tolist()), key=lambda x: -x[1]),
+    }
+
+
+def print_stats(stats):
+    """Print the statistics summary"""
+    counts, size = stats['counts'], stats['size_px']
+
+    def pct(values, q):
+        return float(np.percentile(values, q)) if len(values) else 0.0
+
+    print("\n" + "="*50)
+    print(f"📊 DATASET STATISTICS (imgsz {stats['imgsz']})")
+    print("="*50)
+    print(f"Images: {stats['images']}")
+    print(f"Objects: {stats['objects']}")
+    print(f"Objects per image: mean {counts.mean() if len(counts) else 0:.1f}, median {pct(counts, 50):.0f}, "
+          f"p95 {pct(counts, 95):.0f}, max {counts.max() if len(counts) else 0}")
+    print(f"Empty images: {int((counts == 0).sum())}")
+    print(f"Box size (px): median {pct(size, 50):.1f}, p5 {pct(size, 5):.1f}, p95 {pct(size, 95):.1f}")
+    for name, lo, hi in SIZE_BUCKETS:
+        n = stats['buckets'][name]
+        share = n / stats['objects'] * 100 if stats['objects'] else 0
+        label = f"{lo}-{hi:g}px" if hi != float('inf') else f"≥{lo}px"
+        print(f"  {name:7} {label:9} {n:7d} ({share:5.1f}%)")
+    print(f"Images over max_det={stats['max_det']}: {len(stats['over_max_det'])}")
+    for path, count in stats['over_max_det'][:10]:
+        print(f"  ⚠️  {Path(path).name}: {count} objects")
+    if len(stats['over_max_det']) > 10:
+        print(f"  ... {len(stats['over_max_det']) - 10} more")
+    print("="*50 + "\n")
+
+
+def plot_stats(stats, output):
+    """Save histograms of objects per image and box sizes"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 4.5))
+    ax1.hist(stats['counts'], bins=50, color='tab:blue')
+    ax1.axvline(stats['max_det'], color='tab:red', linestyle='--', label=f"max_det={stats['max_det']}")
+    ax1.set_xlabel('Objects per image')
+    ax1.set_ylabel('Images')
+    ax1.set_title('Object density')
+    ax1.legend()
+
+    sizes = stats['size_px'][stats['size_px'] > 0]
+    bins = np.logspace(np.log10(max(sizes.min(), 0.5)), np.log10(sizes.max() + 1), 50) if len(sizes) else 10
+    ax2.hist(sizes, bins=bins, color='tab:green')
+    ax2.set_xscale('log')
+    for _, lo, _ in SIZE_BUCKETS[1:]:
+        ax2.axvline(lo, color='gray', linestyle=':')
+    ax2.set_xlabel(f"Box size sqrt(w*h) in px at imgsz {stats['imgsz']}")
+    ax2.set_ylabel('Objects')
+    ax2.set_title('Box sizes')
+
+    fig.tight_layout()
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    fig.savefig(output, dpi=120)
+    plt.close(fig)
+    print(f"💾 Histograms saved to: {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fingerlings label index and dataset statistics")
+    parser.add_argument("--datasets", nargs="+", default=list(DATASETS), help="Dataset directories to index")
+    parser.add_argument("--index", default=INDEX_PATH, help="Index file (.npz)")
+    parser.add_argument("--imgsz", type=int, nargs="+", default=[640], help="Image size(s) to report box sizes at")
+    parser.add_argument("--max-det", type=int, default=MAX_DET, help="Flag images with more objects than this")
+    parser.add_argument("--splits", nargs="+", default=None, help="Only these splits (default: all)")
+    parser.add_argument("--plot", default=None, help="Save histograms to this PNG (first --imgsz)")
+
+    args = parser.parse_args()
+
+    index = update_index(args.datasets, args.index)
+    for imgsz in args.imgsz:
+        start = time.perf_counter()
+        stats = dataset_stats(index, imgsz, args.max_det, args.splits)
+        elapsed = (time.perf_counter() - start) * 1000
+        print_stats(stats)
+        print(f"⏱️  Computed in {elapsed:.1f} ms")
+    if args.plot:
+        plot_stats(dataset_stats(index, args.imgsz[0], args.max_det, args.splits), args.plot)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,67 +1,221 @@
 #!/usr/bin/env python3
 """
 Merge dataset and dataset-v2 into a combined dataset
+
+Images are content-addressed: every unique image is stored once (hard-linked
+to its source when possible) and a manifest records where each merged file
+came from, so re-runs only process new or changed source files.
 """
+import argparse
+import hashlib
+import json
+import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-def merge_datasets():
-    """Merge two datasets into dataset-merged"""
-    
-    # Paths
-    dataset1 = Path("modules/fingerlings/dataset")
-    dataset2 = Path("modules/fingerlings/dataset-v2")
-    merged = Path("modules/fingerlings/dataset-merged")
-    
+SPLITS = ('train', 'valid', 'test')
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png')
+MANIFEST = 'manifest.json'
+
+
+def hash_file(path, chunk_size=1 << 20):
+    """BLAKE2b digest of a file's bytes"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def place_file(src, dst, mode='link'):
+    """
+    Put src at dst without duplicating data where possible
+
+    Returns:
+        'link' or 'copy', whichever was used
+    """
+    if dst.exists() or dst.is_symlink():
+        dst.unlink()
+    if mode == 'link':
+        try:
+            os.link(src, dst)
+            return 'link'
+        except OSError:
+            pass  # Different filesystem (or no hard-link support)
+    shutil.copy2(src, dst)
+    return 'copy'
+
+
+def label_for(img_path):
+    """YOLO label file of an image (split/images/x.jpg → split/labels/x.txt)"""
+    return img_path.parent.parent / 'labels' / f"{img_path.stem}.txt"
+
+
+def label_stat(label_path):
+    """[size, mtime_ns] of a label file, or None if there is none"""
+    try:
+        stat = label_path.stat()
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def load_manifest(merged):
+    path = Path(merged) / MANIFEST
+    if path.exists():
+        with open(path, 'r') as f:
+            return json.load(f)
+    return {'sources': {}, 'files': {}}
+
+
+def merge_datasets(sources=("modules/fingerlings/dataset", "modules/fingerlings/dataset-v2"),
+                   merged="modules/fingerlings/dataset-merged", workers=8, mode='link'):
+    """
+    Merge datasets into `merged`, storing each unique image once
+
+    - Identical images (same content hash) within a split are merged once
+    - Name collisions with different content get a hash suffix instead of
+      a prefix (name_<hash8>.jpg), so every merged name is stable
+    - Images are hard-linked to their source (mode='link') and only copied,
+      in parallel, when linking is impossible; labels are always copied so
+      editing a merged label never changes the source dataset
+    - Source images already in the manifest whose image and label still have
+      the same size and mtime are skipped; merged files whose source image
+      or label changed or disappeared are removed and merged again
+    - Skipped duplicates are remembered with the merged file, so when its
+      source goes away one of them takes its place
+
+    Args:
+        sources: Dataset directories, in priority order
+        merged: Output directory
+        workers: Threads for hashing and copying
+        mode: 'link' (hard links, copy as fallback) or 'copy'
+
+    Returns:
+        The manifest dict
+    """
+    merged = Path(merged)
+    manifest = load_manifest(merged)
+    known = manifest['sources']
+    files = manifest['files']
+
     print("🔄 Merging datasets...")
-    print(f"📁 Dataset 1: {dataset1}")
-    print(f"📁 Dataset 2: {dataset2}")
+    for i, source in enumerate(sources, 1):
+        print(f"📁 Dataset {i}: {source}")
     print(f"📁 Output: {merged}")
-    
-    # Create merged directory structure
-    for split in ['train', 'valid', 'test']:
+
+    # 1. Find source images that are new or changed since the last run
+    scanned, pending = [], []
+    for source in sources:
+        for split in SPLITS:
+            for img_path in sorted((Path(source) / split / 'images').glob('*')):
+                if img_path.suffix.lower() not in IMAGE_SUFFIXES:
+                    continue
+                stat = img_path.stat()
+                key = str(img_path)
+                scanned.append(key)
+                entry = known.get(key)
+                if (entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns
+                        and entry.get('label') == label_stat(label_for(img_path))):
+                    continue
+                pending.append((source, split, img_path, stat))
+
+    # 2. Drop merged files whose source is gone or changed
+    current = set(scanned)
+    changed = {str(img_path) for _, _, img_path, _ in pending}
+    for key in set(known) - current:
+        del known[key]
+    removed = 0
+    for key, entry in list(files.items()):
+        # Duplicates that are gone or changed are no longer duplicates of this file
+        duplicates = [dup for dup in entry.get('duplicates', []) if dup in current and dup not in changed]
+        entry['duplicates'] = duplicates
+        if entry['source'] not in current or entry['source'] in changed:
+            split, name = key.split('/', 1)
+            for path in (merged / split / 'images' / name, merged / split / 'labels' / f"{Path(name).stem}.txt"):
+                if path.exists():
+                    path.unlink()
+            known.pop(entry['source'], None)
+            del files[key]
+            removed += 1
+            # Merge the skipped duplicates again, the first one takes the place of the source
+            for dup in duplicates:
+                img_path = Path(dup)
+                pending.append((str(img_path.parents[2]), entry['split'], img_path, img_path.stat()))
+                changed.add(dup)
+
+    print(f"\n🔍 {len(scanned)} source images, {len(pending)} new or changed, {removed} removed")
+
+    # 3. Hash new files in parallel (hashlib releases the GIL)
+    with ThreadPoolExecutor(workers) as pool:
+        hashes = list(pool.map(lambda item: hash_file(item[2]), pending))
+
+    # 4. Resolve names and duplicates (serial, so the result is deterministic)
+    by_hash = {(entry['split'], entry['hash']): key for key, entry in files.items()}
+    jobs = []
+    duplicates = 0
+    for (source, split, img_path, stat), digest in zip(pending, hashes):
+        label_path = label_for(img_path)
+        known[str(img_path)] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': digest,
+                                'label': label_stat(label_path)}
+        if (split, digest) in by_hash:
+            files[by_hash[(split, digest)]]['duplicates'].append(str(img_path))
+            duplicates += 1
+            continue
+
+        key = f"{split}/{img_path.name}"
+        if key in files and files[key]['hash'] != digest:
+            key = f"{split}/{img_path.stem}_{digest[:8]}{img_path.suffix}"
+
+        files[key] = {
+            'split': split,
+            'hash': digest,
+            'source': str(img_path),
+            'label': str(label_path) if label_path.exists() else None,
+            'duplicates': [],
+        }
+        by_hash[(split, digest)] = key
+        jobs.append(key)
+
+    # 5. Remove files the manifest does not know (e.g. v2_* copies from older merges)
+    untracked = 0
+    for split in SPLITS:
         (merged / split / 'images').mkdir(parents=True, exist_ok=True)
         (merged / split / 'labels').mkdir(parents=True, exist_ok=True)
-    
-    # Copy files from both datasets
-    for split in ['train', 'valid', 'test']:
-        print(f"\n📦 Merging {split} split...")
-        
-        count = 0
-        # Copy from dataset 1
-        for img_path in (dataset1 / split / 'images').glob('*'):
-            if img_path.suffix.lower() in ['.jpg', '.jpeg', '.png']:
-                shutil.copy2(img_path, merged / split / 'images' / img_path.name)
-                
-                # Copy corresponding label
-                label_path = dataset1 / split / 'labels' / f"{img_path.stem}.txt"
-                if label_path.exists():
-                    shutil.copy2(label_path, merged / split / 'labels' / label_path.name)
-                count += 1
-        
-        print(f"  ✅ Copied {count} images from dataset 1")
-        
-        # Copy from dataset 2
-        count2 = 0
-        for img_path in (dataset2 / split / 'images').glob('*'):
-            if img_path.suffix.lower() in ['.jpg', '.jpeg', '.png']:
-                # Rename if conflict
-                new_name = img_path.name
-                if (merged / split / 'images' / new_name).exists():
-                    new_name = f"v2_{img_path.name}"
-                
-                shutil.copy2(img_path, merged / split / 'images' / new_name)
-                
-                # Copy corresponding label
-                label_path = dataset2 / split / 'labels' / f"{img_path.stem}.txt"
-                if label_path.exists():
-                    label_name = f"{Path(new_name).stem}.txt"
-                    shutil.copy2(label_path, merged / split / 'labels' / label_name)
-                count2 += 1
-        
-        print(f"  ✅ Copied {count2} images from dataset 2")
-        print(f"  📊 Total: {count + count2} images")
-    
+        tracked = {Path(key).name for key in files if key.startswith(f"{split}/")}
+        tracked_labels = {f"{Path(name).stem}.txt" for name in tracked}
+        for path in (merged / split / 'images').iterdir():
+            if path.name not in tracked:
+                path.unlink()
+                untracked += 1
+        for path in (merged / split / 'labels').iterdir():
+            if path.name not in tracked_labels:
+                path.unlink()
+    if untracked:
+        print(f"🧹 Removed {untracked} untracked images from {merged}")
+
+    # 6. Link (or copy in parallel) the new files
+    def place(key):
+        entry = files[key]
+        split, name = key.split('/', 1)
+        used = place_file(Path(entry['source']), merged / split / 'images' / name, mode)
+        if entry['label']:
+            place_file(Path(entry['label']), merged / split / 'labels' / f"{Path(name).stem}.txt", 'copy')
+        return used
+
+    with ThreadPoolExecutor(workers) as pool:
+        used = list(pool.map(place, jobs))
+
+    for split in SPLITS:
+        count = sum(entry['split'] == split for entry in files.values())
+        print(f"  📦 {split}: {count} images")
+    print(f"  🔗 {used.count('link')} linked, 📄 {used.count('copy')} copied, "
+          f"♻️  {duplicates} duplicate images skipped")
+
+    with open(merged / MANIFEST, 'w') as f:
+        json.dump(manifest, f, indent=1)
+
     # Create data.yaml
     yaml_content = """train: train/images
 val: valid/images
@@ -70,14 +224,30 @@ test: test/images
 nc: 1
 names: ['fingerling']
 """
-    
+
     with open(merged / 'data.yaml', 'w') as f:
         f.write(yaml_content)
-    
+
     print("\n✅ Merge completed!")
     print(f"📁 Merged dataset: {merged}")
     print(f"📄 Config file: {merged / 'data.yaml'}")
+    print(f"🧾 Manifest: {merged / MANIFEST}")
+
+    return manifest
 
-if __name__ == "__main__":
-    merge_datasets()
 
+def main():
+    parser = argparse.ArgumentParser(description="Merge fingerlings datasets (content-addressed, hard-linked)")
+    parser.add_argument("--sources", nargs="+", default=["modules/fingerlings/dataset", "modules/fingerlings/dataset-v2"],
+                        help="Dataset directories to merge, in priority order")
+    parser.add_argument("--output", default="modules/fingerlings/dataset-merged", help="Merged dataset directory")
+    parser.add_argument("--workers", type=int, default=8, help="Threads for hashing and copying")
+    parser.add_argument("--copy", action="store_true", help="Copy images instead of hard-linking them")
+
+    args = parser.parse_args()
+
+    merge_datasets(args.sources, args.output, args.workers, 'copy' if args.copy else 'link')
+
+
+if __name__ == "__main__":
+    main()
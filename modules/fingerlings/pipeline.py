@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Pipelined executor for Fingerlings batch counting
+Overlaps image decode, model inference and annotation/writes
+"""
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+_DONE = object()
+
+
+class Pipeline:
+    """
+    Bounded producer/consumer pipeline: decode → infer → annotate/write
+
+    - decode runs in a thread pool (cv2 releases the GIL while decoding)
+    - infer runs on a single thread, so the model is never shared
+    - annotate/write runs in a second thread pool
+
+    Every hand-off goes through a queue of at most queue_depth items, so a
+    slow stage blocks the stages in front of it instead of buffering the
+    whole folder in memory.
+    """
+
+    def __init__(self, decode, infer, write, decode_workers=4, write_workers=2,
+                 queue_depth=16, batch_size=1):
+        """
+        Args:
+            decode: fn(item) -> decoded item, or None to skip the item
+            infer: fn(list of decoded items) -> list of inferred items
+            write: fn(inferred item) -> final result
+            decode_workers: Threads used for decoding
+            write_workers: Threads used for annotation and writes
+            queue_depth: Maximum items buffered between two stages
+            batch_size: Maximum decoded items handed to infer at once
+        """
+        self.decode = decode
+        self.infer = infer
+        self.write = write
+        self.decode_workers = decode_workers
+        self.write_workers = write_workers
+        self.queue_depth = queue_depth
+        self.batch_size = batch_size
+
+        self._stop = threading.Event()
+        self._error = None
+
+    def _put(self, q, item):
+        """Blocking put that gives up once the pipeline is stopping"""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        """Blocking get that returns _DONE once the pipeline is stopping"""
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _fail(self, error):
+        if self._error is None:
+            self._error = error
+        self._stop.set()
+
+    def _decode_stage(self, items, out):
+        try:
+            with ThreadPoolExecutor(self.decode_workers) as pool:
+                pending = deque()
+                for item in items:
+                    if self._stop.is_set():
+                        break
+                    pending.append(pool.submit(self.decode, item))
+                    # Only keep queue_depth decodes in flight
+                    if len(pending) >= self.queue_depth:
+                        decoded = pending.popleft().result()
+                        if decoded is not None and not self._put(out, decoded):
+                            break
+                while pending and not self._stop.is_set():
+                    decoded = pending.popleft().result()
+                    if decoded is not None:
+                        self._put(out, decoded)
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._put(out, _DONE)
+
+    def _infer_stage(self, inp, out):
+        try:
+            done = False
+            while not done:
+                item = self._get(inp)
+                if item is _DONE:
+                    break
+
+                # Take whatever else is already decoded, up to batch_size
+                batch = [item]
+                while len(batch) < self.batch_size:
+                    try:
+                        item = inp.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _DONE:
+                        done = True
+                        break
+                    batch.append(item)
+
+                for inferred in self.infer(batch):
+                    if not self._put(out, inferred):
+                        return
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._put(out, _DONE)
+
+    def run(self, items):
+        """
+        Run the pipeline over items
+
+        Yields:
+            Results of the write stage, in the order inference produced them
+        """
+        self._stop.clear()
+        self._error = None
+
+        decoded = queue.Queue(maxsize=self.queue_depth)
+        inferred = queue.Queue(maxsize=self.queue_depth)
+
+        threads = [
+            threading.Thread(target=self._decode_stage, args=(items, decoded), daemon=True),
+            threading.Thread(target=self._infer_stage, args=(decoded, inferred), daemon=True),
+        ]
+        for t in threads:
+            t.start()
+
+        try:
+            with ThreadPoolExecutor(self.write_workers) as pool:
+                pending = deque()
+                while True:
+                    item = self._get(inferred)
+                    if item is _DONE:
+                        break
+                    pending.append(pool.submit(self.write, item))
+                    while len(pending) >= self.queue_depth:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+        finally:
+            self._stop.set()
+            for t in threads:
+                t.join()
+
+        if self._error is not None:
+            raise self._error
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Persistent result cache for Fingerlings counting
+Stores counts and centroids in SQLite, keyed by image content, weights, conf and imgsz
+"""
+import argparse
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+import numpy as np
+
+CACHE_PATH = "modules/fingerlings/cache/results.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    image_hash TEXT NOT NULL,
+    model_hash TEXT NOT NULL,
+    conf REAL NOT NULL,
+    imgsz INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    centroids BLOB NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (image_hash, model_hash, conf, imgsz)
+);
+CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed);
+CREATE INDEX IF NOT EXISTS results_model ON results (model_hash);
+CREATE TABLE IF NOT EXISTS file_hashes (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+"""
+
+# Evict at most once per this many inserts
+EVICT_EVERY = 256
+
+
+def hash_file(path, chunk_size=1 << 20):
+    """BLAKE2b digest of a file's bytes"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Content-addressed cache of counting results
+
+    Entries are keyed by (image hash, weights hash, conf, imgsz), so renamed
+    or copied images still hit and a retrained best.pt never returns stale
+    counts. File hashes are memoised by (path, mtime, size), so unchanged
+    files are not re-read on every run. The least recently used entries are
+    evicted once the cache holds more than max_entries results.
+    """
+
+    def __init__(self, db_path=CACHE_PATH, max_entries=200_000):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+
+        # Write stages of the pipeline store results from worker threads
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._inserts = 0
+
+    def file_hash(self, path):
+        """Content hash of a file, reusing the stored hash if the file is unchanged"""
+        path = Path(path).resolve()
+        stat = path.stat()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT hash FROM file_hashes WHERE path = ? AND mtime_ns = ? AND size = ?",
+                (str(path), stat.st_mtime_ns, stat.st_size)).fetchone()
+        if row:
+            return row[0]
+
+        digest = hash_file(path)
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?)",
+                               (str(path), stat.st_mtime_ns, stat.st_size, digest))
+            self._conn.commit()
+        return digest
+
+    def model_hash(self, model_path):
+        """Hash of the weights (a .pt/.onnx file or an exported model directory)"""
+        path = Path(model_path)
+        if path.is_dir():
+            digest = hashlib.blake2b(digest_size=20)
+            for f in sorted(p for p in path.rglob("*") if p.is_file()):
+                digest.update(f.relative_to(path).as_posix().encode())
+                digest.update(self.file_hash(f).encode())
+            return digest.hexdigest()
+        if path.exists():
+            return self.file_hash(path)
+        # Hub names like 'yolov8n.pt' are fixed releases
+        return str(model_path)
+
+    def get(self, image_hash, model_hash, conf, imgsz):
+        """
+        Look up a cached result
+
+        Returns:
+            (count, centroids float32[N, 2]) or None on a miss
+        """
+        key = (image_hash, model_hash, round(float(conf), 6), int(imgsz))
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT count, centroids FROM results "
+                "WHERE image_hash = ? AND model_hash = ? AND conf = ? AND imgsz = ?", key).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE results SET accessed = ? "
+                "WHERE image_hash = ? AND model_hash = ? AND conf = ? AND imgsz = ?", (time.time(), *key))
+        return row[0], np.frombuffer(row[1], dtype=np.float32).reshape(-1, 2)
+
+    def put(self, image_hash, model_hash, conf, imgsz, count, centroids):
+        """Store the result for one image"""
+        blob = np.ascontiguousarray(centroids, dtype=np.float32).tobytes()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (image_hash, model_hash, round(float(conf), 6), int(imgsz), int(count), blob, time.time()))
+            self._inserts += 1
+            if self._inserts >= EVICT_EVERY:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop least recently used results beyond max_entries (lock held)"""
+        self._inserts = 0
+        (total,) = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()
+        excess = total - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM results WHERE rowid IN "
+                "(SELECT rowid FROM results ORDER BY accessed LIMIT ?)", (excess,))
+        return max(excess, 0)
+
+    def evict(self):
+        """Enforce max_entries now; returns the number of evicted results"""
+        with self._lock:
+            evicted = self._evict()
+            self._conn.commit()
+        return evicted
+
+    def invalidate(self, model_hash=None, image_hashes=None):
+        """
+        Delete cached results
+
+        Args:
+            model_hash: Only results of these weights
+            image_hashes: Only results of these images
+
+        With neither argument every result is deleted.
+
+        Returns:
+            Number of deleted results
+        """
+        query, params = "DELETE FROM results", []
+        if model_hash is not None:
+            query += " WHERE model_hash = ?"
+            params.append(model_hash)
+        with self._lock:
+            if image_hashes is None:
+                deleted = self._conn.execute(query, params).rowcount
+            else:
+                query += " AND image_hash = ?" if params else " WHERE image_hash = ?"
+                deleted = sum(self._conn.execute(query, (*params, h)).rowcount for h in image_hashes)
+            self._conn.commit()
+        return deleted
+
+    def stats(self):
+        """Number of results, distinct models and database size in MB"""
+        with self._lock:
+            results, models = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT model_hash) FROM results").fetchone()
+        size_mb = sum(p.stat().st_size for p in self.db_path.parent.glob(self.db_path.name + "*")) / 1024 ** 2
+        return {'results': results, 'models': models, 'size_mb': size_mb}
+
+    def vacuum(self):
+        """Reclaim space after large invalidations"""
+        with self._lock:
+            self._conn.execute("VACUUM")
+
+    def close(self):
+        with self._lock:
+            self._evict()
+            self._conn.commit()
+            self._conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or invalidate the Fingerlings result cache")
+    parser.add_argument("--cache", default=CACHE_PATH, help="Path to the cache database")
+    parser.add_argument("--invalidate", action="store_true",
+                        help="Delete cached results (all, or only those matching --model / --images-dir)")
+    parser.add_argument("--model", help="Only invalidate results of these weights")
+    parser.add_argument("--images-dir", help="Only invalidate results of images in this directory")
+    parser.add_argument("--max-entries", type=int, default=200_000, help="Evict down to this many results")
+
+    args = parser.parse_args()
+
+    cache = ResultCache(args.cache, args.max_entries)
+
+    if args.invalidate:
+        model_hash = cache.model_hash(args.model) if args.model else None
+        image_hashes = None
+        if args.images_dir:
+            images_path = Path(args.images_dir)
+            image_files = list(images_path.glob("*.jpg")) + list(images_path.glob("*.png"))
+            image_hashes = [cache.file_hash(f) for f in image_files]
+        deleted = cache.invalidate(model_hash, image_hashes)
+        cache.vacuum()
+        print(f"🗑️  Invalidated {deleted} cached results")
+    else:
+        evicted = cache.evict()
+        if evicted:
+            print(f"🧹 Evicted {evicted} least recently used results")
+
+    stats = cache.stats()
+    print(f"📦 Cache: {args.cache}")
+    print(f"   Results: {stats['results']} | Models: {stats['models']} | Size: {stats['size_mb']:.1f} MB")
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
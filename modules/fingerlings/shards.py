@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Pre-decoded, memory-mapped training images for Fingerlings
+Images are decoded once, resized to imgsz and letterboxed into fixed-size
+slots of .npy shards; training reads them back as zero-copy memmap views
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import cv2
+import numpy as np
+from ultralytics.data import YOLODataset
+from ultralytics.models.yolo.detect import DetectionTrainer
+from ultralytics.utils import colorstr
+from ultralytics.utils.torch_utils import de_parallel
+
+SHARD_ROOT = "modules/fingerlings/cache/shards"
+SHARD_SIZE = 256  # Images per shard file
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png')
+PAD_VALUE = 114  # Ultralytics letterbox colour
+INDEX = 'index.json'
+
+
+def shard_dir(images_dir, imgsz, root=SHARD_ROOT):
+    """Shard directory of one image directory at one imgsz"""
+    images_dir = Path(images_dir).resolve()
+    key = hashlib.blake2b(str(images_dir).encode(), digest_size=6).hexdigest()
+    return Path(root) / f"{images_dir.parent.name}_{key}_{imgsz}"
+
+
+def resize_image(path, imgsz):
+    """
+    Decode and resize exactly like Ultralytics BaseDataset.load_image
+
+    Returns:
+        (image, (h0, w0)) or (None, None) if the file can't be decoded
+    """
+    im = cv2.imread(str(path))
+    if im is None:
+        return None, None
+    h0, w0 = im.shape[:2]
+    r = imgsz / max(h0, w0)
+    if r != 1:
+        w, h = (min(math.ceil(w0 * r), imgsz), min(math.ceil(h0 * r), imgsz))
+        im = cv2.resize(im, (w, h), interpolation=cv2.INTER_LINEAR)
+    return im, (h0, w0)
+
+
+def pack_images(images_dir, imgsz=640, root=SHARD_ROOT, workers=8):
+    """
+    Pack (or update) the shards of one image directory
+
+    Only images whose size or mtime changed since the last pack are decoded
+    again; they are rewritten into their existing slot. Slots of deleted
+    images are reused by new ones. The index is written after the shards are
+    flushed, so an interrupted pack is simply redone on the next run.
+
+    Returns:
+        Path to the shard directory
+    """
+    out = shard_dir(images_dir, imgsz, root)
+    out.mkdir(parents=True, exist_ok=True)
+    index_path = out / INDEX
+
+    index = {'imgsz': imgsz, 'shard_size': SHARD_SIZE, 'shards': 0, 'free': [], 'images': {}}
+    if index_path.exists():
+        with open(index_path, 'r') as f:
+            index = json.load(f)
+    images = index['images']
+
+    files = {p.name: p for p in sorted(Path(images_dir).glob('*')) if p.suffix.lower() in IMAGE_SUFFIXES}
+    for name in [n for n in images if n not in files]:
+        entry = images.pop(name)
+        index['free'].append([entry['shard'], entry['slot']])
+
+    stale = []
+    for name, path in files.items():
+        stat = path.stat()
+        entry = images.get(name)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            continue
+        stale.append((name, path, stat))
+
+    if not stale:
+        print(f"✅ Shards up to date: {out} ({len(images)} images)")
+        return out
+
+    # Assign slots: keep the old slot, then reuse free slots, then append
+    taken = [(e['shard'], e['slot']) for e in images.values()] + [tuple(f) for f in index['free']]
+    next_slot = max(taken, default=(-1, SHARD_SIZE - 1))
+    jobs = []
+    for name, path, stat in stale:
+        entry = images.get(name)
+        if entry:
+            slot = (entry['shard'], entry['slot'])
+        elif index['free']:
+            slot = tuple(index['free'].pop())
+        else:
+            shard, i = next_slot
+            next_slot = (shard + 1, 0) if i + 1 >= SHARD_SIZE else (shard, i + 1)
+            slot = next_slot
+        jobs.append((name, path, stat, slot))
+
+    shards = {}
+
+    def open_shard(shard):
+        if shard not in shards:
+            path = out / f"shard_{shard:04d}.npy"
+            if path.exists():
+                shards[shard] = np.load(path, mmap_mode='r+')
+            else:
+                shards[shard] = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8,
+                                                          shape=(SHARD_SIZE, imgsz, imgsz, 3))
+        return shards[shard]
+
+    for shard in sorted({slot[0] for *_, slot in jobs}):
+        open_shard(shard)
+
+    def pack(job):
+        name, path, stat, (shard, slot) = job
+        im, hw0 = resize_image(path, imgsz)
+        if im is None:
+            return name, None
+        target = shards[shard][slot]
+        target[:] = PAD_VALUE
+        target[:im.shape[0], :im.shape[1]] = im
+        return name, {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'shard': shard, 'slot': slot,
+                      'hw0': list(hw0), 'hw': list(im.shape[:2])}
+
+    start = time.perf_counter()
+    # cv2 releases the GIL while decoding and resizing
+    with ThreadPoolExecutor(workers) as pool:
+        for name, entry in pool.map(pack, jobs):
+            if entry is None:
+                print(f"⚠️  Skipping unreadable image: {files[name]}")
+                old = images.pop(name, None)
+                if old:
+                    index['free'].append([old['shard'], old['slot']])
+                continue
+            images[name] = entry
+
+    for memmap in shards.values():
+        memmap.flush()
+    index['shards'] = max(index['shards'], max(shards) + 1)
+
+    tmp = index_path.with_suffix('.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(index, f)
+    os.replace(tmp, index_path)
+
+    print(f"📦 Packed {len(jobs)} images into {out} in {time.perf_counter() - start:.1f}s "
+          f"({len(images)} total, {index['shards']} shards)")
+    return out
+
+
+def dataset_image_dirs(data_yaml):
+    """Image directories a data YAML trains and validates on (directories, lists and .txt lists)"""
+    from ultralytics.data.utils import check_det_dataset
+
+    data = check_det_dataset(str(Path(data_yaml).resolve()))
+    dirs = []
+    for key in ('train', 'val'):
+        for entry in data[key] if isinstance(data[key], list) else [data[key]]:
+            entry = Path(entry)
+            if entry.is_dir():
+                dirs.append(entry)
+            elif entry.suffix == '.txt':
+                dirs.extend(Path(line.strip()).parent for line in entry.read_text().splitlines() if line.strip())
+    return list(dict.fromkeys(d.resolve() for d in dirs))
+
+
+def pack_dataset(data_yaml, imgsz=640, root=SHARD_ROOT, workers=8):
+    """
+    Pack every train/val image directory of a data YAML
+
+    Returns:
+        List of shard directories
+    """
+    print("📦 Packing decoded training images...")
+    return [pack_images(d, imgsz, root, workers) for d in dataset_image_dirs(data_yaml)]
+
+
+class ImageShards:
+    """Read-only view of one shard directory"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        with open(self.directory / INDEX, 'r') as f:
+            index = json.load(f)
+        self.imgsz = index['imgsz']
+        self.images = index['images']
+        self._shards = {}
+
+    def get(self, image_path):
+        """
+        Zero-copy view of a packed image
+
+        Returns:
+            (image view (h, w, 3), (h0, w0)), or None if the image isn't
+            packed or has changed since it was packed
+        """
+        path = Path(image_path)
+        entry = self.images.get(path.name)
+        if entry is None:
+            return None
+        stat = path.stat()
+        if entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+            return None
+
+        shard = self._shards.get(entry['shard'])
+        if shard is None:
+            shard = self._shards[entry['shard']] = np.load(self.directory / f"shard_{entry['shard']:04d}.npy",
+                                                            mmap_mode='r')
+        h, w = entry['hw']
+        return shard[entry['slot'], :h, :w], tuple(entry['hw0'])
+
+    def __getstate__(self):
+        # Dataloader workers reopen the memmaps instead of pickling their contents
+        state = self.__dict__.copy()
+        state['_shards'] = {}
+        return state
+
+
+class ShardDataset(YOLODataset):
+    """YOLODataset that reads packed images and falls back to decoding files that aren't"""
+
+    root = SHARD_ROOT
+
+    def __init__(self, *args, **kwargs):
+        self._shard_dirs = {}
+        self.shard_hits = self.shard_misses = 0
+        super().__init__(*args, **kwargs)
+
+    def shards_for(self, image_path):
+        parent = Path(image_path).parent
+        if parent not in self._shard_dirs:
+            directory = shard_dir(parent, self.imgsz, self.root)
+            self._shard_dirs[parent] = ImageShards(directory) if (directory / INDEX).exists() else None
+        return self._shard_dirs[parent]
+
+    def load_image(self, i, rect_mode=True):
+        if self.ims[i] is not None or not rect_mode:
+            return super().load_image(i, rect_mode)
+
+        shards = self.shards_for(self.im_files[i])
+        packed = shards.get(self.im_files[i]) if shards else None
+        if packed is None:
+            self.shard_misses += 1
+            return super().load_image(i, rect_mode)
+        self.shard_hits += 1
+        im, hw0 = packed
+
+        # Same buffer bookkeeping as BaseDataset, which mosaic samples from
+        if self.augment:
+            self.ims[i], self.im_hw0[i], self.im_hw[i] = im, hw0, im.shape[:2]
+            self.buffer.append(i)
+            if len(self.buffer) >= self.max_buffer_length:
+                j = self.buffer.pop(0)
+                self.ims[j], self.im_hw0[j], self.im_hw[j] = None, None, None
+
+        return im, hw0, im.shape[:2]
+
+
+class ShardTrainer(DetectionTrainer):
+    """DetectionTrainer whose train and val datasets read from the shards"""
+
+    def build_dataset(self, img_path, mode="train", batch=None):
+        gs = max(int(de_parallel(self.model).stride.max() if self.model else 0), 32)
+        cfg = self.args
+        return ShardDataset(
+            img_path=img_path,
+            imgsz=cfg.imgsz,
+            batch_size=batch,
+            augment=mode == "train",
+            hyp=cfg,
+            rect=cfg.rect or mode == "val",
+            cache=cfg.cache or None,
+            single_cls=cfg.single_cls or False,
+            stride=gs,
+            pad=0.0 if mode == "train" else 0.5,
+            prefix=colorstr(f"{mode}: "),
+            task=cfg.task,
+            classes=cfg.classes,
+            data=self.data,
+            fraction=cfg.fraction if mode == "train" else 1.0,
+        )
+
+
+def benchmark_epoch(data_yaml, imgsz=640, batch=4, epochs=2, root=SHARD_ROOT):
+    """
+    Time the data side of a training epoch with and without shards
+
+    Every sample goes through the full training pipeline (decode or shard
+    read, mosaic, augmentation, formatting) in one process, exactly like
+    training with workers=0. Image loading alone is timed separately, since
+    augmentation cost is the same either way.
+
+    Args:
+        data_yaml: Path to dataset YAML
+        imgsz: Training image size
+        batch: Training batch size (sets the size of the mosaic image buffer)
+        epochs: Epochs per mode; the fastest is reported
+        root: Shard cache directory
+
+    Returns:
+        Dict with seconds per epoch for load/epoch x decode/shards
+    """
+    from ultralytics.cfg import get_cfg
+    from ultralytics.data.utils import check_det_dataset
+
+    pack_dataset(data_yaml, imgsz, root)
+    data = check_det_dataset(str(Path(data_yaml).resolve()))
+    cfg = get_cfg(overrides={'imgsz': imgsz})
+
+    timings = {}
+    for label, dataset_class in (('decode', YOLODataset), ('shards', ShardDataset)):
+        dataset = dataset_class(img_path=data['train'], imgsz=imgsz, batch_size=batch, augment=True, hyp=cfg,
+                                rect=False, stride=32, prefix=f"{label}: ", task='detect', data=data)
+
+        def clear_buffer():
+            for j in dataset.buffer:
+                dataset.ims[j] = dataset.im_hw0[j] = dataset.im_hw[j] = None
+            dataset.buffer.clear()
+
+        load, epoch = [], []
+        for _ in range(epochs):
+            clear_buffer()
+            start = time.perf_counter()
+            for i in range(len(dataset)):
+                dataset.load_image(i)
+            load.append(time.perf_counter() - start)
+
+            clear_buffer()
+            start = time.perf_counter()
+            for i in range(len(dataset)):
+                dataset[i]
+            epoch.append(time.perf_counter() - start)
+        timings[label] = {'load': min(load), 'epoch': min(epoch)}
+        if isinstance(dataset, ShardDataset) and dataset.shard_misses:
+            print(f"⚠️  {dataset.shard_misses} images were decoded instead of read from shards")
+
+    print("\n" + "="*50)
+    print("⏱️  DATA LOADING PER EPOCH")
+    print("="*50)
+    print(f"Images: {len(dataset)} at imgsz {imgsz}, batch {batch}")
+    print(f"{'':14} {'load':>8} {'epoch':>8}")
+    for label in ('decode', 'shards'):
+        print(f"{label:14} {timings[label]['load']:7.2f}s {timings[label]['epoch']:7.2f}s")
+    print(f"{'speedup':14} {timings['decode']['load'] / timings['shards']['load']:7.1f}x "
+          f"{timings['decode']['epoch'] / timings['shards']['epoch']:7.2f}x")
+    print("="*50 + "\n")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack Fingerlings training images into memory-mapped shards")
+    parser.add_argument("--data", default="modules/fingerlings/dataset/data.yaml", help="Path to dataset YAML")
+    parser.add_argument("--imgsz", type=int, default=640, help="Training image size")
+    parser.add_argument("--root", default=SHARD_ROOT, help="Shard cache directory")
+    parser.add_argument("--workers", type=int, default=8, help="Decoding threads")
+    parser.add_argument("--benchmark", action="store_true", help="Compare epoch data time with and without shards")
+    parser.add_argument("--batch", type=int, default=4, help="Training batch size (--benchmark)")
+    parser.add_argument("--epochs", type=int, default=2, help="Epochs per benchmark (best is reported)")
+
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark_epoch(args.data, args.imgsz, args.batch, args.epochs, args.root)
+    else:
+        pack_dataset(args.data, args.imgsz, args.root, args.workers)
+
+
+if __name__ == "__main__":
+    main()
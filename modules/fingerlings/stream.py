@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Streaming Fingerlings counting for video files and cameras
+Decodes on a background thread and always counts the newest frame
+"""
+import threading
+import time
+import cv2
+
+try:
+    from .model_cache import get_model
+except ImportError:
+    from model_cache import get_model
+
+
+def parse_source(source):
+    """Camera indices are passed as digits ('0'), everything else as a path/URL"""
+    return int(source) if str(source).isdigit() else str(source)
+
+
+class LatestFrameReader:
+    """
+    Background frame grabber that keeps a single slot
+
+    With drop=True the slot is overwritten by every new frame, so a slow
+    consumer always gets the newest frame and stale ones are dropped.
+    With drop=False the reader waits for the consumer (lossless file replay).
+    Video files are paced at their native FPS when realtime=True so they
+    behave like a live camera.
+    """
+
+    def __init__(self, source, drop=True, realtime=True):
+        self.source = parse_source(source)
+        self.cap = cv2.VideoCapture(self.source)
+        if not self.cap.isOpened():
+            raise IOError(f"Cannot open video source: {source}")
+
+        self.is_file = isinstance(self.source, str) and not self.source.startswith(("rtsp://", "http://", "https://"))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.drop = drop
+        self.realtime = realtime
+
+        self.dropped = 0
+        self._slot = None
+        self._finished = False
+        self._running = True
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        index = 0
+        start = time.monotonic()
+        while self._running:
+            ok, frame = self.cap.read()
+            if not ok:
+                break
+            captured = time.monotonic()
+            position = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000 if self.is_file else captured - start
+
+            with self._cond:
+                if not self.drop:
+                    while self._slot is not None and self._running:
+                        self._cond.wait(0.1)
+                elif self._slot is not None:
+                    self.dropped += 1
+                self._slot = (index, position, captured, frame)
+                self._cond.notify_all()
+            index += 1
+
+            if self.is_file and self.realtime:
+                # Replay the file at its native frame rate
+                delay = start + index / self.fps - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+        with self._cond:
+            self._finished = True
+            self._cond.notify_all()
+
+    def read(self):
+        """
+        Wait for the next frame
+
+        Returns:
+            (index, stream_time_s, captured_monotonic, frame) or None at end of stream
+        """
+        with self._cond:
+            while self._slot is None and not self._finished:
+                self._cond.wait(0.1)
+            item, self._slot = self._slot, None
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        self._thread.join()
+        self.cap.release()
+
+
+def count_stream(model_path, source, conf=0.25, imgsz=640, device=None,
+                 latency_budget_ms=500, realtime=True):
+    """
+    Count objects on a live stream, dropping frames when inference falls behind
+
+    Args:
+        model_path: Path to trained model weights
+        source: Video file, stream URL or camera index ('0')
+        conf: Confidence threshold
+        imgsz: Image size for inference
+        device: Device to use (None for auto-detect)
+        latency_budget_ms: Frames older than this when inference would start
+            are skipped in favour of a fresher one (None to disable)
+        realtime: Pace video files at native FPS and drop stale frames;
+            False replays files frame by frame without dropping
+
+    Yields:
+        Dict with frame index, stream time, wall-clock time, count and
+        end-to-end latency (capture to count) in milliseconds
+    """
+    model = get_model(model_path, device)
+    reader = LatestFrameReader(source, drop=realtime, realtime=realtime)
+    skipped = 0
+
+    try:
+        while True:
+            item = reader.read()
+            if item is None:
+                break
+            index, position, captured, frame = item
+
+            if realtime and latency_budget_ms is not None:
+                age_ms = (time.monotonic() - captured) * 1000
+                if age_ms > latency_budget_ms:
+                    skipped += 1
+                    continue
+
+            results = model.predict(
+                source=frame,
+                imgsz=imgsz,
+                conf=conf,
+                device=device,
+                save=False,
+                verbose=False
+            )
+
+            yield {
+                'frame': index,
+                'stream_time': position,
+                'timestamp': time.time(),
+                'count': len(results[0].boxes),
+                'latency_ms': (time.monotonic() - captured) * 1000,
+                'dropped': reader.dropped + skipped,
+            }
+    finally:
+        reader.close()
+
+
+def test_stream(model_path, source, conf=0.25, imgsz=640, device=None, latency_budget_ms=500, realtime=True):
+    """Print per-frame counts for a stream and a summary at the end"""
+    print(f"🎥 Streaming from: {source}")
+    print(f"⏱️  Latency budget: {latency_budget_ms} ms\n")
+
+    frames = []
+    start = time.perf_counter()
+    try:
+        for frame in count_stream(model_path, source, conf, imgsz, device, latency_budget_ms, realtime):
+            frames.append(frame)
+            over = " ⚠️ over budget" if latency_budget_ms and frame['latency_ms'] > latency_budget_ms else ""
+            print(f"[{frame['stream_time']:8.2f}s] frame {frame['frame']:6d} | "
+                  f"🐟 {frame['count']:4d} | latency {frame['latency_ms']:6.0f} ms{over}")
+    except KeyboardInterrupt:
+        print("\n⏹️  Stopped")
+    elapsed = time.perf_counter() - start
+
+    if not frames:
+        print("❌ No frames counted")
+        return frames
+
+    latencies = sorted(f['latency_ms'] for f in frames)
+    counts = [f['count'] for f in frames]
+
+    print("\n" + "="*50)
+    print("📊 STREAM SUMMARY")
+    print("="*50)
+    print(f"Frames counted: {len(frames)}")
+    print(f"Frames dropped: {frames[-1]['dropped']}")
+    print(f"Counting rate: {len(frames) / elapsed:.1f} frames/sec")
+    print(f"Average count: {sum(counts) / len(counts):.1f}")
+    print(f"Latency p50/p95: {latencies[len(latencies) // 2]:.0f} / "
+          f"{latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]:.0f} ms")
+    print("="*50 + "\n")
+
+    return frames
@@ -3,12 +3,41 @@
 Test YOLO model for Fish Fingerlings Detection and Counting
 """
 import argparse
-from ultralytics import YOLO
+import os
+import time
 from pathlib import Path
 import cv2
+import numpy as np
 
+try:
+    from .model_cache import get_model
+    from .pipeline import Pipeline
+    from .tiling import MERGE_STRATEGIES, predict_tiled
+    from .stream import test_stream
+    from .export import BACKENDS, resolve_backend
+    from .result_cache import CACHE_PATH, ResultCache
+    from .workers import count_parallel
+except ImportError:
+    from model_cache import get_model
+    from pipeline import Pipeline
+    from tiling import MERGE_STRATEGIES, predict_tiled
+    from stream import test_stream
+    from export import BACKENDS, resolve_backend
+    from result_cache import CACHE_PATH, ResultCache
+    from workers import count_parallel
 
-def test_fingerlings(model_path, image_path, conf=0.25, imgsz=640, show_dots=True):
+
+# Pixel offsets of a filled dot, taken from cv2.circle so the vectorized
+# drawing is pixel-identical to calling cv2.circle once per detection
+DOT_RADIUS = 5
+_dot_stencil = np.zeros((2 * DOT_RADIUS + 1, 2 * DOT_RADIUS + 1), dtype=np.uint8)
+cv2.circle(_dot_stencil, (DOT_RADIUS, DOT_RADIUS), radius=DOT_RADIUS, color=1, thickness=-1)
+_dot_ys, _dot_xs = np.nonzero(_dot_stencil)
+DOT_OFFSETS = (_dot_ys - DOT_RADIUS, _dot_xs - DOT_RADIUS)
+
+
+def test_fingerlings(model_path, image_path, conf=0.25, imgsz=640, show_dots=True, device=None,
+                     tile_size=None, tile_overlap=0.2, tile_merge='nms', tile_scale=1.0, verbose=True):
     """
     Test model on single image and return detection count
     
@@ -18,64 +47,117 @@ def test_fingerlings(model_path, image_path, conf=0.25, imgsz=640, show_dots=Tru
         conf: Confidence threshold
         imgsz: Image size for inference
         show_dots: Draw red dots on detections
+        device: Device to use (None for auto-detect)
+        tile_size: Run tiled inference with this tile size (None for full frame)
+        tile_overlap: Fraction of a tile shared with its neighbour
+        tile_merge: How duplicates at tile seams are merged ('nms' or 'centroid')
+        tile_scale: Resize the frame by this factor before tiling
+        verbose: Print the detection banner
     
     Returns:
         Number of detections
     """
-    print(f"📦 Loading model: {model_path}")
-    model = YOLO(model_path)
-    
-    print(f"🔍 Testing image: {image_path}")
-    results = model.predict(
-        source=image_path,
-        imgsz=imgsz,
-        conf=conf,
-        save=False,
-        verbose=False
-    )
+    model = get_model(model_path, device)
     
-    detections = results[0].boxes
-    count = len(detections)
-    
-    if show_dots:
+    if verbose:
+        print(f"🔍 Testing image: {image_path}")
+    if tile_size:
         img = cv2.imread(image_path)
-
-        for box in detections:
-            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-            center_x = int((x1 + x2) / 2)
-            center_y = int((y1 + y2) / 2)
-            cv2.circle(img, (center_x, center_y), radius=5, color=(0, 0, 255), thickness=-1)
-
-        # Add count text on image
-        text = f"Count: {count}"
-        font = cv2.FONT_HERSHEY_SIMPLEX
-        font_scale = 1.5
-        thickness = 3
-
-        # Get text size for background rectangle
-        (text_width, text_height), baseline = cv2.getTextSize(text, font, font_scale, thickness)
-
-        # Draw background rectangle
-        padding = 10
-        cv2.rectangle(img,
-                     (10, 10),
-                     (10 + text_width + padding * 2, 10 + text_height + padding * 2),
-                     (0, 0, 0),
-                     -1)
-
-        # Draw text
-        cv2.putText(img, text,
-                   (10 + padding, 10 + text_height + padding),
-                   font, font_scale, (0, 255, 0), thickness)
-
-        output_dir = Path("runs/detect/fingerlings_predict_dots")
-        output_dir.mkdir(parents=True, exist_ok=True)
-        output_path = output_dir / Path(image_path).name
-        cv2.imwrite(str(output_path), img)
-        save_location = str(output_path)
+        xyxy, _ = predict_tiled(model, img, conf, tile_size, tile_overlap, tile_merge,
+                                scale=tile_scale, device=device)
+        centroids = (xyxy[:, :2] + xyxy[:, 2:]) / 2
+        save_location = "(not saved)"
     else:
+        results = model.predict(
+            source=image_path,
+            imgsz=imgsz,
+            conf=conf,
+            device=device,
+            save=False,
+            verbose=False
+        )
+        img = results[0].orig_img
+        centroids = box_centroids(results[0].boxes)
         save_location = str(results[0].save_dir)
     
+    count = len(centroids)
+    
+    if show_dots:
+        save_location = save_dots(image_path, img, centroids)
+
+    if verbose:
+        print_detection(image_path, count, conf, save_location)
+
+    return count
+
+
+def box_centroids(detections):
+    """
+    Compute the centre of every detection box
+
+    Args:
+        detections: Ultralytics Boxes for one image
+
+    Returns:
+        float32 array of shape (N, 2) with (x, y) centres
+    """
+    xyxy = detections.xyxy.cpu().numpy()  # one device transfer for all boxes
+    return (xyxy[:, :2] + xyxy[:, 2:]) / 2
+
+
+def draw_dots(img, centroids, color=(0, 0, 255)):
+    """Draw a filled dot at every centroid in a single vectorized write"""
+    centers = centroids.astype(np.int32)
+    ys = (centers[:, 1:2] + DOT_OFFSETS[0]).ravel()
+    xs = (centers[:, 0:1] + DOT_OFFSETS[1]).ravel()
+    inside = (ys >= 0) & (ys < img.shape[0]) & (xs >= 0) & (xs < img.shape[1])
+    img[ys[inside], xs[inside]] = color
+    return img
+
+
+def save_dots(image_path, img, centroids):
+    """
+    Draw a red dot on each detection plus the count banner and save the image
+
+    Args:
+        image_path: Path of the source image (used for the output name)
+        img: Decoded BGR image to draw on (drawn on in place)
+        centroids: float32 array (N, 2) of detection centres
+
+    Returns:
+        Path of the saved image
+    """
+    count = len(centroids)
+
+    draw_dots(img, centroids)
+
+    # Add count text on image
+    text = f"Count: {count}"
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    font_scale = 1.5
+    thickness = 3
+
+    # Get text size for background rectangle
+    (text_width, text_height), baseline = cv2.getTextSize(text, font, font_scale, thickness)
+
+    # Draw background rectangle (same pixels as a filled cv2.rectangle)
+    padding = 10
+    img[10:10 + text_height + padding * 2 + 1, 10:10 + text_width + padding * 2 + 1] = (0, 0, 0)
+
+    # Draw text
+    cv2.putText(img, text,
+               (10 + padding, 10 + text_height + padding),
+               font, font_scale, (0, 255, 0), thickness)
+
+    output_dir = Path("runs/detect/fingerlings_predict_dots")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / Path(image_path).name
+    cv2.imwrite(str(output_path), img)
+    return str(output_path)
+
+
+def print_detection(image_path, count, conf, save_location):
+    """Print the detection banner for one image"""
     print("\n" + "="*50)
     print("✅ DETECTION RESULTS")
     print("="*50)
@@ -84,32 +166,290 @@ def test_fingerlings(model_path, image_path, conf=0.25, imgsz=640, show_dots=Tru
     print(f"📊 Confidence: {conf}")
     print(f"💾 Saved to: {save_location}")
     print("="*50 + "\n")
-    
-    return count
 
 
-def test_batch(model_path, images_dir, conf=0.25, imgsz=640, show_dots=True):
-    """Test model on multiple images"""
+def predict_images(model, images, conf=0.25, imgsz=640, device=None):
+    """
+    Run one forward pass per group of same-shaped decoded images
+
+    Args:
+        model: Loaded YOLO model
+        images: List of (image_path, BGR image) tuples
+        conf: Confidence threshold
+        imgsz: Image size for inference
+        device: Device to use (None for auto-detect)
+
+    Returns:
+        List of (image_path, result) tuples
+    """
+    groups = {}
+    for image_path, img in images:
+        groups.setdefault(img.shape, []).append((image_path, img))
+
+    outputs = []
+    for group in groups.values():
+        results = model.predict(
+            source=[img for _, img in group],
+            imgsz=imgsz,
+            conf=conf,
+            device=device,
+            save=False,
+            verbose=False
+        )
+        outputs.extend((image_path, result) for (image_path, _), result in zip(group, results))
+    return outputs
+
+
+def predict_batches(model_path, image_files, conf=0.25, imgsz=640, batch_size=8, device=None):
+    """
+    Run batched inference over image files
+
+    Images are grouped by shape so every batch gets the same letterbox
+    padding as single-image inference, then each batch goes through one
+    forward pass and one NMS call.
+
+    Args:
+        model_path: Path to trained model weights
+        image_files: Iterable of image paths
+        conf: Confidence threshold
+        imgsz: Image size for inference
+        batch_size: Number of images per forward pass
+        device: Device to use (None for auto-detect)
+
+    Yields:
+        (image_path, result) for every readable image
+    """
+    model = get_model(model_path, device)
+    pending = {}
+
+    for image_path in image_files:
+        img = cv2.imread(str(image_path))
+        if img is None:
+            print(f"⚠️  Skipping unreadable image: {image_path}")
+            continue
+
+        batch = pending.setdefault(img.shape, [])
+        batch.append((str(image_path), img))
+        if len(batch) == batch_size:
+            yield from predict_images(model, pending.pop(img.shape), conf, imgsz, device)
+
+    # Flush partially filled batches
+    for batch in pending.values():
+        yield from predict_images(model, batch, conf, imgsz, device)
+
+
+def predict_pipelined(model_path, image_files, conf=0.25, imgsz=640, show_dots=True, device=None,
+                      batch_size=1, decode_workers=4, write_workers=2, queue_depth=16, cache=None):
+    """
+    Count images with decode, inference and annotation/writes overlapped
+
+    Args:
+        model_path: Path to trained model weights
+        image_files: Iterable of image paths
+        conf: Confidence threshold
+        imgsz: Image size for inference
+        show_dots: Draw red dots on detections
+        device: Device to use (None for auto-detect)
+        batch_size: Maximum images per forward pass
+        decode_workers: Threads decoding images
+        write_workers: Threads drawing dots and writing images
+        queue_depth: Maximum images buffered between two stages
+        cache: ResultCache that the write stage stores results in (optional)
+
+    Yields:
+        (image_path, count, save_location) for every readable image
+    """
+    model = get_model(model_path, device)
+    model_hash = cache.model_hash(model_path) if cache is not None else None
+
+    def decode(image_path):
+        img = cv2.imread(str(image_path))
+        if img is None:
+            print(f"⚠️  Skipping unreadable image: {image_path}")
+            return None
+        return str(image_path), img
+
+    def infer(batch):
+        return predict_images(model, batch, conf, imgsz, device)
+
+    def write(item):
+        image_path, result = item
+        centroids = box_centroids(result.boxes)
+        if cache is not None:
+            cache.put(cache.file_hash(image_path), model_hash, conf, imgsz, len(centroids), centroids)
+        if show_dots:
+            save_location = save_dots(image_path, result.orig_img, centroids)
+        else:
+            save_location = str(result.save_dir)
+        return image_path, len(centroids), save_location
+
+    pipeline = Pipeline(decode, infer, write, decode_workers, write_workers, queue_depth, batch_size)
+    yield from pipeline.run(image_files)
+
+
+IMAGE_SUFFIXES = ('.jpg', '.png')
+
+
+def iter_image_files(images):
+    """Lazily yield image paths from a directory or an iterable of paths"""
+    if isinstance(images, (str, Path)) and Path(images).is_dir():
+        with os.scandir(images) as entries:
+            for entry in entries:
+                if entry.is_file() and os.path.splitext(entry.name)[1] in IMAGE_SUFFIXES:
+                    yield entry.path
+    else:
+        yield from (str(image) for image in images)
+
+
+def iter_counts(model_path, images, conf=0.25, imgsz=640, device=None, batch_size=1):
+    """
+    Lazily count objects image by image, without keeping Results around
+
+    Memory stays flat however large the folder is: files are listed lazily
+    and only compact arrays leave this function.
+
+    Args:
+        model_path: Path to trained model weights
+        images: Directory path or iterable of image paths
+        conf: Confidence threshold
+        imgsz: Image size for inference
+        device: Device to use (None for auto-detect)
+        batch_size: Images per forward pass
+
+    Yields:
+        (path, count, centroids float32[N, 2], conf float32[N])
+    """
+    for image_path, result in predict_batches(model_path, iter_image_files(images), conf, imgsz,
+                                              batch_size, device):
+        boxes = result.boxes
+        centroids = box_centroids(boxes).astype(np.float32)
+        confidences = boxes.conf.cpu().numpy().astype(np.float32)
+        yield image_path, len(centroids), centroids, confidences
+
+
+def test_batch(model_path, images_dir, conf=0.25, imgsz=640, show_dots=True, device=None, batch_size=1,
+               pipeline=False, decode_workers=4, write_workers=2, queue_depth=16,
+               tile_size=None, tile_overlap=0.2, tile_merge='nms', tile_scale=1.0,
+               verbose=False, summary=True, cache=None, workers=0, threads_per_worker=None, pin_cpus=False):
+    """
+    Test model on multiple images (model is loaded once and reused)
+
+    Per-image banners are only printed with verbose=True; the batch summary
+    is printed at the end unless summary=False. With a ResultCache, images
+    counted before with the same weights, conf and imgsz are neither decoded
+    nor run through the model; only the misses are inferred (and stored).
+    With workers > 0 the images are counted by a pool of worker processes,
+    each with its own model and threads_per_worker torch threads.
+    """
     images_path = Path(images_dir)
     image_files = list(images_path.glob("*.jpg")) + list(images_path.glob("*.png"))
-    
-    print(f"📁 Found {len(image_files)} images\n")
-    
+
+    if summary:
+        print(f"📁 Found {len(image_files)} images\n")
+
     results = {}
     total_count = 0
-    
-    for img_file in image_files:
-        count = test_fingerlings(model_path, str(img_file), conf, imgsz, show_dots)
-        results[img_file.name] = count
-        total_count += count
-    
-    print("\n" + "="*50)
-    print("📊 BATCH TEST SUMMARY")
-    print("="*50)
-    print(f"Total images: {len(image_files)}")
-    print(f"Total detected: {total_count}")
-    print(f"Average: {total_count / len(image_files):.1f}")
-    print("="*50 + "\n")
+    start = time.perf_counter()
+
+    if cache is not None and tile_size:
+        print("⚠️  Result cache is not used for tiled inference")
+        cache = None
+
+    hits = 0
+    if cache is not None:
+        model_hash = cache.model_hash(model_path)
+        image_hashes = {}
+        misses = []
+        for img_file in image_files:
+            image_hash = cache.file_hash(img_file)
+            cached = cache.get(image_hash, model_hash, conf, imgsz)
+            if cached is None:
+                image_hashes[str(img_file)] = image_hash
+                misses.append(img_file)
+                continue
+
+            count, _ = cached
+            if verbose:
+                print_detection(img_file, count, conf, "(cached)")
+            results[img_file.name] = count
+            total_count += count
+            hits += 1
+        image_files_to_run = misses
+    else:
+        image_files_to_run = image_files
+
+    if not image_files_to_run:
+        pass  # Everything came from the cache, no need to load the model
+    elif tile_size:
+        # Tiles of one frame already share a forward pass
+        for img_file in image_files_to_run:
+            count = test_fingerlings(model_path, str(img_file), conf, imgsz, show_dots, device,
+                                     tile_size, tile_overlap, tile_merge, tile_scale, verbose)
+            results[img_file.name] = count
+            total_count += count
+    elif workers:
+        for image_path, count, centroids in count_parallel(
+                model_path, image_files_to_run, conf, imgsz, show_dots, device or 'cpu',
+                workers, threads_per_worker, pin_cpus, batch_size=batch_size):
+            if cache is not None:
+                cache.put(image_hashes[image_path], model_hash, conf, imgsz, count, centroids)
+            if verbose:
+                print_detection(image_path, count, conf, "(written by worker)" if show_dots else "(not saved)")
+
+            results[Path(image_path).name] = count
+            total_count += count
+    elif pipeline:
+        for image_path, count, save_location in predict_pipelined(
+                model_path, image_files_to_run, conf, imgsz, show_dots, device,
+                batch_size, decode_workers, write_workers, queue_depth, cache):
+            if verbose:
+                print_detection(image_path, count, conf, save_location)
+
+            results[Path(image_path).name] = count
+            total_count += count
+    elif batch_size > 1 or cache is not None:
+        # Cached runs need the centroids, so serial counting goes through here too
+        for image_path, result in predict_batches(model_path, image_files_to_run, conf, imgsz,
+                                                  batch_size, device):
+            centroids = box_centroids(result.boxes)
+            count = len(centroids)
+
+            if cache is not None:
+                cache.put(image_hashes[image_path], model_hash, conf, imgsz, count, centroids)
+            if show_dots:
+                save_location = save_dots(image_path, result.orig_img, centroids)
+            else:
+                save_location = str(result.save_dir)
+            if verbose:
+                print_detection(image_path, count, conf, save_location)
+
+            results[Path(image_path).name] = count
+            total_count += count
+    else:
+        for img_file in image_files_to_run:
+            count = test_fingerlings(model_path, str(img_file), conf, imgsz, show_dots, device, verbose=verbose)
+            results[img_file.name] = count
+            total_count += count
+
+    elapsed = time.perf_counter() - start
+
+    if summary:
+        print("\n" + "="*50)
+        print("📊 BATCH TEST SUMMARY")
+        print("="*50)
+        print(f"Total images: {len(image_files)}")
+        print(f"Total detected: {total_count}")
+        print(f"Average: {total_count / len(image_files):.1f}")
+        print(f"Batch size: {batch_size}")
+        if workers:
+            threads = threads_per_worker or max(1, os.cpu_count() // workers)
+            print(f"Mode: {workers} workers x {threads} threads{' (pinned)' if pin_cpus else ''}")
+        else:
+            print(f"Mode: {'tiled' if tile_size else 'pipelined' if pipeline else 'serial'}")
+        if cache is not None:
+            print(f"Cache hits: {hits}/{len(image_files)}")
+        print(f"Throughput: {len(image_files) / elapsed:.1f} images/sec")
+        print("="*50 + "\n")
     
     return results
 
@@ -119,20 +459,61 @@ def main():
     parser.add_argument("--model", required=True, help="Path to model weights")
     parser.add_argument("--image", help="Path to single test image")
     parser.add_argument("--images-dir", help="Path to directory with images")
+    parser.add_argument("--source", help="Video file, stream URL or camera index (e.g. 0)")
     parser.add_argument("--conf", type=float, default=0.25, help="Confidence threshold")
     parser.add_argument("--imgsz", type=int, default=640, help="Image size")
     parser.add_argument("--no-dots", action="store_true", help="Don't draw red dots")
+    parser.add_argument("--verbose", action="store_true", help="Print a result banner for every image (--images-dir)")
+    parser.add_argument("--device", default=None, help="Device (mps/cuda/cpu)")
+    parser.add_argument("--backend", default="torch", choices=BACKENDS,
+                        help="Inference backend (onnx/openvino are exported next to --model on first use)")
+    parser.add_argument("--batch-size", type=int, default=1, help="Images per forward pass (--images-dir only)")
+    parser.add_argument("--pipeline", action="store_true", help="Overlap decode, inference and writes (--images-dir only)")
+    parser.add_argument("--decode-workers", type=int, default=4, help="Decode threads for --pipeline")
+    parser.add_argument("--write-workers", type=int, default=2, help="Annotation/write threads for --pipeline")
+    parser.add_argument("--queue-depth", type=int, default=16, help="Max images buffered between --pipeline stages")
+    parser.add_argument("--tile-size", type=int, default=None, help="Tiled inference with this tile size (e.g. 640)")
+    parser.add_argument("--tile-overlap", type=float, default=0.2, help="Tile overlap fraction")
+    parser.add_argument("--tile-merge", default="nms", choices=MERGE_STRATEGIES, help="Seam merge strategy")
+    parser.add_argument("--tile-scale", type=float, default=1.0, help="Resize frames by this factor before tiling")
+    parser.add_argument("--latency-budget-ms", type=float, default=500, help="Skip --source frames older than this")
+    parser.add_argument("--no-realtime", action="store_true", help="Replay --source video files without dropping frames")
+    parser.add_argument("--cache", nargs="?", const=CACHE_PATH, default=None,
+                        help=f"Reuse counts from a result cache (--images-dir only, default {CACHE_PATH})")
+    parser.add_argument("--cache-max-entries", type=int, default=200_000, help="Evict results beyond this many")
+    parser.add_argument("--workers", type=int, default=0, help="Count with this many worker processes (--images-dir only)")
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="torch threads per worker (default: cores / workers)")
+    parser.add_argument("--pin-cpus", action="store_true", help="Pin each worker to its own cores")
     
     args = parser.parse_args()
     
-    if not args.image and not args.images_dir:
-        print("❌ Error: Must provide --image or --images-dir")
+    if not args.image and not args.images_dir and not args.source:
+        print("❌ Error: Must provide --image, --images-dir or --source")
         return
     
-    if args.image:
-        test_fingerlings(args.model, args.image, args.conf, args.imgsz, not args.no_dots)
+    # Swap in the exported weights for the chosen backend; batched and tiled
+    # inference send a varying number of images, serial counting one at a time
+    args.model = resolve_backend(args.model, args.backend, args.imgsz, args.batch_size,
+                                 dynamic=args.batch_size > 1 or bool(args.tile_size))
+    
+    if args.source:
+        test_stream(args.model, args.source, args.conf, args.imgsz, args.device,
+                    args.latency_budget_ms, not args.no_realtime)
+    elif args.image:
+        test_fingerlings(args.model, args.image, args.conf, args.imgsz, not args.no_dots, args.device,
+                         args.tile_size, args.tile_overlap, args.tile_merge, args.tile_scale)
     elif args.images_dir:
-        test_batch(args.model, args.images_dir, args.conf, args.imgsz, not args.no_dots)
+        cache = ResultCache(args.cache, args.cache_max_entries) if args.cache else None
+        try:
+            test_batch(args.model, args.images_dir, args.conf, args.imgsz, not args.no_dots, args.device,
+                       args.batch_size, args.pipeline, args.decode_workers, args.write_workers, args.queue_depth,
+                       args.tile_size, args.tile_overlap, args.tile_merge, args.tile_scale, args.verbose,
+                       cache=cache, workers=args.workers, threads_per_worker=args.threads_per_worker,
+                       pin_cpus=args.pin_cpus)
+        finally:
+            if cache is not None:
+                cache.close()
 
 
 if __name__ == "__main__":
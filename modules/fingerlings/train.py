@@ -8,6 +8,17 @@ from ultralytics import YOLO
 from pathlib import Path
 import yaml
 
+try:
+    from .shards import pack_dataset, ShardTrainer
+    from .autoconfig import auto_config, print_config, record_config, recorded_args, AutoTrainer, AutoShardTrainer
+    from .throughput import add_throughput_callbacks
+    from .checkpoint import CHECKPOINT_MINUTES, find_resumable, resumable
+except ImportError:
+    from shards import pack_dataset, ShardTrainer
+    from autoconfig import auto_config, print_config, record_config, recorded_args, AutoTrainer, AutoShardTrainer
+    from throughput import add_throughput_callbacks
+    from checkpoint import CHECKPOINT_MINUTES, find_resumable, resumable
+
 
 def setup_training_config(data_yaml_path):
     """Setup and validate training configuration"""
@@ -34,7 +45,13 @@ def train_fingerlings(
     batch=4,
     name="fingerlings_training",
     patience=50,
-    device=None
+    device=None,
+    shards=False,
+    auto=False,
+    throughput=True,
+    overrides=None,
+    resume=True,
+    checkpoint_minutes=CHECKPOINT_MINUTES
 ):
     """
     Train YOLO model for fingerlings detection
@@ -48,6 +65,18 @@ def train_fingerlings(
         name: Training run name
         patience: Early stopping patience
         device: Device to use (None for auto-detect)
+        shards: Read pre-decoded images from memory-mapped shards
+            (packed or refreshed first, see shards.py)
+        auto: Pick batch size, workers and image caching for this host
+            (see autoconfig.py); overrides batch
+        throughput: Record per-batch data wait, compute, images/sec and memory
+            in throughput.csv next to results.csv (see throughput.py)
+        overrides: Extra model.train arguments, replacing the defaults below
+            (e.g. augmentation or lr0 from a sweep, see sweep.py)
+        resume: Continue an interrupted run with the same name from its
+            last.pt (arguments, optimizer and epoch come from the checkpoint)
+        checkpoint_minutes: Write last.pt at least this often, also mid-epoch
+            (see checkpoint.py)
     """
     print("="*60)
     print("🐟 FISH FINGERLINGS TRAINING")
@@ -55,16 +84,21 @@ def train_fingerlings(
     print(f"Model: {model_name}")
     print(f"Epochs: {epochs}")
     print(f"Image size: {imgsz}")
-    print(f"Batch size: {batch}")
+    print(f"Batch size: {'auto' if auto else batch}")
     print(f"Patience: {patience}")
     print("="*60 + "\n")
     
     # Setup config
     setup_training_config(data_yaml)
     
+    # Continue an interrupted run with the same name
+    last = find_resumable('modules/fingerlings/runs/detect', name) if resume else None
+    if last:
+        print(f"♻️  Resuming interrupted run from: {last}\n")
+    
     # Load model
     print("📦 Loading model...")
-    model = YOLO(model_name)
+    model = YOLO(last or model_name)
     
     # Auto-detect device
     if device is None:
@@ -80,10 +114,37 @@ def train_fingerlings(
     
     print(f"Device: {device}\n")
     
+    # Pick batch size, workers and image cache for this host
+    workers, cache = 0, False
+    if last:
+        # Same trainer and shards as the interrupted run; the other
+        # arguments come from the checkpoint
+        run = recorded_args(Path(last).parents[1])
+        data_yaml, imgsz = run.get('data', data_yaml), run.get('imgsz', imgsz)
+        if run.get('auto'):
+            auto = True
+            shards = shards or run['auto']['cache'] == 'shards'
+    elif auto:
+        config = auto_config(model_name, data_yaml, imgsz, device)
+        print_config(config)
+        batch, workers = config['batch'], config['workers']
+        cache = config['cache'] == 'ram'
+        shards = shards or config['cache'] == 'shards'
+        model.add_callback("on_pretrain_routine_start", record_config(config))
+    trainer = (AutoShardTrainer if shards else AutoTrainer) if auto else (ShardTrainer if shards else None)
+    trainer = resumable(trainer, checkpoint_minutes)
+    if throughput:
+        add_throughput_callbacks(model)
+    
+    # Decode every image once instead of once per epoch
+    if shards:
+        pack_dataset(data_yaml, imgsz)
+    
     # Training parameters optimized for small objects
     print("🎯 Starting training...")
-    results = model.train(
+    train_args = dict(
         data=data_yaml,
+        trainer=trainer,
         epochs=epochs,
         imgsz=imgsz,
         batch=batch,
@@ -93,7 +154,8 @@ def train_fingerlings(
         device=device,
         
         # Stability settings
-        workers=0,
+        workers=workers,
+        cache=cache,
         deterministic=True,
         seed=42,
         
@@ -129,6 +191,12 @@ def train_fingerlings(
         amp=True,
         verbose=True,
     )
+    train_args.update(overrides or {})
+    if last:
+        # Arguments come from the checkpoint, only the trainer is passed again
+        results = model.train(resume=True, trainer=trainer)
+    else:
+        results = model.train(**train_args)
     
     print("\n" + "="*60)
     print("✅ TRAINING COMPLETE!")
@@ -151,6 +219,12 @@ def main():
     parser.add_argument("--name", default="fingerlings_training", help="Run name")
     parser.add_argument("--patience", type=int, default=50, help="Early stopping patience")
     parser.add_argument("--device", default=None, help="Device (mps/cuda/cpu)")
+    parser.add_argument("--shards", action="store_true", help="Train from pre-decoded memory-mapped image shards")
+    parser.add_argument("--auto", action="store_true", help="Pick batch, workers and caching for this host")
+    parser.add_argument("--no-throughput", action="store_true", help="Do not record per-batch throughput.csv")
+    parser.add_argument("--no-resume", action="store_true", help="Do not resume an interrupted run with the same name")
+    parser.add_argument("--checkpoint-minutes", type=float, default=CHECKPOINT_MINUTES,
+                        help="Maximum minutes between checkpoints")
 
     args = parser.parse_args()
 
@@ -163,7 +237,12 @@ def main():
         batch=args.batch,
         name=args.name,
         patience=args.patience,
-        device=args.device
+        device=args.device,
+        shards=args.shards,
+        auto=args.auto,
+        throughput=not args.no_throughput,
+        resume=not args.no_resume,
+        checkpoint_minutes=args.checkpoint_minutes
     )
 
 
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Multi-process CPU counting for Fingerlings
+Each worker loads the model once, runs a fixed number of torch threads and
+can be pinned to its own cores; images are handed out in chunks
+"""
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+_worker = {}
+
+
+def core_groups(workers, threads_per_worker):
+    """Split the usable cores into one group of threads_per_worker cores per worker"""
+    cores = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else list(range(os.cpu_count()))
+    return [[cores[(w * threads_per_worker + t) % len(cores)] for t in range(threads_per_worker)]
+            for w in range(workers)]
+
+
+def _init_worker(model_path, conf, imgsz, show_dots, device, threads, cores_queue):
+    """Process initializer: pin, limit threads and load the model once"""
+    cores = cores_queue.get() if cores_queue is not None else None
+    if cores and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cores)
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+
+    import torch
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+
+    try:
+        from .model_cache import get_model
+    except ImportError:
+        from model_cache import get_model
+
+    _worker.update(model=get_model(model_path, device), conf=conf, imgsz=imgsz,
+                   show_dots=show_dots, device=device)
+
+
+def _count_chunk(image_files, batch_size=1):
+    """Count one chunk of images inside a worker"""
+    try:
+        from .test import predict_images, box_centroids, save_dots
+    except ImportError:
+        from test import predict_images, box_centroids, save_dots
+    import cv2
+
+    images = []
+    for image_path in image_files:
+        img = cv2.imread(image_path)
+        if img is None:
+            print(f"⚠️  Skipping unreadable image: {image_path}")
+            continue
+        images.append((image_path, img))
+
+    counts = []
+    for i in range(0, len(images), batch_size):
+        for image_path, result in predict_images(_worker['model'], images[i:i + batch_size], _worker['conf'],
+                                                 _worker['imgsz'], _worker['device']):
+            centroids = box_centroids(result.boxes)
+            if _worker['show_dots']:
+                save_dots(image_path, result.orig_img, centroids)
+            counts.append((image_path, len(centroids), centroids))
+    return counts
+
+
+def count_parallel(model_path, image_files, conf=0.25, imgsz=640, show_dots=True, device='cpu',
+                   workers=4, threads_per_worker=None, pin_cpus=False, chunk_size=16, batch_size=1):
+    """
+    Count images with a pool of single-model worker processes
+
+    Args:
+        model_path: Path to trained model weights
+        image_files: Image paths
+        conf: Confidence threshold
+        imgsz: Image size for inference
+        show_dots: Draw red dots on detections (written by the workers)
+        device: Device to use (workers are meant for CPU)
+        workers: Number of worker processes
+        threads_per_worker: torch threads per worker (default: cores // workers)
+        pin_cpus: Pin every worker to its own threads_per_worker cores
+        chunk_size: Images handed to a worker at a time
+        batch_size: Images per forward pass inside a worker
+
+    Yields:
+        (image_path, count, centroids float32[N, 2]) as chunks complete, in input order
+    """
+    threads_per_worker = threads_per_worker or max(1, os.cpu_count() // workers)
+    image_files = [str(f) for f in image_files]
+    chunks = [image_files[i:i + chunk_size] for i in range(0, len(image_files), chunk_size)]
+
+    spawn = get_context('spawn')
+    cores_queue = None
+    if pin_cpus:
+        cores_queue = spawn.Queue()
+        for group in core_groups(workers, threads_per_worker):
+            cores_queue.put(group)
+
+    with ProcessPoolExecutor(workers, mp_context=spawn, initializer=_init_worker,
+                             initargs=(str(model_path), conf, imgsz, show_dots, device,
+                                       threads_per_worker, cores_queue)) as pool:
+        for counts in pool.map(_count_chunk, chunks, itertools.repeat(batch_size)):
+            yield from counts
+
+
+def scaling_curve(model_path, images_dir, worker_counts=(1, 2, 4), thread_counts=(1, 2, 4), conf=0.25,
+                  imgsz=640, pin_cpus=True, chunk_size=16, batch_size=1, output=None):
+    """
+    Measure throughput for every (workers, threads per worker) combination
+
+    Throughput is measured from the first finished chunk, so worker start-up
+    and model loading are reported separately.
+
+    Returns:
+        List of dicts with workers, threads, startup_s and images/sec
+    """
+    images_path = Path(images_dir)
+    image_files = sorted(list(images_path.glob("*.jpg")) + list(images_path.glob("*.png")))
+    print(f"📁 Found {len(image_files)} images\n")
+    if not image_files:
+        print("❌ No images found")
+        return []
+
+    rows = []
+    for workers, threads in itertools.product(worker_counts, thread_counts):
+        start = time.perf_counter()
+        first = None
+        done = 0
+        for _ in count_parallel(model_path, image_files, conf, imgsz, False, 'cpu',
+                                workers, threads, pin_cpus, chunk_size, batch_size):
+            if first is None:
+                first = time.perf_counter()
+            done += 1
+        end = time.perf_counter()
+
+        steady = done - min(chunk_size, done)
+        row = {
+            'workers': workers,
+            'threads': threads,
+            'cores': workers * threads,
+            'startup_s': first - start,
+            'throughput': steady / (end - first) if steady and end > first else done / (end - start),
+            'wall_throughput': done / (end - start),
+        }
+        rows.append(row)
+        print(f"workers {workers:2d} x threads {threads:2d} ({row['cores']:3d} cores) | "
+              f"{row['throughput']:7.1f} img/s steady | {row['wall_throughput']:7.1f} img/s wall | "
+              f"start-up {row['startup_s']:.1f}s")
+
+    if output:
+        output = Path(output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output.with_suffix('.json'), 'w') as f:
+            json.dump(rows, f, indent=2)
+
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+
+        fig, ax = plt.subplots(figsize=(8, 5))
+        for threads in thread_counts:
+            points = [r for r in rows if r['threads'] == threads]
+            ax.plot([r['workers'] for r in points], [r['throughput'] for r in points],
+                    marker='o', label=f'{threads} threads/worker')
+        ax.set_xlabel('Workers')
+        ax.set_ylabel('Images / sec')
+        ax.set_title('Fingerlings CPU scaling')
+        ax.grid(True, alpha=0.3)
+        ax.legend()
+        fig.savefig(output.with_suffix('.png'), dpi=120, bbox_inches='tight')
+        plt.close(fig)
+        print(f"\n💾 Scaling curve saved to: {output.with_suffix('.png')}")
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fingerlings CPU scaling curves (workers x threads)")
+    parser.add_argument("--model", required=True, help="Path to model weights")
+    parser.add_argument("--images-dir", required=True, help="Path to directory with images")
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4, 8], help="Worker counts to sweep")
+    parser.add_argument("--threads", nargs="+", type=int, default=[1, 2, 4], help="Threads per worker to sweep")
+    parser.add_argument("--conf", type=float, default=0.25, help="Confidence threshold")
+    parser.add_argument("--imgsz", type=int, default=640, help="Image size")
+    parser.add_argument("--chunk-size", type=int, default=16, help="Images per work chunk")
+    parser.add_argument("--batch-size", type=int, default=1, help="Images per forward pass inside a worker")
+    parser.add_argument("--no-pin", action="store_true", help="Don't pin workers to cores")
+    parser.add_argument("--output", default="modules/fingerlings/benchmarks/scaling", help="Output path (.json/.png)")
+
+    args = parser.parse_args()
+
+    scaling_curve(args.model, args.images_dir, args.workers, args.threads, args.conf, args.imgsz,
+                  not args.no_pin, args.chunk_size, args.batch_size, args.output)
+
+
+if __name__ == "__main__":
+    main()
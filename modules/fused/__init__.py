@@ -0,0 +1,13 @@
+"""
+Fused Baby Shrimp + Fingerlings Detection and Counting Module
+One two-class model, both counts from a single forward pass
+"""
+from .train import train_fused
+from .model_cache import ModelCache, get_model, clear_model_cache
+from .dataset import build_fused_dataset
+from .test import test_fused, test_batch, CLASS_MODULES
+
+__all__ = [
+    'train_fused', 'test_fused', 'test_batch', 'build_fused_dataset', 'CLASS_MODULES',
+    'ModelCache', 'get_model', 'clear_model_cache',
+]
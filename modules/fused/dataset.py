@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Build the fused two-class dataset from the Baby Shrimp and Fingerlings datasets
+Class IDs are remapped per source; images are hard-linked instead of copied
+"""
+import argparse
+import math
+import os
+import shutil
+from pathlib import Path
+import yaml
+
+# (module, dataset directory, class name); the position is the fused class ID
+SOURCES = (
+    ('baby_shrimp', 'modules/baby_shrimp/dataset', 'babyshrimp'),
+    ('fingerlings', 'modules/fingerlings/dataset', 'fingerling'),
+)
+SPLITS = ('train', 'valid', 'test')
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png')
+
+
+def link_or_copy(src, dst):
+    """Hard-link src to dst, falling back to a copy across filesystems"""
+    dst.unlink(missing_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def image_stale(src, dst):
+    """True if dst is missing or no longer the same file as src"""
+    if not dst.exists():
+        return True
+    src_stat, dst_stat = src.stat(), dst.stat()
+    if (src_stat.st_dev, src_stat.st_ino) == (dst_stat.st_dev, dst_stat.st_ino):
+        return False
+    # Copies keep the source mtime (copy2), so any difference means src changed
+    return src_stat.st_size != dst_stat.st_size or src_stat.st_mtime != dst_stat.st_mtime
+
+
+def remap_label(src, dst, class_id):
+    """
+    Write a label file with every object moved to class_id
+
+    Both sources are single-class, so every row (box or polygon) belongs to
+    the source class and only the leading class ID changes. A missing src
+    gives an empty label file (background image).
+
+    Returns:
+        True if dst was written, False if it already had this content
+    """
+    rows = []
+    if src.exists():
+        with open(src, 'r') as f:
+            for line in f:
+                values = line.split()
+                if values:
+                    rows.append(" ".join([str(class_id)] + values[1:]))
+    text = "\n".join(rows) + ("\n" if rows else "")
+    if dst.exists() and dst.read_text() == text:
+        return False
+    with open(dst, 'w') as f:
+        f.write(text)
+    return True
+
+
+def build_fused_dataset(output="modules/fused/dataset", sources=SOURCES, balance=False):
+    """
+    Combine the module datasets into one dataset with one class per module
+
+    Files are prefixed with the module name, so equal file names from the two
+    sources never collide. Re-running only writes what changed: new images,
+    images replaced in the source, and labels whose remapped content differs
+    (so edited source labels reach the fused set).
+
+    Args:
+        output: Fused dataset directory
+        sources: (module, dataset dir, class name) per fused class
+        balance: Repeat train images of smaller sources so every class has
+            about as many train images as the largest source
+
+    Returns:
+        Path to the fused data.yaml
+    """
+    output = Path(output)
+    print("🔄 Building fused dataset...")
+
+    train_sizes = {module: len([p for p in (Path(d) / 'train' / 'images').glob('*')
+                                if p.suffix.lower() in IMAGE_SUFFIXES])
+                   for module, d, _ in sources}
+    largest = max(train_sizes.values())
+
+    for split in SPLITS:
+        (output / split / 'images').mkdir(parents=True, exist_ok=True)
+        (output / split / 'labels').mkdir(parents=True, exist_ok=True)
+
+        for class_id, (module, dataset_dir, class_name) in enumerate(sources):
+            images_dir = Path(dataset_dir) / split / 'images'
+            labels_dir = Path(dataset_dir) / split / 'labels'
+            repeats = math.ceil(largest / train_sizes[module]) if balance and split == 'train' and train_sizes[module] else 1
+
+            added = updated = skipped = 0
+            for img_path in sorted(images_dir.glob('*')):
+                if img_path.suffix.lower() not in IMAGE_SUFFIXES:
+                    continue
+                label_path = labels_dir / f"{img_path.stem}.txt"
+
+                for repeat in range(repeats):
+                    stem = f"{module}_{img_path.stem}" + (f"_rep{repeat}" if repeat else "")
+                    dst_img = output / split / 'images' / f"{stem}{img_path.suffix}"
+                    dst_label = output / split / 'labels' / f"{stem}.txt"
+                    new = not dst_img.exists()
+                    changed = image_stale(img_path, dst_img)
+                    if changed:
+                        link_or_copy(img_path, dst_img)
+                    changed = remap_label(label_path, dst_label, class_id) or changed
+
+                    if new:
+                        added += 1
+                    elif changed:
+                        updated += 1
+                    else:
+                        skipped += 1
+
+            if added or updated or skipped:
+                print(f"  {split:5} | {module} → class {class_id} ({class_name}): "
+                      f"{added} added, {updated} updated, {skipped} up to date"
+                      + (f", x{repeats}" if repeats > 1 else ""))
+
+    data_yaml = output / 'data.yaml'
+    with open(data_yaml, 'w') as f:
+        yaml.safe_dump({
+            'path': str(output.resolve()),
+            'train': 'train/images',
+            'val': 'valid/images',
+            'test': 'test/images',
+            'nc': len(sources),
+            'names': [class_name for _, _, class_name in sources],
+        }, f, sort_keys=False)
+
+    print("\n✅ Fused dataset ready!")
+    print(f"📄 Config file: {data_yaml}")
+    return str(data_yaml)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the fused Baby Shrimp + Fingerlings dataset")
+    parser.add_argument("--output", default="modules/fused/dataset", help="Fused dataset directory")
+    parser.add_argument("--balance", action="store_true", help="Repeat train images of the smaller dataset")
+
+    args = parser.parse_args()
+
+    build_fused_dataset(args.output, balance=args.balance)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Test the fused model: Baby Shrimp and Fingerlings counts from one forward pass
+"""
+import argparse
+import time
+from pathlib import Path
+import cv2
+import numpy as np
+
+try:
+    from .model_cache import get_model
+except ImportError:
+    from model_cache import get_model
+
+# Fused class ID → module whose counts it replaces
+CLASS_MODULES = ('baby_shrimp', 'fingerlings')
+DOT_COLORS = {'baby_shrimp': (0, 0, 255), 'fingerlings': (255, 0, 0)}
+
+# Pixel offsets of a filled dot, taken from cv2.circle (see baby_shrimp/test.py)
+DOT_RADIUS = 5
+_dot_stencil = np.zeros((2 * DOT_RADIUS + 1, 2 * DOT_RADIUS + 1), dtype=np.uint8)
+cv2.circle(_dot_stencil, (DOT_RADIUS, DOT_RADIUS), radius=DOT_RADIUS, color=1, thickness=-1)
+_dot_ys, _dot_xs = np.nonzero(_dot_stencil)
+DOT_OFFSETS = (_dot_ys - DOT_RADIUS, _dot_xs - DOT_RADIUS)
+
+
+def class_thresholds(conf):
+    """Per-module confidence thresholds from a float or a {module: conf} dict"""
+    if isinstance(conf, dict):
+        return {module: conf.get(module, 0.25) for module in CLASS_MODULES}
+    return {module: conf for module in CLASS_MODULES}
+
+
+def split_by_class(result, conf):
+    """
+    Split one fused result into per-module centroids
+
+    Args:
+        result: Ultralytics result of the fused model
+        conf: {module: threshold}
+
+    Returns:
+        {module: float32 array (N, 2) of centres}
+    """
+    xyxy = result.boxes.xyxy.cpu().numpy()
+    classes = result.boxes.cls.cpu().numpy().astype(int)
+    scores = result.boxes.conf.cpu().numpy()
+    centroids = (xyxy[:, :2] + xyxy[:, 2:]) / 2
+
+    return {
+        module: centroids[(classes == class_id) & (scores >= conf[module])]
+        for class_id, module in enumerate(CLASS_MODULES)
+    }
+
+
+def draw_dots(img, centroids, color):
+    """Draw a filled dot at every centroid in a single vectorized write"""
+    centers = centroids.astype(np.int32)
+    ys = (centers[:, 1:2] + DOT_OFFSETS[0]).ravel()
+    xs = (centers[:, 0:1] + DOT_OFFSETS[1]).ravel()
+    inside = (ys >= 0) & (ys < img.shape[0]) & (xs >= 0) & (xs < img.shape[1])
+    img[ys[inside], xs[inside]] = color
+    return img
+
+
+def save_dots(image_path, img, centroids_by_module):
+    """Draw red (shrimp) and blue (fingerlings) dots plus both counts and save the image"""
+    for module, centroids in centroids_by_module.items():
+        draw_dots(img, centroids, DOT_COLORS[module])
+
+    text = " | ".join(f"{module}: {len(c)}" for module, c in centroids_by_module.items())
+    cv2.putText(img, text, (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 2)
+
+    output_dir = Path("runs/detect/fused_predict_dots")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / Path(image_path).name
+    cv2.imwrite(str(output_path), img)
+    return str(output_path)
+
+
+def print_detection(image_path, counts, conf, save_location):
+    """Print the detection banner for one image"""
+    print("\n" + "="*50)
+    print("✅ DETECTION RESULTS")
+    print("="*50)
+    print(f"📸 Image: {Path(image_path).name}")
+    print(f"🦐 Count: {counts['baby_shrimp']} babyshrimps detected")
+    print(f"🐟 Count: {counts['fingerlings']} fingerlings detected")
+    print(f"📊 Confidence: {conf}")
+    print(f"💾 Saved to: {save_location}")
+    print("="*50 + "\n")
+
+
+def test_fused(model_path, image_path, conf=0.25, imgsz=640, show_dots=True, device=None, verbose=True):
+    """
+    Count both classes on a single image with one forward pass
+
+    Args:
+        model_path: Path to fused model weights
+        image_path: Path to test image
+        conf: Confidence threshold, or {'baby_shrimp': c, 'fingerlings': c}
+        imgsz: Image size for inference
+        show_dots: Draw dots on detections
+        device: Device to use (None for auto-detect)
+        verbose: Print the detection banner
+
+    Returns:
+        {'baby_shrimp': count, 'fingerlings': count}, the same numbers
+        test_baby_shrimp / test_fingerlings return
+    """
+    model = get_model(model_path, device)
+    thresholds = class_thresholds(conf)
+
+    results = model.predict(
+        source=image_path,
+        imgsz=imgsz,
+        conf=min(thresholds.values()),
+        device=device,
+        save=False,
+        verbose=False
+    )
+    centroids = split_by_class(results[0], thresholds)
+    counts = {module: len(c) for module, c in centroids.items()}
+
+    save_location = str(results[0].save_dir)
+    if show_dots:
+        save_location = save_dots(image_path, results[0].orig_img, centroids)
+    if verbose:
+        print_detection(image_path, counts, conf, save_location)
+
+    return counts
+
+
+def test_batch(model_path, images_dir, conf=0.25, imgsz=640, show_dots=True, device=None, batch_size=1,
+               verbose=False, summary=True):
+    """
+    Count both classes on every image of a directory
+
+    Returns:
+        {'baby_shrimp': {filename: count}, 'fingerlings': {filename: count}},
+        i.e. one dict per module in the format of that module's test_batch
+    """
+    model = get_model(model_path, device)
+    thresholds = class_thresholds(conf)
+
+    images_path = Path(images_dir)
+    image_files = list(images_path.glob("*.jpg")) + list(images_path.glob("*.png"))
+    if summary:
+        print(f"📁 Found {len(image_files)} images\n")
+
+    results = {module: {} for module in CLASS_MODULES}
+    start = time.perf_counter()
+
+    def run(batch):
+        predictions = model.predict(
+            source=[img for _, img in batch],
+            imgsz=imgsz,
+            conf=min(thresholds.values()),
+            device=device,
+            save=False,
+            verbose=False
+        )
+        for (image_path, _), result in zip(batch, predictions):
+            centroids = split_by_class(result, thresholds)
+            save_location = save_dots(image_path, result.orig_img, centroids) if show_dots else "(not saved)"
+            counts = {module: len(c) for module, c in centroids.items()}
+            if verbose:
+                print_detection(image_path, counts, conf, save_location)
+            for module, count in counts.items():
+                results[module][Path(image_path).name] = count
+
+    pending = {}
+    for img_file in image_files:
+        img = cv2.imread(str(img_file))
+        if img is None:
+            print(f"⚠️  Skipping unreadable image: {img_file}")
+            continue
+        # Same-shaped batches get the same letterbox padding as single images
+        batch = pending.setdefault(img.shape, [])
+        batch.append((str(img_file), img))
+        if len(batch) == batch_size:
+            run(pending.pop(img.shape))
+    for batch in pending.values():
+        run(batch)
+
+    elapsed = time.perf_counter() - start
+
+    if summary and image_files:
+        print("\n" + "="*50)
+        print("📊 BATCH TEST SUMMARY")
+        print("="*50)
+        print(f"Total images: {len(image_files)}")
+        for module, counts in results.items():
+            total = sum(counts.values())
+            print(f"{module}: {total} detected (average {total / len(image_files):.1f})")
+        print(f"Batch size: {batch_size}")
+        print(f"Throughput: {len(image_files) / elapsed:.1f} images/sec")
+        print("="*50 + "\n")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test the fused Baby Shrimp + Fingerlings model")
+    parser.add_argument("--model", required=True, help="Path to fused model weights")
+    parser.add_argument("--image", help="Path to single test image")
+    parser.add_argument("--images-dir", help="Path to directory with images")
+    parser.add_argument("--conf", type=float, default=0.25, help="Confidence threshold for both classes")
+    parser.add_argument("--conf-baby-shrimp", type=float, default=None, help="Override the baby shrimp threshold")
+    parser.add_argument("--conf-fingerlings", type=float, default=None, help="Override the fingerlings threshold")
+    parser.add_argument("--imgsz", type=int, default=640, help="Image size")
+    parser.add_argument("--no-dots", action="store_true", help="Don't draw dots")
+    parser.add_argument("--verbose", action="store_true", help="Print a result banner for every image (--images-dir)")
+    parser.add_argument("--device", default=None, help="Device (mps/cuda/cpu)")
+    parser.add_argument("--batch-size", type=int, default=1, help="Images per forward pass (--images-dir only)")
+
+    args = parser.parse_args()
+
+    if not args.image and not args.images_dir:
+        print("❌ Error: Must provide --image or --images-dir")
+        return
+
+    conf = args.conf
+    if args.conf_baby_shrimp is not None or args.conf_fingerlings is not None:
+        conf = {
+            'baby_shrimp': args.conf_baby_shrimp if args.conf_baby_shrimp is not None else args.conf,
+            'fingerlings': args.conf_fingerlings if args.conf_fingerlings is not None else args.conf,
+        }
+
+    if args.image:
+        test_fused(args.model, args.image, conf, args.imgsz, not args.no_dots, args.device)
+    else:
+        test_batch(args.model, args.images_dir, conf, args.imgsz, not args.no_dots, args.device,
+                   args.batch_size, args.verbose)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Load generator for the counting server
+Sends concurrent image uploads to /count/<module> and reports latency and throughput
+"""
+import argparse
+import itertools
+import json
+import threading
+import time
+import urllib.request
+from pathlib import Path
+import numpy as np
+
+
+def post_image(url, data, timeout=60):
+    """POST raw image bytes and return the decoded JSON response"""
+    req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/octet-stream'})
+    with urllib.request.urlopen(req, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def run_load(url, module, images_dir, concurrency=8, requests=200):
+    """
+    Fire `requests` uploads from `concurrency` client threads
+
+    Returns:
+        Dict with throughput, latency percentiles and mean server batch size
+    """
+    images_path = Path(images_dir)
+    image_files = sorted(list(images_path.glob("*.jpg")) + list(images_path.glob("*.png")))
+    if not image_files:
+        raise FileNotFoundError(f"No images found in {images_dir}")
+    payloads = [f.read_bytes() for f in image_files]
+
+    endpoint = f"{url.rstrip('/')}/count/{module}"
+    print(f"🎯 {endpoint}: {requests} requests from {concurrency} clients ({len(payloads)} distinct images)")
+
+    jobs = itertools.islice(itertools.cycle(payloads), requests)
+    lock = threading.Lock()
+    latencies, batch_sizes, errors = [], [], []
+
+    def client():
+        while True:
+            with lock:
+                data = next(jobs, None)
+            if data is None:
+                return
+            t0 = time.perf_counter()
+            try:
+                body = post_image(endpoint, data)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            with lock:
+                latencies.append((time.perf_counter() - t0) * 1000)
+                batch_sizes.append(body['batch_size'])
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    if not latencies:
+        print(f"❌ All requests failed: {errors[0] if errors else 'no requests sent'}")
+        return {}
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    report = {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'throughput': len(latencies) / elapsed,
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+        'mean_batch': float(np.mean(batch_sizes)),
+    }
+
+    print("\n" + "="*50)
+    print("📊 LOAD TEST SUMMARY")
+    print("="*50)
+    print(f"Requests: {report['requests']} ok, {report['errors']} failed")
+    print(f"Throughput: {report['throughput']:.1f} requests/sec")
+    print(f"Latency p50/p95/p99: {p50:.0f} / {p95:.0f} / {p99:.0f} ms")
+    print(f"Mean server batch: {report['mean_batch']:.2f}")
+    print("="*50 + "\n")
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the counting server")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Server URL")
+    parser.add_argument("--module", default="baby_shrimp", choices=["baby_shrimp", "fingerlings"], help="Module endpoint")
+    parser.add_argument("--images-dir", required=True, help="Images to upload (cycled)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=200, help="Total requests")
+
+    args = parser.parse_args()
+
+    run_load(args.url, args.module, args.images_dir, args.concurrency, args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+HTTP counting server for the Baby Shrimp and Fingerlings models
+Loads each model once and micro-batches concurrent requests per module
+"""
+import argparse
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import cv2
+import numpy as np
+from flask import Flask, jsonify, request
+
+import baby_shrimp.test as baby_shrimp_test
+import fingerlings.test as fingerlings_test
+
+MODULES = {
+    'baby_shrimp': baby_shrimp_test,
+    'fingerlings': fingerlings_test,
+}
+
+
+class MicroBatcher:
+    """
+    Collects concurrent requests into micro-batches for one model
+
+    A batch is flushed when it holds max_batch images or when the oldest
+    image has waited max_wait_ms, whichever comes first. Inference runs on a
+    single thread, so the model is never shared between threads.
+    """
+
+    def __init__(self, module, model_path, conf=0.25, imgsz=640, device=None, max_batch=8, max_wait_ms=10):
+        self.module = module
+        self.model = module.get_model(model_path, device)
+        self.conf = conf
+        self.imgsz = imgsz
+        self.device = device
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+
+        self.batches = 0
+        self.images = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, img):
+        """
+        Queue a decoded BGR image
+
+        Returns:
+            Future resolving to (count, centroids float32[N, 2], batch size)
+        """
+        future = Future()
+        self._queue.put((img, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            try:
+                outputs = self.module.predict_images(
+                    self.model, list(enumerate(img for img, _ in batch)), self.conf, self.imgsz, self.device)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.images += len(batch)
+            for index, result in outputs:
+                centroids = self.module.box_centroids(result.boxes)
+                batch[index][1].set_result((len(centroids), centroids, len(batch)))
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'images': self.images,
+            'mean_batch': self.images / self.batches if self.batches else 0.0,
+            'queued': self._queue.qsize(),
+        }
+
+
+def create_app(batchers, timeout=30):
+    """
+    Build the Flask app
+
+    Args:
+        batchers: Dict mapping module name to its MicroBatcher
+        timeout: Seconds a request waits for its result
+    """
+    app = Flask(__name__)
+
+    @app.get("/health")
+    def health():
+        return jsonify({name: batcher.stats() for name, batcher in batchers.items()})
+
+    @app.post("/count/<module>")
+    def count(module):
+        batcher = batchers.get(module)
+        if batcher is None:
+            return jsonify({'error': f"Unknown module '{module}', expected one of {sorted(batchers)}"}), 404
+
+        # Multipart upload ('image' field) or the raw image bytes as the body
+        upload = request.files.get('image')
+        data = upload.read() if upload else request.get_data()
+        img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR) if data else None
+        if img is None:
+            return jsonify({'error': "Request does not contain a readable image"}), 400
+
+        start = time.perf_counter()
+        n, centroids, batch_size = batcher.submit(img).result(timeout=timeout)
+        return jsonify({
+            'module': module,
+            'count': n,
+            'centroids': centroids.astype(np.float64).round(1).tolist(),
+            'batch_size': batch_size,
+            'latency_ms': (time.perf_counter() - start) * 1000,
+        })
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP counting server (POST /count/<module>)")
+    parser.add_argument("--baby-shrimp-model", help="Path to Baby Shrimp best.pt")
+    parser.add_argument("--fingerlings-model", help="Path to Fingerlings best.pt")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address")
+    parser.add_argument("--port", type=int, default=8000, help="Port")
+    parser.add_argument("--conf", type=float, default=0.25, help="Confidence threshold")
+    parser.add_argument("--imgsz", type=int, default=640, help="Image size")
+    parser.add_argument("--device", default=None, help="Device (mps/cuda/cpu)")
+    parser.add_argument("--backend", default="torch", choices=baby_shrimp_test.BACKENDS,
+                        help="Inference backend (onnx/openvino are exported next to the weights on first use)")
+    parser.add_argument("--max-batch", type=int, default=8, help="Flush a micro-batch at this many images")
+    parser.add_argument("--max-wait-ms", type=float, default=10, help="Flush a micro-batch after this wait")
+
+    args = parser.parse_args()
+
+    model_paths = {'baby_shrimp': args.baby_shrimp_model, 'fingerlings': args.fingerlings_model}
+    if not any(model_paths.values()):
+        print("❌ Error: Must provide --baby-shrimp-model and/or --fingerlings-model")
+        return
+
+    batchers = {}
+    for name, model_path in model_paths.items():
+        if not model_path:
+            continue
+        module = MODULES[name]
+        weights = module.resolve_backend(model_path, args.backend, args.imgsz)
+        batchers[name] = MicroBatcher(module, weights, args.conf, args.imgsz, args.device,
+                                      args.max_batch, args.max_wait_ms)
+        # Warm up so the first request does not pay for graph setup
+        batchers[name].submit(np.zeros((args.imgsz, args.imgsz, 3), dtype=np.uint8)).result()
+
+    print(f"🚀 Serving {', '.join(f'/count/{name}' for name in batchers)} on http://{args.host}:{args.port}")
+    print(f"📦 Micro-batch: up to {args.max_batch} images or {args.max_wait_ms} ms")
+    create_app(batchers).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()